@@ -1,27 +1,41 @@
 """
 Django settings for cstt project.
 
-Generated by 'django-admin startproject' using Django 4.2.7.
+Generated by 'django-admin startproject' using Django 4.2.7, now runs on
+Django 5.1 or later: the database connection pool below (DB_POOL, on by
+default) is a Django 5.1 feature.
+
+Runtime dependencies:
+    Django >= 5.1
+    psycopg[pool] >= 3.1      PostgreSQL driver and, for DB_POOL, psycopg-pool
+    djangorestframework, djangorestframework-simplejwt, django-cors-headers
+    python-dotenv, openai, orjson, cryptography
+    redis                     only with REDIS_URL
+    openpyxl                  only for Excel test case imports
 
 For more information on this file, see
-https://docs.djangoproject.com/en/4.2/topics/settings/
+https://docs.djangoproject.com/en/5.1/topics/settings/
 
 For the full list of settings and their values, see
-https://docs.djangoproject.com/en/4.2/ref/settings/
+https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv
+import copy
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Environment overrides from .env, read before any setting below uses them
+load_dotenv()
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # Quick-start development settings - unsuitable for production
-# See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
+# See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = 'django-insecure-(z9e#a8nexh1_e53ut@xr=&0880i7m4u_87m^fo5n=srcn-@dr'
@@ -48,6 +62,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'csttapp.middleware.PerformanceMiddleware',
+    'csttapp.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -58,6 +74,43 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Request timing, Server-Timing headers and the `metrics/` scrape endpoint.
+# The endpoint requires METRICS_TOKEN, unless DEBUG is on and the request
+# is local.
+PERFORMANCE_METRICS = {
+    'ENABLED': os.getenv('PERFORMANCE_METRICS', 'false').lower() in ('1', 'true'),
+    'SERVER_TIMING': True,
+    'TOKEN': os.getenv('METRICS_TOKEN'),
+}
+
+# Shared by the worker processes when REDIS_URL is set: the JWT user cache,
+# team rosters and AI quotas. Otherwise each process caches in memory.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+
+# Quotas of the LLM backed endpoints (csttapp.quotas). Rates are requests a
+# minute, with bursts of up to *_BURST, and *_CONCURRENCY caps requests in
+# flight; 0 turns a limit off. UPSTREAM_RATE is the budget of all LLM calls
+# together, kept under the provider's limit: bursts over it wait up to
+# UPSTREAM_MAX_WAIT seconds for their turn before getting a 429.
+AI_QUOTAS = {
+    'ENABLED': os.getenv('AI_QUOTAS', 'true').lower() in ('1', 'true'),
+    'USER_RATE': int(os.getenv('AI_QUOTA_USER_RATE', 10)),
+    'USER_BURST': int(os.getenv('AI_QUOTA_USER_BURST', 5)),
+    'USER_CONCURRENCY': int(os.getenv('AI_QUOTA_USER_CONCURRENCY', 2)),
+    'TEAM_RATE': int(os.getenv('AI_QUOTA_TEAM_RATE', 60)),
+    'TEAM_BURST': int(os.getenv('AI_QUOTA_TEAM_BURST', 20)),
+    'TEAM_CONCURRENCY': int(os.getenv('AI_QUOTA_TEAM_CONCURRENCY', 8)),
+    'UPSTREAM_RATE': int(os.getenv('AI_QUOTA_UPSTREAM_RATE', 500)),
+    'UPSTREAM_BURST': int(os.getenv('AI_QUOTA_UPSTREAM_BURST', 20)),
+    'UPSTREAM_MAX_WAIT': float(os.getenv('AI_QUOTA_UPSTREAM_MAX_WAIT', 10)),
+}
+
 CORS_ALLOWED_ORIGINS = [
     'http://localhost:3000',
     'http://127.0.0.1:3000',
@@ -91,26 +144,84 @@ WSGI_APPLICATION = 'cstt.wsgi.application'
 
 
 # Database
-# https://docs.djangoproject.com/en/4.2/ref/settings/#databases
+# https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'csttapp.authentication.JWTAuthentication',
+    ),
+    # orjson backed JSON, the stock classes are used when it is not installed
+    'DEFAULT_RENDERER_CLASSES': (
+        'csttapp.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'csttapp.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ),
 }
 
+# Connections come from a psycopg pool kept by each worker process, sized
+# with DB_POOL_MIN_SIZE/DB_POOL_MAX_SIZE; this needs Django 5.1 and
+# psycopg[pool]. Behind an external pooler such as pgbouncer set
+# DB_POOL=false to use persistent connections instead.
+# Prepared statements are only safe when each client owns its server
+# connection, turn them off (DB_PREPARED_STATEMENTS=false) behind poolers in
+# transaction mode.
+
+DB_POOL = os.getenv('DB_POOL', 'true').lower() in ('1', 'true')
+DB_PREPARED_STATEMENTS = os.getenv('DB_PREPARED_STATEMENTS', 'true').lower() in ('1', 'true')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
         "OPTIONS": {
             "service": "cstt",
         },
+        # Validate connections before handing them out
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+if DB_POOL:
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+        'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+        # Recycle connections so server side memory and failovers are picked up
+        'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', 1800)),
+        'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', 300)),
+        # Seconds a request waits for a free connection before failing
+        'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', 60))
+
+if DB_PREPARED_STATEMENTS:
+    # Server side binding lets psycopg prepare a query after it ran prepare_threshold times
+    DATABASES['default']['OPTIONS']['server_side_binding'] = True
+    DATABASES['default']['OPTIONS']['prepare_threshold'] = int(os.getenv('DB_PREPARE_THRESHOLD', 5))
+
+# Read replicas, as comma separated pg_service names in DB_REPLICA_SERVICES.
+# Analytics, dashboards and lists read from them (csttapp.routers), except
+# for users who wrote in the last REPLICA_STICKY_SECONDS. Pins are kept in
+# the cache, so it has to be shared between workers for stickiness to hold.
+
+REPLICA_DATABASES = []
+for index, service in enumerate(filter(None, os.getenv('DB_REPLICA_SERVICES', '').split(',')), start=1):
+    alias = f'replica_{index}'
+    DATABASES[alias] = copy.deepcopy(DATABASES['default'])
+    DATABASES[alias]['OPTIONS']['service'] = service.strip()
+    # Tests read replicas through the primary connection
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['csttapp.routers.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 10))
+
 
 # Password validation
-# https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
+# https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -127,9 +238,30 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
-# Auth JWT
+# New passwords are hashed with PASSWORD_HASHER: scrypt, or argon2 once
+# argon2-cffi is installed. Hashes of the other hashers are still checked and
+# are upgraded on the user's next login.
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', 'scrypt')
+_PASSWORD_HASHERS = {
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'pbkdf2_sha256': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'pbkdf2_sha1': 'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+}
+PASSWORD_HASHERS = [
+    _PASSWORD_HASHERS[PASSWORD_HASHER],
+    *(path for algorithm, path in _PASSWORD_HASHERS.items() if algorithm != PASSWORD_HASHER),
+]
 
-load_dotenv()
+AUTHENTICATION_BACKENDS = ['csttapp.authentication.ModelBackend']
+
+# Password hashing runs in this many worker processes, 0 hashes on the
+# request thread. Beyond PASSWORD_HASHING_QUEUE hashes in flight, logins and
+# registrations are turned away with a 503 instead of queueing.
+PASSWORD_HASHING_WORKERS = int(os.getenv('PASSWORD_HASHING_WORKERS', 2))
+PASSWORD_HASHING_QUEUE = int(os.getenv('PASSWORD_HASHING_QUEUE', 16))
+
+# Auth JWT
 
 try:
     from .dev_settings import DEV_JWT_SECRET_KEY
@@ -162,8 +294,26 @@ SIMPLE_JWT = {
     'TOKEN_USER_CLASS': 'rest_framework_simplejwt.models.TokenUser',
 
     'JTI_CLAIM': 'jti',
+
+    # Rotated refresh tokens are blacklisted in csttapp.models.RevokedToken,
+    # purge it with `manage.py purge_revoked_tokens`
+    'TOKEN_REFRESH_SERIALIZER': 'csttapp.tokens.TokenRefreshSerializer',
 }
 
+# Asymmetric signing: when JWT_KEYS_FILE exists, tokens are signed with its
+# newest key (RS256, ES256 or EdDSA) and name it in their `kid` header, and
+# the public keys are served at .well-known/jwks.json for other services to
+# verify tokens. Keys are created and rotated with `python setup_jwt_keys.py
+# rotate`. JWT_ACCEPT_HS256 keeps tokens signed with JWT_SECRET_KEY valid
+# while switching over, until REFRESH_TOKEN_LIFETIME has passed.
+JWT_KEYS_FILE = os.getenv('JWT_KEYS_FILE', os.path.join(BASE_DIR, 'jwt_keys.json'))
+JWT_ACCEPT_HS256 = os.getenv('JWT_ACCEPT_HS256', 'false').lower() in ('1', 'true')
+
+# Authenticated users and their profile are cached per access token for this
+# many seconds (csttapp.authentication), 0 turns the cache off. With a per
+# process cache, other workers see user changes only once entries expire.
+JWT_USER_CACHE_TIMEOUT = int(os.getenv('JWT_USER_CACHE_TIMEOUT', 60))
+
 if SIMPLE_JWT['SIGNING_KEY'] == DEV_JWT_SECRET_KEY:
     import warnings
     warnings.warn(
@@ -173,8 +323,45 @@ if SIMPLE_JWT['SIGNING_KEY'] == DEV_JWT_SECRET_KEY:
         RuntimeWarning
     )
 
+# Logging
+# csttapp logs go out as JSON lines, written to stderr by a background thread.
+# Payload dumps are tagged extra={'sample': 'payload'} and sampled outside DEBUG.
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'sampling': {
+            '()': 'csttapp.log.SamplingFilter',
+            'rates': {'payload': 1.0 if DEBUG else 0.01},
+        },
+        'redact': {
+            '()': 'csttapp.log.RedactingFilter',
+        },
+    },
+    'formatters': {
+        'structured': {
+            '()': 'csttapp.log.StructuredFormatter',
+        },
+    },
+    'handlers': {
+        'background': {
+            'class': 'csttapp.log.BackgroundHandler',
+            'formatter': 'structured',
+            'filters': ['sampling', 'redact'],
+        },
+    },
+    'loggers': {
+        'csttapp': {
+            'handlers': ['background'],
+            'level': os.getenv('CSTT_LOG_LEVEL', 'DEBUG' if DEBUG else 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 # Internationalization
-# https://docs.djangoproject.com/en/4.2/topics/i18n/
+# https://docs.djangoproject.com/en/5.1/topics/i18n/
 
 LANGUAGE_CODE = 'en-us'
 
@@ -186,11 +373,11 @@ USE_TZ = True
 
 
 # Static files (CSS, JavaScript, Images)
-# https://docs.djangoproject.com/en/4.2/howto/static-files/
+# https://docs.djangoproject.com/en/5.1/howto/static-files/
 
 STATIC_URL = 'static/'
 
 # Default primary key field type
-# https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
+# https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
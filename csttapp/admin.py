@@ -2,7 +2,7 @@ from django.contrib import admin
 from .models import (
     Profile, Team, TeamMember, Project, TestSuite, TestCase, TestStep,
     TestExecution, StepResult, TestData, Defect, DefectHistory, DefectLink,
-    Analytics, AnalyticsDimension, AnalyticsMetric
+    Analytics, AnalyticsDimension, AnalyticsMetric, ClearedEmail
 )
 
 @admin.register(Profile)
@@ -109,4 +109,10 @@ class AnalyticsMetricAdmin(admin.ModelAdmin):
     list_display = ('analytics', 'metric_name', 'metric_value', 'created_at')
     search_fields = ('analytics__name', 'metric_name')
     list_filter = ('created_at',)
-    ordering = ['-created_at']
\ No newline at end of file
+    ordering = ['-created_at']
+@admin.register(ClearedEmail)
+class ClearedEmailAdmin(admin.ModelAdmin):
+    list_display = ('user', 'email', 'kept_by', 'was_active', 'cleared_at')
+    search_fields = ('email', 'user__username', 'kept_by__username')
+    list_filter = ('was_active',)
+    ordering = ['email']
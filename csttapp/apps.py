@@ -1,6 +1,14 @@
+from importlib import import_module
+
 from django.apps import AppConfig
 
 
 class CsttappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'csttapp'
+
+    def ready(self):
+        # Loaded for its side effect, registering the signal receivers
+        import_module(f'{self.name}.signals')
+        from . import jwt_keys
+        jwt_keys.install()
@@ -0,0 +1,108 @@
+import io
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+
+from .authentication import JWTAuthentication
+from .parsers import ORJSONParser
+from .renderers import dumps
+
+
+class JSONResponse(HttpResponse):
+    """The same compact JSON as the API's renderer, without the DRF response cycle"""
+    def __init__(self, data, status=status.HTTP_200_OK, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(dumps(data), status=status, **kwargs)
+
+
+class AsyncAPIView(View):
+    """
+    Async counterpart of APIView for endpoints that mostly wait on I/O (LLM
+    calls, several database queries). DRF views are sync only and would
+    cost a thread per request under ASGI.
+
+    Handlers are `async def` and get `request.data` and an authenticated
+    `request.user`; they return a JSONResponse or any HttpResponse. API
+    errors (ValidationError, Http404, ...) give the same JSON bodies as DRF.
+    """
+    authentication = JWTAuthentication()
+    # Set to False for endpoints open to anonymous users
+    authentication_required = True
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        # Token authenticated like the DRF views, so no CSRF
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    def initial(self, request, *args, **kwargs):
+        """Hook run once the request is authenticated, before the handler"""
+
+    async def dispatch(self, request, *args, **kwargs):
+        handler = getattr(self, request.method.lower(), None)
+        if request.method.lower() not in self.http_method_names or handler is None:
+            return JSONResponse(
+                {'detail': f'Method "{request.method}" not allowed.'},
+                status=status.HTTP_405_METHOD_NOT_ALLOWED
+            )
+
+        try:
+            await self.authenticate(request)
+            request.data = self.parse(request)
+            self.initial(request, *args, **kwargs)
+            return await handler(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.handle_api_exception(request, exc)
+        except Http404:
+            return JSONResponse({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        except PermissionDenied:
+            return JSONResponse(
+                {'detail': 'You do not have permission to perform this action.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+    async def authenticate(self, request):
+        result = await self.authentication.aauthenticate(request)
+        if result is not None:
+            request.user, request.auth = result
+        elif self.authentication_required:
+            raise exceptions.NotAuthenticated()
+
+    def parse(self, request):
+        if request.content_type == 'application/json':
+            if not request.body:
+                return {}
+            return ORJSONParser().parse(io.BytesIO(request.body), request.content_type, {'encoding': request.encoding or 'utf-8'})
+        if request.content_type in ('multipart/form-data', 'application/x-www-form-urlencoded'):
+            data = request.POST.copy()
+            data.update(request.FILES)
+            return data
+        return {}
+
+    def handle_api_exception(self, request, exc):
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        response = JSONResponse(data, status=exc.status_code)
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            response.status_code = status.HTTP_401_UNAUTHORIZED
+            response['WWW-Authenticate'] = self.authentication.authenticate_header(request)
+        if getattr(exc, 'wait', None):
+            response['Retry-After'] = str(exc.wait)
+        return response
+
+
+async def aiter_sync(iterator):
+    """
+    Iterate a CPU bound sync generator from async code, each step on a
+    worker thread so the event loop stays free
+    """
+    step = sync_to_async(next, thread_sensitive=False)
+    sentinel = object()
+    while True:
+        item = await step(iterator, sentinel)
+        if item is sentinel:
+            break
+        yield item
@@ -0,0 +1,163 @@
+import functools
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import backends, get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication as BaseJWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from . import passwords
+from .models import Profile
+
+# Fields kept in the cache, the others are deferred and loaded on first access
+USER_FIELDS = frozenset({'id', 'username', 'email', 'first_name', 'last_name', 'is_active', 'is_staff', 'is_superuser'})
+PROFILE_FIELDS = frozenset({'id', 'auth_user_id', 'role'})
+
+
+@functools.cache
+def cached_fields(model, names):
+    # In model order, as Model.from_db() expects them
+    return tuple(field.attname for field in model._meta.concrete_fields if field.attname in names)
+
+
+def users_by_email(email):
+    """
+    Users whose email is `email` whatever its case. Matches the expression and
+    the condition of the unique index on auth_user.email (migration 0009), so
+    it's an index lookup.
+    """
+    return get_user_model()._default_manager.filter(email__iexact=email).exclude(email='')
+
+
+def get_cache_timeout():
+    return getattr(settings, 'JWT_USER_CACHE_TIMEOUT', 0)
+
+
+def entry_key(user_id, jti):
+    return f'jwt_user:{user_id}:{jti}'
+
+
+def generation_key(user_id):
+    return f'jwt_user_generation:{user_id}'
+
+
+def invalidate_user(user_id):
+    """Drop the cached user of all of user_id's tokens, after the user or their profile changed"""
+    timeout = get_cache_timeout()
+    if timeout:
+        # Entries cached before this are stale. They expire before the new
+        # generation does, so it can expire too.
+        cache.set(generation_key(user_id), time.time_ns(), timeout)
+
+
+class JWTAuthentication(BaseJWTAuthentication):
+    """
+    simplejwt's authentication, with the token's user and profile cached for
+    JWT_USER_CACHE_TIMEOUT seconds so requests, and request.user.profile,
+    don't query the database. Entries are per user and token id, and are
+    dropped when the user or profile is saved (see csttapp.signals).
+
+    Also has an entry point for async views.
+    """
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        # Token validation is pure CPU, only the user lookup leaves the event loop
+        validated_token = self.get_validated_token(raw_token)
+        return await sync_to_async(self.get_user)(validated_token), validated_token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        timeout = get_cache_timeout()
+        jti = validated_token.get(api_settings.JTI_CLAIM)
+        if not timeout or jti is None:
+            user = self.load_user(user_id)
+            self.check_user(user, validated_token)
+            return user
+
+        # One round trip for the entry and the user's current generation
+        key = entry_key(user_id, jti)
+        cached = cache.get_many([key, generation_key(user_id)])
+        generation = cached.get(generation_key(user_id))
+        entry = cached.get(key)
+        if entry is not None and entry[0] == generation:
+            user, password_hash = self.user_from_entry(entry)
+        else:
+            user = self.load_user(user_id)
+            password_hash = get_md5_hash_password(user.password) if api_settings.CHECK_REVOKE_TOKEN else None
+            cache.set(key, self.entry_for(user, generation, password_hash), timeout)
+        self.check_user(user, validated_token, password_hash)
+        return user
+
+    def load_user(self, user_id):
+        try:
+            return self.user_model.objects.select_related('profile').get(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist as e:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+
+    def check_user(self, user, validated_token, password_hash=None):
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if password_hash is None:
+                password_hash = get_md5_hash_password(user.password)
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_hash:
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+    @staticmethod
+    def entry_for(user, generation, password_hash):
+        try:
+            profile = user.profile
+        except ObjectDoesNotExist:
+            profile = None
+        return (
+            generation,
+            tuple(getattr(user, field) for field in cached_fields(type(user), USER_FIELDS)),
+            tuple(getattr(profile, field) for field in cached_fields(Profile, PROFILE_FIELDS)) if profile is not None else None,
+            password_hash,
+        )
+
+    def user_from_entry(self, entry):
+        generation, user_values, profile_values, password_hash = entry
+        # Saving an instance with deferred fields only writes the loaded ones
+        user = self.user_model.from_db(DEFAULT_DB_ALIAS, cached_fields(self.user_model, USER_FIELDS), user_values)
+        if profile_values is not None:
+            user.profile = Profile.from_db(DEFAULT_DB_ALIAS, cached_fields(Profile, PROFILE_FIELDS), profile_values)
+        return user, password_hash
+
+
+class ModelBackend(backends.ModelBackend):
+    """Django's ModelBackend, with password hashing done by csttapp.passwords"""
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway, so unknown users don't answer faster
+            passwords.make_password(password)
+            return None
+        if passwords.check_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
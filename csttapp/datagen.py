@@ -0,0 +1,695 @@
+import csv
+import datetime
+import functools
+import io
+import random
+import re
+import string
+import uuid
+
+from .renderers import dumps
+
+OUTPUT_FORMATS = ('json', 'ndjson', 'csv')
+OUTPUT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+MAX_RECORDS = 1000000
+
+FIRST_NAMES = [
+    'James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'David', 'Elizabeth',
+    'Youssef', 'Fatima', 'Omar', 'Amina', 'Wei', 'Mei', 'Carlos', 'Sofia', 'Lucas', 'Emma',
+]
+LAST_NAMES = [
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Martinez', 'Lopez',
+    'Alami', 'Benali', 'Chen', 'Wang', 'Silva', 'Rossi', 'Muller', 'Dubois', 'Kim', 'Nguyen',
+]
+CITIES = [
+    'New York', 'London', 'Paris', 'Berlin', 'Madrid', 'Rome', 'Casablanca', 'Rabat', 'Tokyo', 'Toronto',
+    'Sydney', 'Dubai', 'Lisbon', 'Amsterdam', 'Chicago', 'Boston', 'Seattle', 'Austin', 'Dublin', 'Vienna',
+]
+COUNTRIES = [
+    'United States', 'United Kingdom', 'France', 'Germany', 'Spain', 'Italy', 'Morocco', 'Japan',
+    'Canada', 'Australia', 'Portugal', 'Netherlands', 'Ireland', 'Austria', 'Brazil', 'India',
+]
+STREETS = ['Main St', 'Oak Ave', 'Maple Rd', 'Park Blvd', 'Cedar Ln', 'Elm St', 'Hill Rd', 'Lake Dr']
+COMPANIES = ['Acme', 'Globex', 'Initech', 'Umbrella', 'Stark', 'Wayne', 'Hooli', 'Vandelay', 'Wonka', 'Tyrell']
+DOMAINS = ['example.com', 'example.org', 'test.com', 'mail.test', 'demo.net']
+WORDS = [
+    'lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur', 'adipiscing', 'elit', 'sed', 'do',
+    'eiusmod', 'tempor', 'incididunt', 'ut', 'labore', 'et', 'dolore', 'magna', 'aliqua', 'enim',
+]
+CURRENCIES = ['USD', 'EUR', 'GBP', 'MAD', 'JPY', 'CAD', 'AUD', 'CHF']
+
+DEFAULT_DATE_RANGE = (datetime.date(2000, 1, 1), datetime.date(2030, 12, 31))
+
+# Normalised template type -> generator kind
+TYPE_KINDS = {
+    'string': 'string', 'str': 'string', 'text': 'string', 'varchar': 'string', 'char': 'string',
+    'int': 'integer', 'integer': 'integer', 'long': 'integer',
+    'number': 'number', 'numeric': 'number', 'float': 'number', 'double': 'number', 'decimal': 'number',
+    'currency': 'number', 'money': 'number', 'price': 'number', 'amount': 'number',
+    'bool': 'boolean', 'boolean': 'boolean',
+    'date': 'date', 'datetime': 'datetime', 'timestamp': 'datetime', 'time': 'time',
+    'email': 'email', 'phone': 'phone', 'tel': 'phone', 'uuid': 'uuid', 'guid': 'uuid',
+    'url': 'url', 'uri': 'url', 'enum': 'enum', 'select': 'enum', 'choice': 'enum',
+}
+
+# Name token -> semantic kind for string fields, checked in order
+NAME_SEMANTICS = [
+    ({'email', 'mail'}, 'email'),
+    ({'phone', 'mobile', 'tel', 'telephone'}, 'phone'),
+    ({'uuid', 'guid'}, 'uuid'),
+    ({'url', 'website', 'link', 'uri'}, 'url'),
+    ({'username', 'login', 'handle'}, 'username'),
+    ({'password', 'passwd', 'pwd'}, 'password'),
+    ({'firstname', 'first', 'given', 'forename'}, 'first_name'),
+    ({'lastname', 'last', 'surname', 'family'}, 'last_name'),
+    ({'city', 'town'}, 'city'),
+    ({'country'}, 'country'),
+    ({'address', 'street'}, 'address'),
+    ({'zip', 'zipcode', 'postal', 'postcode'}, 'zip'),
+    ({'company', 'organization', 'organisation', 'employer'}, 'company'),
+    ({'currency'}, 'currency'),
+    ({'description', 'comment', 'comments', 'notes', 'note', 'message', 'bio', 'summary'}, 'sentence'),
+    ({'fullname', 'customer', 'author', 'owner', 'contact', 'person', 'employee'}, 'full_name'),
+]
+
+NUMBER = r'(-?\d+(?:\.\d+)?)'
+ISO_DATE = r'(\d{4}-\d{2}-\d{2})'
+REGEX_META = set('\\[]{}()^$*+?|')
+WORD_CHARS = string.ascii_letters + string.digits + '_'
+# What negated classes pick from
+PRINTABLE = ''.join(chr(code) for code in range(0x20, 0x7f))
+PATTERN_CLASSES = {
+    'd': string.digits,
+    'w': WORD_CHARS,
+    's': ' ',
+}
+
+
+class PatternError(ValueError):
+    """A pattern that can't generate any value"""
+
+
+def name_tokens(name):
+    name = re.sub(r'([a-z0-9])([A-Z])', r'\1_\2', str(name))
+    tokens = [token for token in re.split(r'[^a-zA-Z0-9]+', name.lower()) if token]
+    return set(tokens) | {''.join(tokens)}
+
+
+def parse_choices(text):
+    text = text.strip().strip('.').strip('[]()')
+    parts = re.split(r'\s*(?:,|\||/|\bor\b)\s*', text)
+    return [part.strip().strip('\'"`') for part in parts if part.strip().strip('\'"`')]
+
+
+def trim_pattern(pattern):
+    """
+    Drop the punctuation of the surrounding sentence from a pattern, as in
+    "format DD/MM/YYYY, in the past", keeping escaped characters and closing
+    parentheses of the pattern's own groups
+    """
+    while pattern and pattern[-1] in ',;.)' and not pattern.endswith('\\' + pattern[-1]):
+        if pattern[-1] == ')' and pattern.count('(') >= pattern.count(')'):
+            break
+        pattern = pattern[:-1]
+    return pattern
+
+
+def parse_constraints(constraints):
+    """
+    Pull ranges, lengths, choices, formats and flags out of a free text
+    constraint like "between 18 and 65" or "one of: Active, Inactive".
+    """
+    if isinstance(constraints, (list, tuple)):
+        constraints = ', '.join(str(item) for item in constraints)
+    text = str(constraints or '')
+    lower = text.lower()
+    parsed = {}
+
+    match = re.search(r'(?:one of|possible values|allowed values|values|options|either|enum)\s*[:\-]?\s*(.+)', text, re.I)
+    if match:
+        choices = parse_choices(match.group(1))
+        if len(choices) > 1:
+            parsed['choices'] = choices
+
+    match = re.search(r'(?:pattern|regex|format|matches|match)\s*[:=]?\s*[`\'"]?([^`\'"\s]+)', text, re.I)
+    pattern = trim_pattern(match.group(1)) if match else ''
+    # A bare word ("email format") names a kind rather than a pattern
+    if re.search(r'[^A-Za-z]', pattern):
+        parsed['pattern'] = pattern
+
+    length = re.search(r'(\d+)\s*(?:-|to|and)\s*(\d+)\s*(?:char|letter|digit)', lower)
+    if length:
+        parsed['min_length'], parsed['max_length'] = int(length.group(1)), int(length.group(2))
+    else:
+        match = re.search(r'(?:max(?:imum)?|at most|up to|no more than)\s*(?:length\s*(?:of\s*)?)?(\d+)\s*(?:char|letter)', lower)
+        if match:
+            parsed['max_length'] = int(match.group(1))
+        match = re.search(r'(?:min(?:imum)?|at least|no less than)\s*(?:length\s*(?:of\s*)?)?(\d+)\s*(?:char|letter)', lower)
+        if match:
+            parsed['min_length'] = int(match.group(1))
+        match = re.search(r'(\d+)\s*(?:char(?:acter)?s?|digits?|letters?)\b(?!\s*(?:or|and|to))', lower)
+        if match and 'min_length' not in parsed and 'max_length' not in parsed:
+            parsed['min_length'] = parsed['max_length'] = int(match.group(1))
+        match = re.search(r'length\s*(?:of|between|:)?\s*(\d+)(?:\s*(?:-|to|and)\s*(\d+))?', lower)
+        if match and 'min_length' not in parsed and 'max_length' not in parsed:
+            parsed['min_length'] = int(match.group(1))
+            parsed['max_length'] = int(match.group(2) or match.group(1))
+
+    if re.search(ISO_DATE, text):
+        match = re.search(r'(?:after|from|since|>)\s*' + ISO_DATE, lower)
+        if match:
+            parsed['after'] = datetime.date.fromisoformat(match.group(1))
+        match = re.search(r'(?:before|until|to|<)\s*' + ISO_DATE, lower)
+        if match:
+            parsed['before'] = datetime.date.fromisoformat(match.group(1))
+    else:
+        # Numeric ranges, ignoring lengths and the digits of a pattern
+        scrubbed = lower.replace(parsed.get('pattern', '').lower() or '\0', '')
+        scrubbed = re.sub(r'length\s*(?:of|between|:)?\s*\d+(?:\s*(?:-|to|and)\s*\d+)?|\d+\s*(?:-|to|and)\s*\d+\s*(?:char|letter|digit)|\d+\s*(?:char|letter|digit)', '', scrubbed)
+        match = (re.search(r'between\s*' + NUMBER + r'\s*and\s*' + NUMBER, scrubbed) or
+                 re.search(NUMBER + r'\s*(?:to|\.\.|–|-)\s*' + NUMBER, scrubbed))
+        if match:
+            parsed['min'], parsed['max'] = float(match.group(1)), float(match.group(2))
+        match = re.search(r'(?:min(?:imum)?(?: value)?|at least|>=|greater than or equal to|no less than)\s*(?:of\s*)?[:=]?\s*' + NUMBER, scrubbed)
+        if match:
+            parsed['min'] = float(match.group(1))
+        match = re.search(r'(?:max(?:imum)?(?: value)?|at most|<=|less than or equal to|no more than|up to)\s*(?:of\s*)?[:=]?\s*' + NUMBER, scrubbed)
+        if match:
+            parsed['max'] = float(match.group(1))
+        match = re.search(r'(?:greater than|more than|above|>)\s*' + NUMBER, scrubbed)
+        if match and 'min' not in parsed:
+            parsed['min'] = float(match.group(1)) + 1
+        match = re.search(r'(?:less than|below|under|<)\s*' + NUMBER, scrubbed)
+        if match and 'max' not in parsed:
+            parsed['max'] = float(match.group(1)) - 1
+
+    if 'non-negative' in lower or 'non negative' in lower:
+        parsed.setdefault('min', 0)
+    elif 'positive' in lower:
+        parsed.setdefault('min', 1)
+    match = re.search(r'(\d+)\s*decimal', lower)
+    if match:
+        parsed['decimals'] = int(match.group(1))
+    if 'past' in lower:
+        parsed['past'] = True
+    if 'future' in lower:
+        parsed['future'] = True
+    if 'unique' in lower:
+        parsed['unique'] = True
+    if re.search(r'\b(?:optional|nullable|can be empty|may be empty)\b', lower):
+        parsed['optional'] = True
+    return parsed
+
+
+def parse_pattern(pattern):
+    """
+    Compile a regex subset (literals, escapes, classes, groups with
+    alternation, quantifiers) into a token list. Each token is
+    (kind, value, min_repeat, max_repeat).
+    """
+    tokens, position = _parse_sequence(pattern.strip().lstrip('^').rstrip('$'), 0)
+    return tokens
+
+
+def _parse_sequence(pattern, position, in_group=False):
+    alternatives = [[]]
+    while position < len(pattern):
+        char = pattern[position]
+        if char == ')' and in_group:
+            break
+        if char == '|':
+            alternatives.append([])
+            position += 1
+            continue
+        if char == '(':
+            group, position = _parse_sequence(pattern, position + 1 + (2 if pattern.startswith('?:', position + 1) else 0), True)
+            token = ['group', group]
+            position += 1
+        elif char == '[':
+            end = pattern.find(']', position + 2)
+            if end == -1:
+                raise PatternError(f"Unclosed [ in {pattern}")
+            token = ['class', _expand_class(pattern[position + 1:end])]
+            position = end + 1
+        elif char == '\\' and position + 1 < len(pattern):
+            chars, position = _read_escape(pattern, position + 1)
+            token = ['class', chars]
+        elif char == '.':
+            token = ['class', string.ascii_letters + string.digits]
+            position += 1
+        else:
+            token = ['class', char]
+            position += 1
+
+        low, high = 1, 1
+        if position < len(pattern) and pattern[position] in '?*+{':
+            quantifier = pattern[position]
+            if quantifier == '{':
+                end = pattern.find('}', position)
+                body = pattern[position + 1:end]
+                if end == -1 or not re.fullmatch(r'\d+(,\d*)?|,\d+', body):
+                    raise PatternError(f"Invalid quantifier in {pattern}")
+                bounds = body.split(',')
+                low = int(bounds[0] or 0)
+                high = int(bounds[1]) if len(bounds) > 1 and bounds[1] else (low if len(bounds) == 1 else low + 8)
+                if high < low:
+                    raise PatternError(f"Invalid quantifier {{{body}}} in {pattern}")
+                position = end + 1
+            else:
+                low, high = {'?': (0, 1), '*': (0, 8), '+': (1, 8)}[quantifier]
+                position += 1
+        alternatives[-1].append((token[0], token[1], low, high))
+
+    if len(alternatives) == 1:
+        return alternatives[0], position
+    return [('group', alternatives, 1, 1)] if not in_group else alternatives, position
+
+
+def _read_escape(pattern, position):
+    """Characters of the escape whose letter is at position, and the position after it"""
+    escaped = pattern[position]
+    code = pattern[position + 1:position + 5]
+    if escaped == 'u' and re.fullmatch(r'[0-9a-fA-F]{4}', code):
+        return chr(int(code, 16)), position + 5
+    return PATTERN_CLASSES.get(escaped, escaped), position + 1
+
+
+def _read_class_char(body, position):
+    if body[position] == '\\' and position + 1 < len(body):
+        return _read_escape(body, position + 1)
+    return body[position], position + 1
+
+
+def _expand_class(body):
+    negated = body.startswith('^')
+    source = body[1:] if negated else body
+    chars = []
+    position = 0
+    while position < len(source):
+        first, position = _read_class_char(source, position)
+        if len(first) == 1 and position + 1 < len(source) and source[position] == '-':
+            last, position = _read_class_char(source, position + 1)
+            if len(last) != 1 or last < first:
+                raise PatternError(f"Invalid range {first}-{last} in [{body}]")
+            chars.extend(chr(code) for code in range(ord(first), ord(last) + 1))
+        else:
+            chars.extend(first)
+    if negated:
+        chars = [char for char in PRINTABLE if char not in chars]
+    if not chars:
+        raise PatternError(f"[{body}] matches no character")
+    return ''.join(dict.fromkeys(chars))
+
+
+def mask_to_pattern(mask):
+    """Turn a mask such as "INV-####" or "XX-999" into the regex subset"""
+    converted = []
+    for char in mask:
+        if char in '#9':
+            converted.append(r'\d')
+        elif char == 'X':
+            converted.append('[A-Z]')
+        else:
+            converted.append(re.escape(char))
+    return ''.join(converted)
+
+
+def date_format(pattern):
+    """strftime format for a display format like "DD/MM/YYYY", or None"""
+    if 'YYYY' not in pattern.upper():
+        return None
+    converted = pattern
+    for token, directive in (('YYYY', '%Y'), ('MM', '%m'), ('DD', '%d'), ('HH', '%H'), ('mm', '%M'), ('ss', '%S')):
+        converted = converted.replace(token, directive)
+    return converted.replace('yyyy', '%Y').replace('dd', '%d')
+
+
+@functools.lru_cache(maxsize=None)
+def index_table(size):
+    # Maps a random byte onto 0..size-1, close enough to uniform for test data
+    return bytes(value * size // 256 for value in range(256))
+
+
+def pick(rng, population, n):
+    """
+    n random items from population. Small populations are indexed with
+    random bytes, which is several times faster than random.choices().
+    """
+    size = len(population)
+    if size > 256:
+        return rng.choices(population, k=n)
+    return list(map(population.__getitem__, rng.randbytes(n).translate(index_table(size))))
+
+
+@functools.lru_cache(maxsize=None)
+def alphabet_table(alphabet):
+    encoded = alphabet.encode('latin-1')
+    return bytes(encoded[index] for index in index_table(len(alphabet)))
+
+
+def random_text(rng, alphabet, size):
+    if len(alphabet) <= 256 and max(alphabet) <= '\xff':
+        return rng.randbytes(size).translate(alphabet_table(alphabet)).decode('latin-1')
+    return ''.join(rng.choices(alphabet, k=size))
+
+
+def random_strings(rng, alphabet, n, low, high):
+    """n strings of low..high characters drawn from alphabet, built in one pass"""
+    if high == low:
+        blob = random_text(rng, alphabet, n * low)
+        return [blob[i:i + low] for i in range(0, n * low, low)] if low else [''] * n
+    lengths = pick(rng, range(low, high + 1), n)
+    blob = random_text(rng, alphabet, sum(lengths))
+    values = []
+    offset = 0
+    for length in lengths:
+        values.append(blob[offset:offset + length])
+        offset += length
+    return values
+
+
+def pattern_column(rng, tokens, n):
+    columns = []
+    for kind, value, low, high in tokens:
+        if kind == 'class':
+            columns.append(random_strings(rng, value, n, low, high))
+            continue
+        # Group: generate every alternative for every row and pick one per row
+        repeats = []
+        for _ in range(high):
+            branches = [pattern_column(rng, alternative, n) for alternative in (value if value and isinstance(value[0], list) else [value])]
+            picks = pick(rng, range(len(branches)), n)
+            repeats.append([branches[pick][row] for row, pick in enumerate(picks)])
+        counts = pick(rng, range(low, high + 1), n) if high != low else [low] * n
+        columns.append([''.join(repeat[row] for repeat in repeats[:counts[row]]) for row in range(n)])
+    if not columns:
+        return [''] * n
+    return [''.join(parts) for parts in zip(*columns)]
+
+
+class FieldGenerator:
+    """
+    Generates one column of values for a template field. The kind and its
+    parameters are worked out once from the field's name, type and
+    constraints.
+    """
+    def __init__(self, field):
+        self.name = str(field.get('name') or 'field')
+        self.type = str(field.get('type') or 'string').strip().lower()
+        self.constraints = parse_constraints(field.get('constraints'))
+        self.resolved = True
+        self.kind = self.resolve_kind()
+
+    def resolve_kind(self):
+        constraints = self.constraints
+        if constraints.get('choices'):
+            return 'enum'
+
+        kind = TYPE_KINDS.get(self.type.split('(')[0].strip())
+        if kind is None:
+            kind = next((value for key, value in TYPE_KINDS.items() if key in self.type), None)
+
+        if kind in ('date', 'datetime') and constraints.get('pattern'):
+            self.date_format = date_format(constraints['pattern'])
+        if kind in (None, 'string', 'enum') and constraints.get('pattern'):
+            pattern = constraints['pattern']
+            if '#' in pattern and not set('\\[]{}') & set(pattern) or 'XX' in pattern and not REGEX_META & set(pattern):
+                pattern = mask_to_pattern(pattern)
+            try:
+                self.tokens = parse_pattern(pattern)
+                return 'pattern'
+            except PatternError as e:
+                raise ValueError(f"Field {self.name}: {e}") from e
+
+        if kind in (None, 'string'):
+            tokens = name_tokens(self.name)
+            semantic = next((value for keys, value in NAME_SEMANTICS if keys & tokens), None)
+            if semantic is None and tokens == {'name'}:
+                semantic = 'full_name'
+            if semantic:
+                return semantic
+            if kind is None or 'min_length' not in constraints:
+                # Left to the caller to supply examples for, see add_examples()
+                self.resolved = False
+            return 'string'
+        if kind == 'enum':
+            self.resolved = False
+            return 'string'
+        if kind == 'number' and ('int' in self.type or 'decimals' not in constraints and self.is_integral()):
+            return 'integer'
+        return kind
+
+    def is_integral(self):
+        # Counts, ages and ids are whole numbers unless decimals are asked for
+        tokens = name_tokens(self.name)
+        return bool(tokens & {'age', 'count', 'quantity', 'qty', 'id', 'year', 'number', 'num', 'rank', 'level', 'stock'})
+
+    def add_examples(self, examples):
+        examples = [example for example in examples if example is not None]
+        if examples:
+            self.constraints['choices'] = examples
+            self.kind = 'enum'
+            self.resolved = True
+
+    def generate(self, rng, n, start=0):
+        """Values for rows start..start+n"""
+        values = getattr(self, f'generate_{self.kind}', self.generate_string)(rng, n, start)
+        if self.constraints.get('optional'):
+            values = [None if rng.random() < 0.1 else value for value in values]
+        return values
+
+    def number_range(self, default_low, default_high):
+        low = self.constraints.get('min', default_low)
+        high = self.constraints.get('max', default_high)
+        return (low, high) if low <= high else (high, low)
+
+    def generate_integer(self, rng, n, start):
+        low, high = self.number_range(1 if self.constraints.get('unique') else 0, 1000)
+        low, high = int(low), int(high)
+        if self.constraints.get('unique') or name_tokens(self.name) & {'id'}:
+            # Sequential, so unique across chunks
+            return list(range(low + start, low + start + n))
+        return pick(rng, range(low, high + 1), n)
+
+    def generate_number(self, rng, n, start):
+        low, high = self.number_range(0, 1000)
+        decimals = self.constraints.get('decimals', 2)
+        span = high - low
+        random_value = rng.random
+        return [round(low + span * random_value(), decimals) for _ in range(n)]
+
+    def generate_boolean(self, rng, n, start):
+        return pick(rng, (True, False), n)
+
+    def generate_enum(self, rng, n, start):
+        return pick(rng, self.constraints['choices'], n)
+
+    def date_range(self):
+        constraints = self.constraints
+        low, high = DEFAULT_DATE_RANGE
+        today = datetime.date.today()
+        if constraints.get('past'):
+            low, high = today - datetime.timedelta(days=5 * 365), today - datetime.timedelta(days=1)
+        elif constraints.get('future'):
+            low, high = today + datetime.timedelta(days=1), today + datetime.timedelta(days=5 * 365)
+        low = constraints.get('after', low)
+        high = constraints.get('before', high)
+        return (low, high) if low <= high else (high, low)
+
+    def generate_date(self, rng, n, start):
+        low, high = self.date_range()
+        ordinals = pick(rng, range(low.toordinal(), high.toordinal() + 1), n)
+        output_format = getattr(self, 'date_format', None)
+        # Each distinct day is formatted once per chunk
+        labels = {}
+        for ordinal in set(ordinals):
+            date = datetime.date.fromordinal(ordinal)
+            labels[ordinal] = date.strftime(output_format) if output_format else date.isoformat()
+        return list(map(labels.__getitem__, ordinals))
+
+    def generate_datetime(self, rng, n, start):
+        low, high = self.date_range()
+        epoch = datetime.datetime(low.year, low.month, low.day)
+        seconds = pick(rng, range(0, (high - low).days * 86400 + 86400), n)
+        if getattr(self, 'date_format', None):
+            return [(epoch + datetime.timedelta(seconds=second)).strftime(self.date_format) for second in seconds]
+        return [(epoch + datetime.timedelta(seconds=second)).isoformat() + 'Z' for second in seconds]
+
+    def generate_time(self, rng, n, start):
+        return [f'{second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}' for second in pick(rng, range(86400), n)]
+
+    def generate_pattern(self, rng, n, start):
+        return pattern_column(rng, self.tokens, n)
+
+    def generate_uuid(self, rng, n, start):
+        getrandbits = rng.getrandbits
+        return [str(uuid.UUID(int=getrandbits(128), version=4)) for _ in range(n)]
+
+    def generate_first_name(self, rng, n, start):
+        return pick(rng, FIRST_NAMES, n)
+
+    def generate_last_name(self, rng, n, start):
+        return pick(rng, LAST_NAMES, n)
+
+    def generate_full_name(self, rng, n, start):
+        return [f'{first} {last}' for first, last in zip(pick(rng, FIRST_NAMES, n), pick(rng, LAST_NAMES, n))]
+
+    def generate_username(self, rng, n, start):
+        names = zip(pick(rng, FIRST_NAMES, n), pick(rng, range(100, 10000), n))
+        return [f'{name.lower()}{number}_{start + row}' for row, (name, number) in enumerate(names)]
+
+    def generate_email(self, rng, n, start):
+        parts = zip(pick(rng, FIRST_NAMES, n), pick(rng, LAST_NAMES, n), pick(rng, DOMAINS, n))
+        # The row number keeps addresses unique across chunks
+        return [f'{first.lower()}.{last.lower()}{start + row}@{domain}' for row, (first, last, domain) in enumerate(parts)]
+
+    def generate_phone(self, rng, n, start):
+        return [f'+1-{number[:3]}-{number[3:6]}-{number[6:]}' for number in random_strings(rng, string.digits, n, 10, 10)]
+
+    def generate_url(self, rng, n, start):
+        paths = random_strings(rng, string.ascii_lowercase, n, 4, 10)
+        return [f'https://{domain}/{path}' for domain, path in zip(pick(rng, DOMAINS, n), paths)]
+
+    def generate_password(self, rng, n, start):
+        low = self.constraints.get('min_length', 12)
+        high = max(self.constraints.get('max_length', 16), low)
+        # Always has a lower case letter, upper case letter, digit and symbol
+        return [
+            f'a{body}Z9!' for body in
+            random_strings(rng, string.ascii_letters + string.digits + '!@#$%', n, max(low - 4, 0), max(high - 4, 0))
+        ]
+
+    def generate_city(self, rng, n, start):
+        return pick(rng, CITIES, n)
+
+    def generate_country(self, rng, n, start):
+        return pick(rng, COUNTRIES, n)
+
+    def generate_address(self, rng, n, start):
+        return [f'{number} {street}' for number, street in zip(pick(rng, range(1, 10000), n), pick(rng, STREETS, n))]
+
+    def generate_zip(self, rng, n, start):
+        length = self.constraints.get('max_length', 5)
+        return random_strings(rng, string.digits, n, length, length)
+
+    def generate_company(self, rng, n, start):
+        return [f'{name} {suffix}' for name, suffix in zip(pick(rng, COMPANIES, n), pick(rng, ['Inc', 'LLC', 'Ltd', 'Group'], n))]
+
+    def generate_currency(self, rng, n, start):
+        return pick(rng, CURRENCIES, n)
+
+    def generate_sentence(self, rng, n, start):
+        lengths = pick(rng, range(4, 13), n)
+        words = pick(rng, WORDS, sum(lengths))
+        values = []
+        offset = 0
+        for length in lengths:
+            values.append(' '.join(words[offset:offset + length]).capitalize() + '.')
+            offset += length
+        return self.clip(values)
+
+    def generate_string(self, rng, n, start):
+        low = self.constraints.get('min_length', 6)
+        high = max(self.constraints.get('max_length', max(low, 12)), low)
+        values = random_strings(rng, string.ascii_letters, n, low, high)
+        if self.constraints.get('unique'):
+            return self.clip([f'{value}{start + row}' for row, value in enumerate(values)])
+        return values
+
+    def clip(self, values):
+        max_length = self.constraints.get('max_length')
+        if max_length:
+            return [value[:max_length] for value in values]
+        return values
+
+
+class TestDataGenerator:
+    """
+    Deterministic test data from template fields. Values are generated a
+    column at a time per chunk, each column from its own generator seeded
+    with (seed, field, chunk), so any chunk can be reproduced on its own and
+    adding a field does not change the others.
+    """
+    def __init__(self, fields, seed=None, chunk_size=10000):
+        if not isinstance(fields, list) or not fields:
+            raise ValueError("Template must define a non-empty list of fields")
+        if not all(isinstance(field, dict) for field in fields):
+            raise ValueError("Each template field must be an object")
+        for field in fields:
+            constraints = field.get('constraints')
+            # Constraints are free text, a list of phrases at most
+            if not isinstance(constraints, (str, list, type(None))) or isinstance(constraints, list) and not all(isinstance(item, str) for item in constraints):
+                raise ValueError(f"Field {field.get('name')}: constraints must be text or a list of text")
+        self.fields = [FieldGenerator(field) for field in fields]
+        self.names = [field.name for field in self.fields]
+        self.seed = seed if seed is not None else random.SystemRandom().randrange(2 ** 32)
+        self.chunk_size = chunk_size
+
+    @property
+    def unresolved(self):
+        """Fields whose values could not be inferred from name, type or constraints"""
+        return [field for field in self.fields if not field.resolved]
+
+    def add_examples(self, examples):
+        """Use example values (field name -> list) for unresolved fields"""
+        for field in self.fields:
+            if isinstance(examples.get(field.name), list):
+                field.add_examples(examples[field.name])
+
+    def iter_rows(self, count):
+        for chunk, start in enumerate(range(0, count, self.chunk_size)):
+            n = min(self.chunk_size, count - start)
+            columns = [
+                field.generate(random.Random(f'{self.seed}:{field.name}:{chunk}'), n, start)
+                for field in self.fields
+            ]
+            yield from zip(*columns)
+
+    def iter_records(self, count):
+        names = self.names
+        for row in self.iter_rows(count):
+            yield dict(zip(names, row))
+
+    def records(self, count):
+        return list(self.iter_records(count))
+
+    def iter_ndjson(self, count, buffer_size=64 * 1024):
+        buffer = bytearray()
+        for record in self.iter_records(count):
+            buffer += dumps(record)
+            buffer += b'\n'
+            if len(buffer) >= buffer_size:
+                yield bytes(buffer)
+                buffer.clear()
+        if buffer:
+            yield bytes(buffer)
+
+    def iter_csv(self, count, rows_per_flush=1000):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def flush():
+            value = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            return value
+
+        writer.writerow(self.names)
+        rows = self.iter_rows(count)
+        while True:
+            batch = [row for _, row in zip(range(rows_per_flush), rows)]
+            if not batch:
+                break
+            writer.writerows(batch)
+            yield flush()
+        yield flush()
+
+    def iter_output(self, count, output_format):
+        if output_format == 'ndjson':
+            return self.iter_ndjson(count)
+        if output_format == 'csv':
+            return self.iter_csv(count)
+        raise ValueError(f"Unsupported output format '{output_format}', expected one of {OUTPUT_FORMATS}")
@@ -0,0 +1,211 @@
+import hashlib
+import json
+import os
+import uuid
+import zlib
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+
+from .models import TestDataTemplate, GeneratedDataset
+from .renderers import dumps
+
+
+def content_hash(content):
+    """sha256 of the canonical JSON form, so key order does not matter"""
+    canonical = json.dumps(content, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class TemplateStore:
+    """
+    Content-addressed template bodies. Saving a template that already
+    exists only bumps its reference count.
+    """
+    @classmethod
+    def acquire(cls, content):
+        with transaction.atomic():
+            template, created = TestDataTemplate.objects.get_or_create(
+                content_hash=content_hash(content),
+                defaults={'content': content}
+            )
+            TestDataTemplate.objects.filter(id=template.id).update(ref_count=F('ref_count') + 1)
+        return template
+
+    @classmethod
+    def release(cls, template_id):
+        if template_id is None:
+            return
+        with transaction.atomic():
+            TestDataTemplate.objects.filter(id=template_id, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+            TestDataTemplate.objects.filter(id=template_id, ref_count=0, test_data__isnull=True).delete()
+
+
+class DatasetStore:
+    """
+    Content-addressed generated datasets. Records are written as NDJSON;
+    datasets up to INLINE_MAX_BYTES stay inline in the database, larger ones
+    go to MEDIA_ROOT/datasets as blocks of BLOCK_RECORDS lines, each
+    compressed on its own, so a range only decompresses the blocks it
+    touches.
+    """
+    BLOCK_RECORDS = 1000
+    INLINE_MAX_BYTES = 64 * 1024
+    DIRECTORY = 'datasets'
+
+    @classmethod
+    def get_path(cls, digest):
+        return f'{cls.DIRECTORY}/{digest[:2]}/{digest}.ndjson.z'
+
+    @classmethod
+    def store(cls, records, test_data=None, template=None, seed=None):
+        """
+        Store an iterable of records and return the dataset, which may be an
+        existing one with the same content. It's attached to test_data in the
+        same transaction, so a concurrent release can't delete it in between.
+        """
+        digest = hashlib.sha256()
+        inline = []
+        offsets = [0]
+        record_count = 0
+        size = 0
+        block = []
+        temp_path = None
+        temp_file = None
+
+        def write_block():
+            nonlocal temp_file, temp_path
+            if temp_file is None:
+                temp_path = default_storage.path(f'{cls.DIRECTORY}/tmp/{uuid.uuid4()}')
+                os.makedirs(os.path.dirname(temp_path), exist_ok=True)
+                temp_file = open(temp_path, 'wb')
+            temp_file.write(zlib.compress(b''.join(block[:cls.BLOCK_RECORDS]), 6))
+            offsets.append(temp_file.tell())
+            del block[:cls.BLOCK_RECORDS]
+
+        try:
+            for record in records:
+                line = dumps(record) + b'\n'
+                digest.update(line)
+                size += len(line)
+                record_count += 1
+                block.append(line)
+                if inline is not None:
+                    inline.append(record)
+                    if size > cls.INLINE_MAX_BYTES:
+                        # Too big to keep in the database, write blocks from here on
+                        inline = None
+                while inline is None and len(block) >= cls.BLOCK_RECORDS:
+                    write_block()
+            while inline is None and block:
+                write_block()
+        except BaseException:
+            if temp_file is not None:
+                temp_file.close()
+                os.remove(temp_path)
+            raise
+        if temp_file is not None:
+            temp_file.close()
+
+        key = digest.hexdigest()
+        storage_path = None
+        values = {
+            'template': template,
+            'seed': seed,
+            'record_count': record_count,
+            'size_bytes': size,
+        }
+        if inline is not None:
+            values.update(records=inline, stored_bytes=size)
+        else:
+            storage_path = cls.get_path(key)
+            values.update(
+                storage_path=storage_path,
+                stored_bytes=offsets[-1],
+                block_records=cls.BLOCK_RECORDS,
+                block_offsets=offsets
+            )
+
+        try:
+            with transaction.atomic():
+                # Locked, so release() waits for the reference taken here
+                dataset, created = GeneratedDataset.objects.select_for_update().get_or_create(content_hash=key, defaults=values)
+                if test_data is not None:
+                    cls.attach(test_data, dataset)
+                if storage_path:
+                    # Moved into place once committed. A release of an earlier copy
+                    # only deletes the file while no row has this content.
+                    transaction.on_commit(lambda: cls.move_file(temp_path, storage_path))
+        except BaseException:
+            if storage_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return dataset
+
+    @staticmethod
+    def move_file(temp_path, storage_path):
+        final_path = default_storage.path(storage_path)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        # Same name for the same content, replacing an existing file is harmless
+        os.replace(temp_path, final_path)
+
+    @staticmethod
+    def delete_file(digest, storage_path):
+        # The same content may have been stored again since the release
+        if not GeneratedDataset.objects.filter(content_hash=digest).exists():
+            default_storage.delete(storage_path)
+
+    @classmethod
+    def attach(cls, test_data, dataset):
+        with transaction.atomic():
+            if not test_data.datasets.filter(id=dataset.id).exists():
+                test_data.datasets.add(dataset)
+                GeneratedDataset.objects.filter(id=dataset.id).update(ref_count=F('ref_count') + 1)
+
+    @classmethod
+    def detach(cls, test_data, dataset):
+        with transaction.atomic():
+            if test_data.datasets.filter(id=dataset.id).exists():
+                test_data.datasets.remove(dataset)
+                cls.release(dataset.id)
+
+    @classmethod
+    def release(cls, dataset_id):
+        with transaction.atomic():
+            GeneratedDataset.objects.filter(id=dataset_id, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+            unreferenced = GeneratedDataset.objects.filter(id=dataset_id, ref_count=0, test_data__isnull=True).first()
+            if unreferenced is not None:
+                unreferenced.delete()
+                if unreferenced.storage_path:
+                    # Only remove the file once the row is gone for good
+                    transaction.on_commit(lambda: cls.delete_file(unreferenced.content_hash, unreferenced.storage_path))
+
+    @classmethod
+    def iter_lines(cls, dataset, offset=0, limit=None):
+        """NDJSON lines for records offset..offset+limit, reading only the blocks involved"""
+        end = dataset.record_count if limit is None else min(offset + limit, dataset.record_count)
+        if offset >= end:
+            return
+
+        if dataset.records is not None:
+            for record in dataset.records[offset:end]:
+                yield dumps(record) + b'\n'
+            return
+
+        first_block = offset // dataset.block_records
+        last_block = (end - 1) // dataset.block_records
+        with default_storage.open(dataset.storage_path, 'rb') as source:
+            for index in range(first_block, last_block + 1):
+                start = dataset.block_offsets[index]
+                source.seek(start)
+                lines = zlib.decompress(source.read(dataset.block_offsets[index + 1] - start)).splitlines(keepends=True)
+                block_start = index * dataset.block_records
+                yield from lines[max(offset - block_start, 0):end - block_start]
+
+    @classmethod
+    def read_records(cls, dataset, offset=0, limit=None):
+        if dataset.records is not None:
+            end = None if limit is None else offset + limit
+            return dataset.records[offset:end]
+        return [json.loads(line) for line in cls.iter_lines(dataset, offset, limit)]
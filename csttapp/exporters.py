@@ -0,0 +1,93 @@
+import csv
+import io
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from .models import TestStep
+from .importers import CASE_COLUMNS, STEP_COLUMNS
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+def iter_test_cases(queryset, chunk_size=2000):
+    """
+    Walk test cases with a server-side cursor, fetching the steps of each
+    chunk in one extra query
+    """
+    steps = TestStep.objects.only(
+        'test_case_id', 'order_number', 'action', 'expected_result'
+    ).order_by('order_number')
+    return queryset.order_by('created_at', 'id').prefetch_related(
+        Prefetch('steps', queryset=steps)
+    ).iterator(chunk_size=chunk_size)
+
+
+def iter_jsonl(queryset):
+    for test_case in iter_test_cases(queryset):
+        yield json.dumps({
+            'id': test_case.id,
+            'title': test_case.title,
+            'description': test_case.description,
+            'priority': test_case.priority,
+            'type': test_case.type,
+            'status': test_case.status,
+            'metadata': test_case.metadata,
+            'generation_query': test_case.generation_query,
+            'created_at': test_case.created_at,
+            'steps': [
+                {
+                    'order_number': step.order_number,
+                    'action': step.action,
+                    'expected_result': step.expected_result,
+                }
+                for step in test_case.steps.all()
+            ],
+        }, cls=DjangoJSONEncoder) + '\n'
+
+
+def iter_csv(queryset):
+    """
+    One row per step in the layout the CSV importer reads back
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return value
+
+    writer.writerow(['id'] + CASE_COLUMNS + STEP_COLUMNS)
+    yield flush()
+
+    for test_case in iter_test_cases(queryset):
+        case_values = [
+            test_case.id,
+            test_case.title,
+            test_case.description,
+            test_case.priority,
+            test_case.type,
+            test_case.status,
+            json.dumps(test_case.metadata, cls=DjangoJSONEncoder),
+            test_case.generation_query or '',
+        ]
+        steps = list(test_case.steps.all()) or [None]
+        for index, step in enumerate(steps):
+            row = case_values if index == 0 else [''] * len(case_values)
+            if step is not None:
+                row = row + [step.order_number, step.action, step.expected_result]
+            writer.writerow(row)
+        yield flush()
+
+
+def iter_export(queryset, format_type):
+    if format_type == 'csv':
+        return iter_csv(queryset)
+    if format_type == 'jsonl':
+        return iter_jsonl(queryset)
+    raise ValueError(f"Unsupported export format '{format_type}', expected one of {EXPORT_FORMATS}")
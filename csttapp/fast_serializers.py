@@ -0,0 +1,194 @@
+import functools
+import itertools
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from .metrics import serializing
+
+# Field types whose representation of a database value is the value itself
+IDENTITY_FIELDS = (
+    serializers.CharField,
+    serializers.BooleanField,
+    serializers.IntegerField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+class FastSerializer:
+    """
+    Read-only fast path for a ModelSerializer. The serializer's fields are
+    introspected once and turned into a column list and per-field
+    converters, then rows are read with values_list() and turned straight
+    into dicts. The rendered JSON is the same as the serializer's.
+
+    Supports plain model fields, primary key relations and nested
+    `many=True` serializers over a reverse foreign key.
+    """
+    def __init__(self, serializer_class, context=None):
+        self.serializer_class = serializer_class
+        serializer = serializer_class(context=context or {})
+        self.model = serializer.Meta.model
+        self.names = []
+        self.columns = []
+        self.converters = []
+        self.nested = []
+        for field in serializer.fields.values():
+            if not field.write_only:
+                self.compile_field(field)
+        # The primary key is always read last to attach nested rows
+        self.columns.append('pk')
+
+    def compile_field(self, field):
+        if isinstance(field, serializers.ListSerializer):
+            self.nested.append((len(self.names), NestedRelation(self.model, field)))
+            self.names.append(field.field_name)
+            return
+
+        if field.source == '*' or '.' in field.source:
+            raise ImproperlyConfigured(
+                f"{self.serializer_class.__name__}.{field.field_name} has no fast path"
+            )
+        try:
+            model_field = self.model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            raise ImproperlyConfigured(
+                f"{self.serializer_class.__name__}.{field.field_name} is not a model field"
+            )
+
+        if isinstance(field, serializers.RelatedField):
+            if not isinstance(field, serializers.PrimaryKeyRelatedField) or field.pk_field is not None:
+                raise ImproperlyConfigured(
+                    f"{self.serializer_class.__name__}.{field.field_name} has no fast path"
+                )
+            converter = None
+        elif isinstance(field, serializers.FileField):
+            converter = functools.partial(self.convert_file, field, model_field)
+        elif isinstance(field, serializers.JSONField) and not field.binary:
+            converter = None
+        elif isinstance(field, serializers.DateTimeField) and self.is_iso_datetime(field):
+            converter = DateTimeConverter(field)
+        elif isinstance(field, serializers.UUIDField) and field.uuid_format == 'hex_verbose':
+            converter = str
+        elif isinstance(field, IDENTITY_FIELDS):
+            converter = None
+        else:
+            converter = field.to_representation
+
+        self.names.append(field.field_name)
+        self.columns.append(model_field.attname)
+        self.converters.append(converter)
+
+    @staticmethod
+    def is_iso_datetime(field):
+        output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+        return output_format is not None and output_format.lower() == ISO_8601
+
+    @staticmethod
+    def convert_file(field, model_field, name):
+        if not name:
+            return None
+        return field.to_representation(model_field.attr_class(None, model_field, name))
+
+    def build(self, rows):
+        """
+        Turn values_list() rows into representation dicts. Rows may carry
+        extra trailing columns, they are ignored.
+        """
+        names = self.names
+        pk_index = len(self.columns) - 1
+        # The active timezone is looked up once per batch instead of per value
+        converters = [
+            converter.bind() if isinstance(converter, DateTimeConverter) else converter
+            for converter in self.converters
+        ]
+        nested = [(position, relation, relation.load([row[pk_index] for row in rows])) for position, relation in self.nested]
+
+        data = []
+        for row in rows:
+            values = [
+                value if value is None or converter is None else converter(value)
+                for value, converter in zip(row, converters)
+            ]
+            for position, relation, children in nested:
+                values.insert(position, children.get(row[pk_index], []))
+            data.append(dict(zip(names, values)))
+        return data
+
+    def serialize(self, queryset):
+        rows = list(queryset.values_list(*self.columns))
+        with serializing():
+            return self.build(rows)
+
+    def iter_serialize(self, queryset, chunk_size=2000):
+        """Serialize from a server-side cursor, one chunk at a time"""
+        rows = queryset.values_list(*self.columns).iterator(chunk_size=chunk_size)
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            with serializing():
+                data = self.build(chunk)
+            yield from data
+
+
+class DateTimeConverter:
+    """
+    ISO 8601 datetime representation with the field's timezone resolved once
+    per batch. Naive datetimes fall back to the field itself.
+    """
+    def __init__(self, field):
+        self.field = field
+
+    def bind(self):
+        field = self.field
+        field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+        if field_timezone is None:
+            return field.to_representation
+
+        def convert(value):
+            if value.tzinfo is None:
+                return field.to_representation(value)
+            value = value.astimezone(field_timezone).isoformat()
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+        return convert
+
+
+class NestedRelation:
+    """
+    Loads a nested `many=True` serializer over a reverse foreign key with a
+    single query per batch of parents.
+    """
+    def __init__(self, model, field):
+        relation = model._meta.get_field(field.source)
+        if not relation.one_to_many:
+            raise ImproperlyConfigured(f"{model.__name__}.{field.source} is not a reverse foreign key")
+        self.fast_serializer = FastSerializer(type(field.child), context=field.context)
+        self.related_model = relation.related_model
+        self.lookup = f'{relation.field.name}__in'
+        self.parent_column = relation.field.attname
+
+    def load(self, parent_ids):
+        if not parent_ids:
+            return {}
+        rows = list(
+            self.related_model._default_manager
+            .filter(**{self.lookup: parent_ids})
+            .values_list(*self.fast_serializer.columns, self.parent_column)
+        )
+        children = {}
+        for parent_id, group in itertools.groupby(
+            zip(rows, self.fast_serializer.build(rows)),
+            key=lambda pair: pair[0][-1]
+        ):
+            children.setdefault(parent_id, []).extend(data for row, data in group)
+        return children
+
+
+@functools.lru_cache(maxsize=None)
+def get_fast_serializer(serializer_class):
+    """Shared context-free fast path for a serializer class"""
+    return FastSerializer(serializer_class)
@@ -0,0 +1,247 @@
+import csv
+import io
+import itertools
+import json
+import os
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import TestCase, TestStep, TestCaseImport
+
+IMPORT_FORMATS = ('csv', 'jsonl', 'xlsx')
+
+# Flat row layout shared by CSV and Excel imports and by the CSV export.
+# A row with a title starts a new test case, rows with a blank title add
+# further steps to the case above them.
+CASE_COLUMNS = ['title', 'description', 'priority', 'type', 'status', 'metadata', 'generation_query']
+STEP_COLUMNS = ['step_order', 'step_action', 'step_expected_result']
+
+MAX_STORED_ERRORS = 100
+
+# A running import whose progress hasn't moved for this long is taken to
+# have died with its process, and can be resumed
+STALE_AFTER = timedelta(minutes=10)
+
+
+class ImportInProgress(Exception):
+    pass
+
+
+def detect_format(filename):
+    extension = os.path.splitext(filename)[1].lower().lstrip('.')
+    if extension == 'ndjson':
+        return 'jsonl'
+    return extension
+
+
+def group_rows(rows):
+    """
+    Fold flat rows (dicts keyed by column name) into test case records
+    """
+    record = None
+    for row in rows:
+        title = str(row.get('title') or '').strip()
+        if title or record is None:
+            if record is not None:
+                yield record
+            record = {column: row.get(column) for column in CASE_COLUMNS}
+            record['steps'] = []
+        if row.get('step_action') or row.get('step_expected_result'):
+            record['steps'].append({
+                'order_number': row.get('step_order'),
+                'action': row.get('step_action'),
+                'expected_result': row.get('step_expected_result'),
+            })
+    if record is not None:
+        yield record
+
+
+def iter_csv_records(path):
+    with open(path, 'rb') as raw:
+        reader = csv.DictReader(io.TextIOWrapper(raw, encoding='utf-8-sig', newline=''))
+        yield from group_rows(reader)
+
+
+def iter_jsonl_records(path):
+    with open(path, encoding='utf-8') as source:
+        for line in source:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Reported against this record instead of aborting the import
+                    yield line
+
+
+def iter_xlsx_records(path):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("Excel imports require the openpyxl package")
+
+    # Read-only mode streams rows instead of loading the whole sheet
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else '' for cell in next(rows, ())]
+        yield from group_rows(dict(zip(header, row)) for row in rows)
+    finally:
+        workbook.close()
+
+
+def iter_records(path, format_type):
+    readers = {
+        'csv': iter_csv_records,
+        'jsonl': iter_jsonl_records,
+        'xlsx': iter_xlsx_records,
+    }
+    if format_type not in readers:
+        raise ValueError(f"Unsupported import format '{format_type}', expected one of {IMPORT_FORMATS}")
+    return readers[format_type](path)
+
+
+class TestCaseImporter:
+    """
+    Streams records from an import file and writes them in batches. Every
+    batch is committed together with the import's progress counters, so an
+    interrupted import resumes after the last committed record.
+    """
+    def __init__(self, test_case_import, batch_size=500):
+        self.test_case_import = test_case_import
+        self.batch_size = batch_size
+        self.max_lengths = {
+            field: TestCase._meta.get_field(field).max_length
+            for field in ('title', 'priority', 'type', 'status')
+        }
+
+    def clean_record(self, record):
+        """
+        Normalise a raw record, returning (test_case, steps) or raising ValueError
+        """
+        if not isinstance(record, dict):
+            raise ValueError("Record must be a JSON object")
+
+        title = str(record.get('title') or '').strip()
+        if not title:
+            raise ValueError("title is required")
+
+        values = {'title': title}
+        for field in ('priority', 'type', 'status'):
+            values[field] = str(record.get(field) or '').strip()
+        for field, max_length in self.max_lengths.items():
+            if len(values[field]) > max_length:
+                raise ValueError(f"{field} is longer than {max_length} characters")
+
+        metadata = record.get('metadata') or {}
+        if isinstance(metadata, str):
+            try:
+                metadata = json.loads(metadata)
+            except json.JSONDecodeError:
+                raise ValueError("metadata is not valid JSON")
+        if not isinstance(metadata, dict):
+            raise ValueError("metadata must be an object")
+
+        test_case = TestCase(
+            suite_id=self.test_case_import.suite_id,
+            created_by_profile_id=self.test_case_import.created_by_profile_id,
+            description=str(record.get('description') or ''),
+            generation_query=record.get('generation_query') or None,
+            metadata=metadata,
+            **values
+        )
+
+        steps = []
+        for position, step in enumerate(record.get('steps') or [], start=1):
+            if not step.get('action') or not step.get('expected_result'):
+                raise ValueError(f"step {position} needs an action and an expected result")
+            try:
+                order_number = int(step.get('order_number') or position)
+            except (TypeError, ValueError):
+                raise ValueError(f"step {position} has an invalid order number")
+            steps.append(TestStep(
+                test_case=test_case,
+                order_number=order_number,
+                action=str(step['action']),
+                expected_result=str(step['expected_result'])
+            ))
+        return test_case, steps
+
+    def write_batch(self, batch, start):
+        test_cases = []
+        steps = []
+        errors = []
+        for offset, record in enumerate(batch):
+            try:
+                test_case, test_case_steps = self.clean_record(record)
+            except (ValueError, AttributeError) as e:
+                errors.append({'record': start + offset + 1, 'error': str(e)})
+                continue
+            test_cases.append(test_case)
+            steps.extend(test_case_steps)
+
+        stored_errors = self.test_case_import.errors
+        stored_errors = stored_errors + errors[:max(MAX_STORED_ERRORS - len(stored_errors), 0)]
+
+        with transaction.atomic():
+            TestCase.objects.bulk_create(test_cases, batch_size=self.batch_size)
+            TestStep.objects.bulk_create(steps, batch_size=2000)
+            TestCaseImport.objects.filter(id=self.test_case_import.id).update(
+                records_processed=F('records_processed') + len(batch),
+                cases_created=F('cases_created') + len(test_cases),
+                steps_created=F('steps_created') + len(steps),
+                errors=stored_errors,
+                updated_at=timezone.now()
+            )
+        self.test_case_import.errors = stored_errors
+
+    def claim(self):
+        """
+        Mark the import as running, unless another run has it. The status
+        change is a single conditional update, so concurrent runs can't both
+        start from the same resume point.
+        """
+        claimable = Q(status__in=['Pending', 'Failed']) | Q(status='Running', updated_at__lt=timezone.now() - STALE_AFTER)
+        claimed = TestCaseImport.objects.filter(claimable, id=self.test_case_import.id).update(
+            status='Running', updated_at=timezone.now()
+        )
+        if not claimed:
+            raise ImportInProgress(f"Import {self.test_case_import.id} is running or has completed")
+        self.test_case_import.refresh_from_db()
+
+    def run(self, max_records=None):
+        """
+        Import the remaining records, or at most max_records of them. An
+        import stopped at max_records is left Pending, to be resumed.
+        """
+        self.claim()
+        test_case_import = self.test_case_import
+
+        try:
+            # Records committed by an earlier run are parsed but not written again
+            records = itertools.islice(
+                iter_records(test_case_import.source_path, test_case_import.format_type),
+                test_case_import.records_processed,
+                None
+            )
+            start = test_case_import.records_processed
+            remaining = max_records
+            while remaining is None or remaining > 0:
+                batch = list(itertools.islice(records, self.batch_size if remaining is None else min(self.batch_size, remaining)))
+                if not batch:
+                    break
+                self.write_batch(batch, start)
+                start += len(batch)
+                if remaining is not None:
+                    remaining -= len(batch)
+            finished = remaining is None or remaining > 0 or next(records, None) is None
+        except Exception as e:
+            test_case_import.refresh_from_db()
+            test_case_import.status = 'Failed'
+            test_case_import.errors = test_case_import.errors + [{'record': None, 'error': str(e)}]
+            test_case_import.save(update_fields=['status', 'errors', 'updated_at'])
+            raise
+
+        TestCaseImport.objects.filter(id=test_case_import.id).update(status='Completed' if finished else 'Pending')
+        test_case_import.refresh_from_db()
+        return test_case_import
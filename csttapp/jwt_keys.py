@@ -0,0 +1,197 @@
+import json
+import os
+import threading
+import time
+
+import jwt
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from jwt import ExpiredSignatureError, InvalidAlgorithmError, InvalidTokenError
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.exceptions import TokenBackendError, TokenBackendExpiredToken
+from rest_framework_simplejwt.settings import api_settings
+
+# How often the keys file is checked for a rotation, in seconds, and how
+# often at most when a token names a key that isn't loaded yet
+RELOAD_INTERVAL = 30
+UNKNOWN_KEY_RELOAD_INTERVAL = 1
+
+# How long verifiers may cache the key set, in seconds
+JWKS_MAX_AGE = 300
+
+
+def get_algorithm(name):
+    return jwt.PyJWS().get_algorithm_by_name(name)
+
+
+class SigningKey:
+    """A key of the key ring, as written by `setup_jwt_keys.py rotate`"""
+    __slots__ = ('kid', 'algorithm', 'private_key', 'public_key', 'activated', 'retired')
+
+    def __init__(self, kid, algorithm, private_key, activated=None, retired=None):
+        self.kid = kid
+        self.algorithm = algorithm
+        self.private_key = get_algorithm(algorithm).prepare_key(private_key)
+        self.public_key = self.private_key.public_key()
+        self.activated = activated
+        self.retired = retired
+
+    @property
+    def signs(self):
+        return self.activated is not None and self.retired is None
+
+    def jwk(self):
+        jwk = get_algorithm(self.algorithm).to_jwk(self.public_key, as_dict=True)
+        jwk.update(kid=self.kid, alg=self.algorithm, use='sig')
+        return jwk
+
+
+class KeyRing:
+    """
+    The keys of JWT_KEYS_FILE. Tokens are signed with the most recently
+    activated key and verified with the key named by their `kid` header, so
+    tokens signed before a rotation stay valid until the retired key is
+    pruned. Staged keys are published before they sign anything, giving
+    verifiers time to fetch them.
+    """
+    def __init__(self, keys):
+        self.keys = {key.kid: key for key in keys}
+        signing = [key for key in keys if key.signs]
+        if not signing:
+            raise ValueError("The JWT keys file has no active key, run `setup_jwt_keys.py rotate`")
+        self.signing_key = max(signing, key=lambda key: key.activated)
+        self.jwks = json.dumps({'keys': [key.jwk() for key in keys]}).encode()
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        return cls([
+            SigningKey(entry['kid'], entry['alg'], entry['private_key'], entry.get('activated'), entry.get('retired'))
+            for entry in data['keys']
+        ])
+
+    def get(self, kid):
+        return self.keys.get(kid)
+
+
+class KeyRingFile:
+    """Keeps the key ring in step with its file, so a rotation needs no restart"""
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.mtime = None
+        self.checked = 0.0
+        self.key_ring = None
+        self.refresh()
+
+    def refresh(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime != self.mtime:
+            self.key_ring = KeyRing.load(self.path)
+            self.mtime = mtime
+        self.checked = time.monotonic()
+
+    def get(self, interval=RELOAD_INTERVAL):
+        if time.monotonic() - self.checked > interval:
+            with self.lock:
+                if time.monotonic() - self.checked > interval:
+                    self.refresh()
+        return self.key_ring
+
+    def get_key(self, kid):
+        key = self.get().get(kid)
+        if key is None:
+            # Another process may have just rotated to it
+            key = self.get(UNKNOWN_KEY_RELOAD_INTERVAL).get(kid)
+        return key
+
+
+class KeyRingTokenBackend(TokenBackend):
+    """
+    simplejwt token backend for asymmetric keys (RS256, ES256, EdDSA). The
+    algorithm comes from the key the token names, never from the token, and
+    with JWT_ACCEPT_HS256 tokens without a `kid` are checked against the
+    SIMPLE_JWT HMAC key, for the switch over.
+    """
+    def __init__(self, key_ring_file, accept_hs256=False):
+        super().__init__(
+            api_settings.ALGORITHM,
+            api_settings.SIGNING_KEY,
+            api_settings.VERIFYING_KEY,
+            api_settings.AUDIENCE,
+            api_settings.ISSUER,
+            None,
+            api_settings.LEEWAY,
+            api_settings.JSON_ENCODER,
+        )
+        self.key_ring_file = key_ring_file
+        self.accept_hs256 = accept_hs256
+
+    def encode(self, payload):
+        key = self.key_ring_file.get().signing_key
+        jwt_payload = payload.copy()
+        if self.audience is not None:
+            jwt_payload['aud'] = self.audience
+        if self.issuer is not None:
+            jwt_payload['iss'] = self.issuer
+        return jwt.encode(
+            jwt_payload,
+            key.private_key,
+            algorithm=key.algorithm,
+            headers={'kid': key.kid},
+            json_encoder=self.json_encoder,
+        )
+
+    def decode(self, token, verify=True):
+        try:
+            kid = jwt.get_unverified_header(token).get('kid')
+        except InvalidTokenError as e:
+            raise TokenBackendError(_("Token is invalid")) from e
+
+        if kid is None and self.accept_hs256 and self.algorithm.startswith('HS'):
+            return super().decode(token, verify)
+
+        key = self.key_ring_file.get_key(kid) if kid is not None else None
+        if key is None and verify:
+            raise TokenBackendError(_("Token is invalid"))
+        try:
+            return jwt.decode(
+                token,
+                key.public_key if key is not None else None,
+                algorithms=[key.algorithm] if key is not None else None,
+                audience=self.audience,
+                issuer=self.issuer,
+                leeway=self.get_leeway(),
+                options={
+                    'verify_aud': self.audience is not None,
+                    'verify_signature': verify,
+                },
+            )
+        except InvalidAlgorithmError as e:
+            raise TokenBackendError(_("Invalid algorithm specified")) from e
+        except ExpiredSignatureError as e:
+            raise TokenBackendExpiredToken(_("Token is expired")) from e
+        except InvalidTokenError as e:
+            raise TokenBackendError(_("Token is invalid")) from e
+
+
+_key_ring_file = None
+
+
+def get_key_ring():
+    """The active key ring, or None when tokens are signed with HS256"""
+    return _key_ring_file.get() if _key_ring_file is not None else None
+
+
+def install():
+    """Sign and verify tokens with JWT_KEYS_FILE when it exists, called once at startup"""
+    global _key_ring_file
+    path = getattr(settings, 'JWT_KEYS_FILE', None)
+    if not path or not os.path.exists(path):
+        return
+
+    from rest_framework_simplejwt import state
+
+    _key_ring_file = KeyRingFile(path)
+    state.token_backend = KeyRingTokenBackend(_key_ring_file, getattr(settings, 'JWT_ACCEPT_HS256', False))
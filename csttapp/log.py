@@ -0,0 +1,169 @@
+import functools
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import uuid
+from datetime import datetime, timezone
+
+REDACTED = '[redacted]'
+
+# Keys whose values never reach the logs, matched on the lowercased key
+SENSITIVE_KEYS = ('password', 'token', 'secret', 'authorization', 'api_key', 'apikey', 'cookie')
+SENSITIVE_EXACT_KEYS = frozenset({'access', 'refresh', 'jwt'})
+
+# Bounds on what a logged payload can cost
+MAX_STRING = 256
+MAX_ITEMS = 50
+MAX_DEPTH = 4
+
+SCALAR_TYPES = frozenset({bool, int, float, uuid.UUID})
+
+# Attributes every LogRecord has, anything else came in through `extra`
+RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+@functools.lru_cache(maxsize=1024)
+def is_sensitive(key):
+    key = str(key).lower()
+    return key in SENSITIVE_EXACT_KEYS or any(name in key for name in SENSITIVE_KEYS)
+
+
+def redact(value, depth=0):
+    """
+    Copy of a payload that is safe and cheap to log: secrets are masked,
+    long strings are cut and containers are capped in size and depth.
+    """
+    value_type = type(value)
+    if value_type is str:
+        if len(value) > MAX_STRING:
+            return f'{value[:MAX_STRING]}...(+{len(value) - MAX_STRING} chars)'
+        return value
+    if value is None or value_type in SCALAR_TYPES:
+        return value
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f'<{len(value)} bytes>'
+    if depth >= MAX_DEPTH:
+        return '...'
+    if isinstance(value, dict):
+        redacted = {}
+        for index, (key, item) in enumerate(value.items()):
+            if index == MAX_ITEMS:
+                redacted['...'] = f'+{len(value) - MAX_ITEMS} keys'
+                break
+            redacted[key] = REDACTED if is_sensitive(key) else redact(item, depth + 1)
+        return redacted
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [redact(item, depth + 1) for item in list(value)[:MAX_ITEMS]]
+        if len(value) > MAX_ITEMS:
+            items.append(f'+{len(value) - MAX_ITEMS} items')
+        return items
+    if hasattr(value, 'size') and hasattr(value, 'name') and hasattr(value, 'read'):
+        # Uploaded and stored files
+        return f'<file {value.name}, {value.size} bytes>'
+    return value
+
+
+class RedactingFilter(logging.Filter):
+    """Redacts the message arguments and `extra` fields of every record"""
+    def filter(self, record):
+        args = record.args
+        if args:
+            if isinstance(args, dict):
+                record.args = redact(args)
+            elif not all(type(arg) in SCALAR_TYPES for arg in args):
+                record.args = tuple(redact(arg) for arg in args)
+        for key in record.__dict__.keys() - RECORD_ATTRS:
+            value = record.__dict__[key]
+            record.__dict__[key] = REDACTED if is_sensitive(key) else redact(value)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a fraction of high volume records. A record opts in with
+    `extra={'sample': '<kind>'}` and is kept at the rate configured for that
+    kind; warnings and errors are always kept.
+    """
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = rates or {}
+
+    def filter(self, record):
+        kind = getattr(record, 'sample', None)
+        if kind is None or record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(kind, 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+
+class StructuredFormatter(logging.Formatter):
+    """One JSON object per line, `extra` fields included as keys"""
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key in sorted(record.__dict__.keys() - RECORD_ATTRS - {'sample'}):
+            entry[key] = record.__dict__[key]
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class BackgroundListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room rather than lose the sentinel on a full queue
+        self.queue.put(self._sentinel)
+
+
+class BackgroundHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to a bounded queue drained by a background thread, which
+    does the formatting and writes to the stream (stderr by default).
+    Filters still run in the logging thread, so nothing unredacted is
+    queued. When the queue is full records are dropped instead of blocking
+    the request, and the count is reported on the next record written.
+    """
+    def __init__(self, stream=None, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.target = logging.StreamHandler(stream)
+        self.dropped = 0
+        self.listener = BackgroundListener(self.queue, self.target)
+        self.listener.start()
+
+    def setFormatter(self, fmt):
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Message formatting is left to the background thread. Tracebacks
+        # are rendered now so the queued record holds no frames.
+        if record.exc_info:
+            record.exc_text = (self.target.formatter or logging.Formatter()).formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        if self.dropped:
+            record.dropped_records = self.dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+        else:
+            if hasattr(record, 'dropped_records'):
+                self.dropped -= record.dropped_records
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+            self.target.close()
+        super().close()
@@ -0,0 +1,218 @@
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client
+from rest_framework_simplejwt.tokens import AccessToken
+from csttapp.models import Project, TestCase
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class StubLLM(threading.Thread):
+    """
+    OpenAI compatible chat completions server that answers every call with
+    an empty tool call after a fixed delay, so the benchmark measures how
+    the app waits on the model and not the model itself
+    """
+    def __init__(self, latency):
+        super().__init__(daemon=True)
+        self.latency = latency
+        self.url = None
+        self.ready = threading.Event()
+
+    def run(self):
+        asyncio.run(self.serve())
+
+    async def serve(self):
+        server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        self.url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/v1"
+        self.ready.set()
+        async with server:
+            await server.serve_forever()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b'\r\n\r\n')
+                length = 0
+                for line in head.split(b'\r\n')[1:]:
+                    name, _, value = line.partition(b':')
+                    if name.strip().lower() == b'content-length':
+                        length = int(value)
+                body = json.loads(await reader.readexactly(length) or b'{}') if length else {}
+                await asyncio.sleep(self.latency)
+                payload = json.dumps(self.completion(body)).encode()
+                writer.write(
+                    b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                    b'Content-Length: %d\r\n\r\n' % len(payload) + payload
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def completion(body):
+        message = {'role': 'assistant', 'content': '{}'}
+        tool = (body.get('tool_choice') or {}).get('function', {}).get('name')
+        if tool:
+            arguments = {'primary_suggestion': 'stub', 'secondary_suggestions': []} if tool == 'generate_project_suggestions' else {}
+            message = {
+                'role': 'assistant',
+                'content': None,
+                'tool_calls': [{'id': 'call_stub', 'type': 'function', 'function': {'name': tool, 'arguments': json.dumps(arguments)}}],
+            }
+        return {
+            'id': 'chatcmpl-stub',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'stub'),
+            'choices': [{'index': 0, 'finish_reason': 'stop', 'message': message}],
+            'usage': {'prompt_tokens': 100, 'completion_tokens': 20, 'total_tokens': 120},
+        }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the WSGI and ASGI request paths under concurrent load: list reads, template "
+        "suggestions and the project dashboard, with the LLM replaced by a local stub. Each mode "
+        "runs in its own process and reports throughput, latency, peak memory and threads."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('project', help="Project id to read from")
+        parser.add_argument('--test-case', help="Test case for template suggestions, defaults to one of the project's")
+        parser.add_argument('--mode', choices=('both', 'wsgi', 'asgi'), default='both')
+        parser.add_argument('--concurrency', type=int, default=50, help="Requests in flight")
+        parser.add_argument('--requests', type=int, default=600, help="Requests in total")
+        parser.add_argument('--llm-latency', type=float, default=0.5, help="Seconds the stub LLM takes per call")
+        # Set by the parent process, the stub LLM is started when it's not given
+        parser.add_argument('--llm-url', help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        project = Project.objects.filter(id=options['project']).select_related('team').first()
+        if project is None:
+            raise CommandError(f"Project {options['project']} does not exist")
+        test_case = options['test_case'] or (
+            TestCase.objects.filter(suite__project=project, is_active=True).values_list('id', flat=True).first()
+        )
+        if test_case is None:
+            raise CommandError("The project has no test case, pass --test-case")
+        member = project.team.members.select_related('profile__auth_user').first()
+        if member is None:
+            raise CommandError("The project's team has no members")
+
+        if not options['llm_url']:
+            stub = StubLLM(options['llm_latency'])
+            stub.start()
+            stub.ready.wait()
+            options['llm_url'] = stub.url
+
+        if options['mode'] == 'both':
+            # Separate processes so memory and thread counts don't mix
+            self.stdout.write(
+                f"{options['requests']} requests, {options['concurrency']} in flight, "
+                f"LLM latency {options['llm_latency'] * 1000:.0f} ms"
+            )
+            for mode in ('wsgi', 'asgi'):
+                command = [
+                    sys.executable, '-m', 'django', 'bench_async', str(project.id),
+                    '--test-case', str(test_case), '--mode', mode,
+                    '--concurrency', str(options['concurrency']), '--requests', str(options['requests']),
+                    '--llm-latency', str(options['llm_latency']), '--llm-url', options['llm_url'],
+                ]
+                result = subprocess.run(command, cwd=settings.BASE_DIR, capture_output=True, text=True)
+                if result.returncode:
+                    raise CommandError(f"{mode} run failed:\n{result.stderr}")
+                self.stdout.write(result.stdout.rstrip())
+            return
+
+        os.environ['OPENAI_BASE_URL'] = options['llm_url']
+        os.environ.setdefault('OPENAI_API_KEY', 'stub')
+        # The test clients send requests for this host
+        settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+
+        token = str(AccessToken.for_user(member.profile.auth_user))
+        paths = [
+            f'/projects/{project.id}/test-suites/',
+            f'/test-cases/{test_case}/template-suggestions/',
+            f'/projects/{project.id}/dashboard/',
+        ]
+        workload = [paths[index % len(paths)] for index in range(options['requests'])]
+        run = self.run_wsgi if options['mode'] == 'wsgi' else self.run_asgi
+
+        peak_threads = threading.active_count()
+        running = True
+
+        def watch_threads():
+            nonlocal peak_threads
+            while running:
+                peak_threads = max(peak_threads, threading.active_count())
+                time.sleep(0.005)
+
+        watcher = threading.Thread(target=watch_threads, daemon=True)
+        watcher.start()
+        started = time.perf_counter()
+        results = run(workload, token, options['concurrency'])
+        elapsed = time.perf_counter() - started
+        running = False
+        watcher.join()
+
+        timings = [seconds * 1000 for seconds, _ in results]
+        errors = sum(1 for _, status_code in results if status_code >= 400)
+        self.stdout.write(
+            f"{options['mode']}  {len(results) / elapsed:7.1f} requests/s  p50 {percentile(timings, 0.5):7.1f} ms  "
+            f"p99 {percentile(timings, 0.99):7.1f} ms  mean {statistics.fmean(timings):7.1f} ms  "
+            f"peak rss {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB  "
+            f"peak threads {peak_threads - 1}  errors {errors}"
+        )
+
+    def run_wsgi(self, workload, token, concurrency):
+        """A thread per request in flight, as a threaded WSGI server would"""
+        local = threading.local()
+
+        def send(path):
+            client = getattr(local, 'client', None)
+            if client is None:
+                client = local.client = Client(headers={'Authorization': f'Bearer {token}'})
+            started = time.perf_counter()
+            response = client.get(path)
+            return time.perf_counter() - started, response.status_code
+
+        try:
+            with ThreadPoolExecutor(concurrency) as executor:
+                return list(executor.map(send, workload))
+        finally:
+            connections.close_all()
+
+    def run_asgi(self, workload, token, concurrency):
+        """All requests on one event loop, as an ASGI server would"""
+        async def main():
+            client = AsyncClient()
+            headers = {'Authorization': f'Bearer {token}'}
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def send(path):
+                async with semaphore:
+                    started = time.perf_counter()
+                    response = await client.get(path, headers=headers)
+                    return time.perf_counter() - started, response.status_code
+
+            return await asyncio.gather(*(send(path) for path in workload))
+
+        return asyncio.run(main())
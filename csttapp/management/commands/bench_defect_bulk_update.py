@@ -0,0 +1,81 @@
+import statistics
+import time
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from csttapp.models import Defect, Profile, Project, Team
+
+
+class Rollback(Exception):
+    pass
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure /defects/bulk/ latency and queries for one change set applied to many defects, "
+        "selected by ids and by filter. The rows are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--defects', type=int, default=1000)
+        parser.add_argument('--requests', type=int, default=10, help="Requests per change set")
+
+    def handle(self, *args, **options):
+        # The test client sends requests for this host
+        settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+        try:
+            with transaction.atomic():
+                self.run(options['defects'], options['requests'])
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def run(self, count, requests):
+        user = User.objects.create_user('bench_defect_bulk_update', 'bench_defect_bulk_update@example.com')
+        profile = Profile.objects.create(auth_user=user, role='QA')
+        team = Team.objects.create(name='Bench', description='', created_by_profile=profile)
+        project = Project.objects.create(name='Bench', description='', status='Pending', team=team)
+        defects = Defect.objects.bulk_create([
+            Defect(
+                title=f'Defect {i}', description='', status='Open', priority='High', severity='Minor',
+                project=project, reported_by_profile=profile, metadata={'tags': [f'tag{i % 5}']},
+            )
+            for i in range(count)
+        ], batch_size=1000)
+        ids = [str(defect.id) for defect in defects]
+        client = APIClient()
+        client.force_authenticate(user)
+        url = f'/teams/{team.id}/projects/{project.id}/defects/bulk/'
+
+        # Each change set is applied twice in turn, so every request changes every row
+        change_sets = [
+            ('status by ids', {'ids': ids}, [{'status': 'Closed'}, {'status': 'Open'}]),
+            ('assignee by filter', {'filter': {}}, [{'assignee_id': str(profile.id)}, {'assignee_id': None}]),
+            ('tags by filter', {'filter': {}}, [{'add_tags': ['bulk']}, {'remove_tags': ['bulk']}]),
+        ]
+
+        self.stdout.write(f"{count} defects, {requests} requests per change set")
+        for name, selection, changes in change_sets:
+            timings = []
+            for i in range(requests):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = client.post(url, {**selection, 'changes': changes[i % 2]}, format='json')
+                    timings.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    raise CommandError(f"{name} returned {response.status_code}: {response.content[:200]}")
+                if response.json()['updated'] != count:
+                    raise CommandError(f"{name} updated {response.json()['updated']} of {count} defects")
+
+            self.stdout.write(
+                f"  {name:>18}  p50 {statistics.median(timings):7.1f} ms  "
+                f"p99 {percentile(timings, 0.99):7.1f} ms  {len(queries)} queries"
+            )
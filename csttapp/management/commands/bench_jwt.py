@@ -0,0 +1,53 @@
+import json
+import os
+import tempfile
+import time
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.tokens import AccessToken
+from csttapp.jwt_keys import KeyRingFile, KeyRingTokenBackend
+# Next to manage.py
+from setup_jwt_keys import ALGORITHMS, generate_private_key
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure token signing and verification throughput for HS256 and each asymmetric "
+        "algorithm, through the same backends the API uses."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        payload = AccessToken().payload
+        payload['user_id'] = 1
+
+        backends = {'HS256': TokenBackend('HS256', 'x' * 64)}
+        with tempfile.TemporaryDirectory() as directory:
+            for algorithm in ALGORITHMS:
+                kid, private_key = generate_private_key(algorithm)
+                path = os.path.join(directory, f'{algorithm}.json')
+                with open(path, 'w') as f:
+                    json.dump({'keys': [{'kid': kid, 'alg': algorithm, 'activated': 1, 'private_key': private_key}]}, f)
+                backends[algorithm] = KeyRingTokenBackend(KeyRingFile(path))
+
+        self.stdout.write(f"{iterations} iterations, {len(json.dumps(payload, default=str))} byte payload")
+        for algorithm, backend in backends.items():
+            token = backend.encode(payload)
+
+            started = time.perf_counter()
+            for _ in range(iterations):
+                backend.encode(payload)
+            signing = time.perf_counter() - started
+
+            started = time.perf_counter()
+            for _ in range(iterations):
+                backend.decode(token)
+            verifying = time.perf_counter() - started
+
+            self.stdout.write(
+                f"{algorithm:>6}  sign {iterations / signing:9.0f}/s  verify {iterations / verifying:9.0f}/s  "
+                f"({verifying / iterations * 1e6:6.1f} us)  token {len(token)} bytes"
+            )
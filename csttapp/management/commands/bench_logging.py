@@ -0,0 +1,62 @@
+import io
+import logging
+import os
+import time
+from django.core.management.base import BaseCommand
+from csttapp.log import BackgroundHandler, RedactingFilter, SamplingFilter, StructuredFormatter
+
+
+def make_payload():
+    # Shaped like a saved test case, with a secret to mask
+    return {
+        'title': 'Login with valid credentials', 'description': 'Description ' * 10, 'password': 'secret',
+        'steps': [{'order_number': order, 'action': f'Action {order}', 'expected_result': 'Result'} for order in range(1, 6)],
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure what a log call costs the calling thread with the csttapp logging setup "
+        "(filters in the caller, formatting and writes on the background thread), against the "
+        "print() calls it replaced."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        stream = io.StringIO()
+        # Room for every record, so none are dropped while the thread catches up
+        handler = BackgroundHandler(stream, maxsize=iterations * 2)
+        handler.setFormatter(StructuredFormatter())
+        handler.addFilter(SamplingFilter({'payload': 1.0}))
+        handler.addFilter(RedactingFilter())
+        logger = logging.getLogger('csttapp.bench_logging')
+        logger.handlers = [handler]
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        payload = make_payload()
+
+        # Line buffered like stdout on a terminal, a write per print()
+        console = open(os.devnull, 'w', buffering=1)
+        calls = {
+            'print()': lambda i: print(f"Saving test case {i}: {payload}", file=console),
+            'debug, below level': lambda i: logger.debug("Saving test case %s", i, extra={'payload': payload}),
+            'info': lambda i: logger.info("Saving test case %s", i),
+            'info with payload': lambda i: logger.info("Saving test case %s", i, extra={'payload': payload, 'sample': 'payload'}),
+        }
+
+        self.stdout.write(f"{iterations} calls each, time spent in the calling thread")
+        try:
+            for name, call in calls.items():
+                started = time.perf_counter()
+                for i in range(iterations):
+                    call(i)
+                seconds = time.perf_counter() - started
+                self.stdout.write(f"  {name:>18}  {seconds / iterations * 1e6:7.2f} us/call")
+        finally:
+            handler.close()
+            console.close()
+        if handler.dropped:
+            self.stderr.write(f"  {handler.dropped} records dropped")
@@ -0,0 +1,109 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from csttapp import passwords
+
+EMAIL = 'bench-login@example.invalid'
+PASSWORD = 'bench-login-password'
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure login throughput per password hasher at rising concurrency, and the highest "
+        "throughput that keeps p99 under a target. Each hasher runs in its own process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hashers', default='pbkdf2_sha256,scrypt', help="Comma separated PASSWORD_HASHER values")
+        parser.add_argument('--concurrency', default='1,4,16,32', help="Comma separated logins in flight")
+        parser.add_argument('--requests', type=int, default=200, help="Logins per concurrency level")
+        parser.add_argument('--p99', type=float, default=500, help="p99 target, in ms")
+        parser.add_argument('--single', action='store_true', help="Run the configured hasher in this process")
+
+    def handle(self, *args, **options):
+        if not options['single']:
+            for hasher in options['hashers'].split(','):
+                command = [
+                    sys.executable, '-m', 'django', 'bench_login', '--single',
+                    '--concurrency', options['concurrency'], '--requests', str(options['requests']),
+                    '--p99', str(options['p99']),
+                ]
+                result = subprocess.run(
+                    command, cwd=settings.BASE_DIR, capture_output=True, text=True,
+                    env={**os.environ, 'PASSWORD_HASHER': hasher},
+                )
+                if result.returncode:
+                    raise CommandError(f"{hasher} run failed:\n{result.stderr}")
+                self.stdout.write(result.stdout.rstrip())
+            return
+
+        # The test client sends requests for this host
+        settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+        if User.objects.filter(username=EMAIL).exists():
+            raise CommandError(f"{EMAIL} exists already, delete it first")
+        user = User(username=EMAIL, email=EMAIL)
+        passwords.set_password(user, PASSWORD)
+        user.save()
+
+        self.stdout.write(
+            f"{settings.PASSWORD_HASHER}, {settings.PASSWORD_HASHING_WORKERS} workers, "
+            f"queue {settings.PASSWORD_HASHING_QUEUE}"
+        )
+        best = None
+        try:
+            # The first login starts the workers
+            Client().post('/login/', {'email': EMAIL, 'password': PASSWORD}, content_type='application/json')
+            for concurrency in (int(level) for level in options['concurrency'].split(',')):
+                throughput, timings, busy = self.run(concurrency, options['requests'])
+                p99 = percentile(timings, 0.99)
+                self.stdout.write(
+                    f"  {concurrency:>4} in flight  {throughput:7.1f} logins/s  p50 {percentile(timings, 0.5):7.1f} ms  "
+                    f"p99 {p99:7.1f} ms  busy {busy}"
+                )
+                if p99 <= options['p99'] and not busy and (best is None or throughput > best):
+                    best = throughput
+        finally:
+            User.objects.filter(username=EMAIL).delete()
+
+        if best is None:
+            self.stdout.write(f"  no level kept p99 under {options['p99']:.0f} ms")
+        else:
+            self.stdout.write(f"  {best:.1f} logins/s with p99 under {options['p99']:.0f} ms")
+
+    def run(self, concurrency, requests):
+        local = threading.local()
+
+        def login(_):
+            client = getattr(local, 'client', None)
+            if client is None:
+                client = local.client = Client()
+            started = time.perf_counter()
+            response = client.post('/login/', {'email': EMAIL, 'password': PASSWORD}, content_type='application/json')
+            return time.perf_counter() - started, response.status_code
+
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(concurrency) as executor:
+                results = list(executor.map(login, range(requests)))
+        finally:
+            connections.close_all()
+        elapsed = time.perf_counter() - started
+
+        timings = [seconds * 1000 for seconds, status_code in results if status_code == 200]
+        busy = sum(1 for _, status_code in results if status_code == 503)
+        if len(timings) + busy < len(results):
+            raise CommandError(f"Unexpected responses: {sorted({status_code for _, status_code in results})}")
+        return len(timings) / elapsed, timings or [0.0], busy
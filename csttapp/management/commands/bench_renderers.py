@@ -0,0 +1,78 @@
+import datetime
+import io
+import time
+import uuid
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from csttapp.parsers import ORJSONParser
+from csttapp.renderers import ORJSONRenderer
+
+
+def make_rows(count, steps, nulls):
+    created_at = datetime.datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc)
+    return [
+        {
+            'id': uuid.uuid4(), 'title': f'Test case {i}', 'description': 'Description ' * 10,
+            'priority': 'High', 'type': 'Functional', 'status': 'Draft', 'suite': uuid.uuid4(),
+            'metadata': {'tags': ['login', 'smoke'], 'estimate': 1.5},
+            'steps': [
+                {'id': uuid.uuid4(), 'test_case': uuid.uuid4(), 'order_number': order,
+                 'action': f'Action {order}', 'expected_result': 'Result'}
+                for order in range(1, steps + 1)
+            ],
+            'is_active': True, 'generation_query': None if nulls else 'login page',
+            'input_image': None if nulls else '/media/test_cases/images/login.png',
+            'created_at': created_at, 'updated_at': created_at,
+            'created_by_profile': None if nulls else uuid.uuid4(),
+        }
+        for i in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF's JSONRenderer and JSONParser with the orjson backed ones on test case "
+        "shaped rows, with and without null values (nulls make the renderer look for NaN)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--steps', type=int, default=5, help="Steps per test case")
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def best_of(self, repeat, function):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        self.stdout.write(f"{rows} rows, {options['steps']} steps each, best of {repeat}")
+        for nulls in (False, True):
+            data = make_rows(rows, options['steps'], nulls)
+            body = JSONRenderer().render(data)
+            if ORJSONRenderer().render(data) != body:
+                self.stderr.write("  orjson output differs from JSONRenderer")
+
+            label = 'with nulls' if nulls else 'no nulls'
+            baseline = None
+            for name, renderer in (('JSONRenderer', JSONRenderer()), ('ORJSONRenderer', ORJSONRenderer())):
+                seconds = self.best_of(repeat, lambda: renderer.render(data))
+                baseline = baseline or seconds
+                self.stdout.write(
+                    f"  {label:>10}  render {name:>14}  {seconds * 1000:8.1f} ms  {len(body) / seconds / 1e6:6.1f} MB/s  "
+                    f"{baseline / seconds:4.1f}x"
+                )
+
+        baseline = None
+        for name, parser in (('JSONParser', JSONParser()), ('ORJSONParser', ORJSONParser())):
+            seconds = self.best_of(repeat, lambda: parser.parse(io.BytesIO(body)))
+            baseline = baseline or seconds
+            self.stdout.write(
+                f"  {'':>10}  parse  {name:>14}  {seconds * 1000:8.1f} ms  {len(body) / seconds / 1e6:6.1f} MB/s  "
+                f"{baseline / seconds:4.1f}x"
+            )
@@ -0,0 +1,100 @@
+import statistics
+import time
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from csttapp.models import Profile, Project, Team, TestSuite
+
+
+class Rollback(Exception):
+    pass
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure save latency and queries against the number of steps, for creating a test case "
+        "through /save-test-case/ and for reordering its steps through the edit endpoint. "
+        "The rows are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--steps', default='1,10,30,100,200', help="Comma separated step counts")
+        parser.add_argument('--requests', type=int, default=20, help="Requests per step count")
+
+    def handle(self, *args, **options):
+        # The test client sends requests for this host
+        settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+        try:
+            with transaction.atomic():
+                self.run([int(count) for count in options['steps'].split(',')], options['requests'])
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def run(self, step_counts, requests):
+        user = User.objects.create_user('bench_save_test_case', 'bench_save_test_case@example.com')
+        profile = Profile.objects.create(auth_user=user, role='QA')
+        team = Team.objects.create(name='Bench', description='', created_by_profile=profile)
+        project = Project.objects.create(name='Bench', description='', status='Pending', team=team)
+        suite = TestSuite.objects.create(name='Bench', description='', project=project)
+        client = APIClient()
+        client.force_authenticate(user)
+
+        # The first request loads what the others reuse
+        client.post('/save-test-case/', {
+            'title': 'Warm up', 'description': '', 'priority': 'High', 'type': 'Functional',
+            'status': 'Draft', 'suite': str(suite.id), 'steps': [],
+        }, format='json')
+
+        self.stdout.write(f"{requests} requests per step count")
+        for count in step_counts:
+            steps = [
+                {'order_number': order, 'action': f'Action {order}', 'expected_result': f'Result {order}'}
+                for order in range(1, count + 1)
+            ]
+            payload = {
+                'title': 'Bench test case', 'description': 'Description', 'priority': 'High',
+                'type': 'Functional', 'status': 'Draft', 'suite': str(suite.id), 'steps': steps,
+            }
+
+            save_timings = []
+            for _ in range(requests):
+                with CaptureQueriesContext(connection) as save_queries:
+                    started = time.perf_counter()
+                    response = client.post('/save-test-case/', payload, format='json')
+                    save_timings.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 201:
+                    raise CommandError(f"Save returned {response.status_code}: {response.content[:200]}")
+            test_case = response.json()['test_case']
+
+            # Every step moves, the ids are kept
+            reordered = [
+                {'id': step['id'], 'order_number': count + 1 - step['order_number'],
+                 'action': step['action'], 'expected_result': step['expected_result']}
+                for step in test_case['steps']
+            ]
+            edit_timings = []
+            for _ in range(requests):
+                with CaptureQueriesContext(connection) as edit_queries:
+                    started = time.perf_counter()
+                    response = client.put(f"/test-cases/{test_case['id']}/edit/", {'steps': reordered}, format='json')
+                    edit_timings.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    raise CommandError(f"Edit returned {response.status_code}: {response.content[:200]}")
+                for step in reordered:
+                    step['order_number'] = count + 1 - step['order_number']
+
+            self.stdout.write(
+                f"  {count:>4} steps  save p50 {statistics.median(save_timings):7.1f} ms  "
+                f"p99 {percentile(save_timings, 0.99):7.1f} ms  {len(save_queries)} queries  |  "
+                f"reorder p50 {statistics.median(edit_timings):7.1f} ms  "
+                f"p99 {percentile(edit_timings, 0.99):7.1f} ms  {len(edit_queries)} queries"
+            )
@@ -0,0 +1,74 @@
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from csttapp.fast_serializers import FastSerializer
+from csttapp.models import Profile, Project, Team, TestCase, TestStep, TestSuite
+from csttapp.renderers import ORJSONRenderer
+from csttapp.serializers import TestCaseSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare TestCaseSerializer with its FastSerializer path on generated test cases, "
+        "from query to rendered JSON. The rows are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--steps', type=int, default=5, help="Steps per test case")
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['rows'], options['steps'], options['repeat'])
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def run(self, rows, steps, repeat):
+        user = User.objects.create_user('bench_serializers', 'bench_serializers@example.com')
+        profile = Profile.objects.create(auth_user=user, role='QA')
+        team = Team.objects.create(name='Bench', description='', created_by_profile=profile)
+        project = Project.objects.create(name='Bench', description='', status='Pending', team=team)
+        suite = TestSuite.objects.create(name='Bench', description='', project=project)
+        test_cases = TestCase.objects.bulk_create([
+            TestCase(
+                title=f'Test case {i}', description='Description ' * 10, priority='High', type='Functional',
+                status='Draft', suite=suite, created_by_profile=profile, metadata={'tags': ['a', 'b']},
+            )
+            for i in range(rows)
+        ], batch_size=1000)
+        TestStep.objects.bulk_create([
+            TestStep(test_case=test_case, order_number=order, action=f'Action {order}', expected_result='Result')
+            for test_case in test_cases
+            for order in range(1, steps + 1)
+        ], batch_size=5000)
+
+        queryset = TestCase.objects.filter(suite=suite).order_by('-created_at')
+        renderer = ORJSONRenderer()
+        fast_serializer = FastSerializer(TestCaseSerializer)
+        paths = {
+            'serializer': lambda: TestCaseSerializer(queryset.prefetch_related('steps'), many=True).data,
+            'fast': lambda: fast_serializer.serialize(queryset),
+        }
+
+        self.stdout.write(f"{rows} test cases, {steps} steps each, best of {repeat}")
+        baseline = None
+        for name, serialize in paths.items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                body = renderer.render(serialize())
+                timings.append(time.perf_counter() - started)
+            best = min(timings)
+            baseline = baseline or best
+            self.stdout.write(
+                f"{name:>10}  {best * 1000:8.1f} ms  {rows / best:9.0f} rows/s  "
+                f"{len(body)} bytes  {baseline / best:4.1f}x"
+            )
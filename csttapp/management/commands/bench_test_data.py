@@ -0,0 +1,44 @@
+import time
+from django.core.management.base import BaseCommand
+from csttapp.datagen import OUTPUT_FORMATS, TestDataGenerator
+
+# Mixed fields, all resolved locally
+FIELDS = [
+    {'name': 'id', 'type': 'uuid'},
+    {'name': 'full_name', 'type': 'string'},
+    {'name': 'email', 'type': 'string'},
+    {'name': 'age', 'type': 'number', 'constraints': 'between 18 and 65'},
+    {'name': 'status', 'type': 'string', 'constraints': 'one of: Active, Inactive, Pending'},
+    {'name': 'invoice', 'type': 'string', 'constraints': 'format INV-####'},
+    {'name': 'signup_date', 'type': 'date', 'constraints': 'in the past'},
+    {'name': 'balance', 'type': 'number', 'constraints': 'between 0 and 10000, 2 decimals'},
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure how fast test data is generated and serialized for each output format, "
+        "with eight mixed template fields and no LLM call."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=1000000, help="Records per format")
+        parser.add_argument('--formats', default='ndjson,csv', help=f"Comma separated, out of {', '.join(OUTPUT_FORMATS)}")
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        count = options['count']
+        self.stdout.write(f"{count} records, {len(FIELDS)} fields")
+        for output_format in options['formats'].split(','):
+            generator = TestDataGenerator(FIELDS, seed=options['seed'])
+            started = time.perf_counter()
+            if output_format == 'json':
+                size = len(generator.records(count))
+            else:
+                # Consumed as the response would stream it
+                size = sum(len(chunk) for chunk in generator.iter_output(count, output_format))
+            elapsed = time.perf_counter() - started
+            unit = 'records' if output_format == 'json' else 'bytes'
+            self.stdout.write(
+                f"{output_format:>6}  {elapsed:6.2f} s  {count / elapsed:9.0f} records/s  {size} {unit}"
+            )
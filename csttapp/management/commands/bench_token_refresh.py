@@ -0,0 +1,59 @@
+import statistics
+import time
+import uuid
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from csttapp.models import RevokedToken
+from csttapp.tokens import RefreshToken, TokenRefreshSerializer
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure token refresh latency as the blacklist grows. Fills RevokedToken with placeholder "
+        "rows up to each size, refreshes a token chain, and removes the rows again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='0,100000,1000000', help="Comma separated blacklist sizes")
+        parser.add_argument('--refreshes', type=int, default=500, help="Refreshes timed per size")
+        parser.add_argument('--user', help="Username the tokens are issued for, defaults to the first user")
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['user']).first() if options['user'] else User.objects.first()
+        if user is None:
+            raise CommandError("No user to issue tokens for")
+
+        # Real rows expire on a whole second, so the placeholders are told apart by their microseconds
+        expires_at = (timezone.now() + timedelta(days=1)).replace(microsecond=123456)
+        try:
+            filled = 0
+            for size in sorted(int(size) for size in options['sizes'].split(',')):
+                while filled < size:
+                    batch = min(10000, size - filled)
+                    RevokedToken.objects.bulk_create(
+                        RevokedToken(jti=uuid.uuid4(), expires_at=expires_at) for _ in range(batch)
+                    )
+                    filled += batch
+
+                refresh = str(RefreshToken.for_user(user))
+                timings = []
+                for _ in range(options['refreshes']):
+                    started = time.perf_counter()
+                    serializer = TokenRefreshSerializer(data={'refresh': refresh})
+                    serializer.is_valid(raise_exception=True)
+                    timings.append((time.perf_counter() - started) * 1000)
+                    refresh = serializer.validated_data['refresh']
+
+                self.stdout.write(
+                    f"{RevokedToken.objects.count():>9} revoked  p50 {percentile(timings, 0.5):6.2f} ms  "
+                    f"p99 {percentile(timings, 0.99):6.2f} ms  mean {statistics.fmean(timings):6.2f} ms"
+                )
+        finally:
+            RevokedToken.objects.filter(expires_at=expires_at).delete()
@@ -0,0 +1,94 @@
+import statistics
+import threading
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import DEFAULT_DB_ALIAS, connections
+from csttapp.models import TestCase
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Run request shaped database work from several threads and report latency percentiles. "
+        "Compare connection settings by running it with e.g. DB_POOL=false and DB_POOL=true."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help="Concurrent workers, keep it at or under the pool size")
+        parser.add_argument('--requests', type=int, default=500, help="Requests per thread")
+        parser.add_argument('--queries', type=int, default=3, help="Queries per request")
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        alias = options['database']
+        if connections[alias].vendor != 'postgresql':
+            raise CommandError(f"Database {alias} is not PostgreSQL")
+
+        samples = []
+        backends = set()
+        errors = []
+        lock = threading.Lock()
+
+        def worker():
+            connection = connections[alias]
+            timings = []
+            pids = set()
+            try:
+                for _ in range(options['requests']):
+                    # The same connection handling as a real request
+                    started = time.perf_counter()
+                    request_started.send(sender=self.__class__)
+                    connection.ensure_connection()
+                    connected = time.perf_counter()
+                    with connection.cursor() as cursor:
+                        cursor.execute("SELECT pg_backend_pid()")
+                        pids.add(cursor.fetchone()[0])
+                    for _ in range(options['queries'] - 1):
+                        list(
+                            TestCase.objects.using(alias)
+                            .filter(is_active=True)
+                            .order_by('-created_at')
+                            .values_list('id', 'title')[:20]
+                        )
+                    request_finished.send(sender=self.__class__)
+                    finished = time.perf_counter()
+                    timings.append((finished - started, connected - started))
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+            finally:
+                connection.close()
+                with lock:
+                    samples.extend(timings)
+                    backends.update(pids)
+
+        pool = connections[alias].settings_dict['OPTIONS'].get('pool')
+        self.stdout.write(
+            f"{options['threads']} threads x {options['requests']} requests x {options['queries']} queries, "
+            f"pool={'on' if pool else 'off'}, CONN_MAX_AGE={connections[alias].settings_dict['CONN_MAX_AGE']}"
+        )
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        if errors:
+            raise CommandError(f"{len(errors)} workers failed, first error: {errors[0]}")
+
+        for label, index in (('request', 0), ('connect', 1)):
+            values = [sample[index] * 1000 for sample in samples]
+            self.stdout.write(
+                f"{label:>8} ms  p50 {percentile(values, 0.5):7.2f}  p95 {percentile(values, 0.95):7.2f}  "
+                f"p99 {percentile(values, 0.99):7.2f}  max {max(values):7.2f}  mean {statistics.fmean(values):7.2f}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(samples) / elapsed:.0f} requests/s, {len(backends)} server connections used"
+        ))
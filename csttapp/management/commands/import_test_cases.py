@@ -0,0 +1,63 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from csttapp.models import TestSuite, TestCaseImport, Profile
+from csttapp.importers import IMPORT_FORMATS, ImportInProgress, TestCaseImporter, detect_format
+
+
+class Command(BaseCommand):
+    help = "Import test cases and steps into a suite from a CSV, JSON Lines or Excel file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('suite_id', nargs='?', help="Test suite to import into")
+        parser.add_argument('path', nargs='?', help="File to import")
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help="File format, detected from the extension by default")
+        parser.add_argument('--profile', help="Profile recorded as the creator of the imported test cases")
+        parser.add_argument('--resume', metavar='IMPORT_ID', help="Resume an interrupted import")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        if options['resume']:
+            try:
+                test_case_import = TestCaseImport.objects.get(id=options['resume'])
+            except (TestCaseImport.DoesNotExist, ValueError):
+                raise CommandError(f"Import {options['resume']} not found")
+            if test_case_import.status == 'Completed':
+                raise CommandError(f"Import {test_case_import.id} has already completed")
+        else:
+            if not options['suite_id'] or not options['path']:
+                raise CommandError("suite_id and path are required unless --resume is given")
+            try:
+                suite = TestSuite.objects.get(id=options['suite_id'], is_active=True)
+            except (TestSuite.DoesNotExist, ValueError):
+                raise CommandError(f"Test suite {options['suite_id']} not found")
+
+            format_type = options['format'] or detect_format(options['path'])
+            if format_type not in IMPORT_FORMATS:
+                raise CommandError(f"Unsupported file format, expected one of {IMPORT_FORMATS}")
+
+            profile = None
+            if options['profile']:
+                profile = Profile.objects.filter(id=options['profile']).first()
+                if profile is None:
+                    raise CommandError(f"Profile {options['profile']} not found")
+
+            test_case_import = TestCaseImport.objects.create(
+                suite=suite,
+                created_by_profile=profile,
+                source_path=os.path.abspath(options['path']),
+                format_type=format_type
+            )
+
+        self.stdout.write(f"Importing {test_case_import.source_path} (import {test_case_import.id})")
+        try:
+            test_case_import = TestCaseImporter(test_case_import, batch_size=options['batch_size']).run()
+        except ImportInProgress as e:
+            raise CommandError(str(e))
+        except Exception as e:
+            raise CommandError(f"Import failed, resume it with --resume {test_case_import.id}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {test_case_import.records_processed} records: "
+            f"{test_case_import.cases_created} test cases, {test_case_import.steps_created} steps, "
+            f"{len(test_case_import.errors)} errors"
+        ))
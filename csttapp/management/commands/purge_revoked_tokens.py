@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from csttapp.models import RevokedToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete blacklisted refresh tokens that have expired. Run it periodically, e.g. hourly from cron; "
+        "expired tokens are rejected anyway, so their rows are dead weight."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        deleted = RevokedToken.purge_expired(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired tokens"))
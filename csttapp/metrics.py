@@ -0,0 +1,251 @@
+import contextlib
+import contextvars
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# Upper bounds of the latency histograms, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# name -> (type, help)
+METRICS = {
+    'cstt_requests_total': ('counter', 'Requests handled, by URL name, method and status'),
+    'cstt_request_duration_seconds': ('histogram', 'Request wall time, by URL name and method'),
+    'cstt_db_queries_total': ('counter', 'Database queries run, by URL name'),
+    'cstt_db_duration_seconds_total': ('counter', 'Time spent in database queries, by URL name'),
+    'cstt_llm_calls_total': ('counter', 'LLM calls made, by URL name, model and outcome'),
+    'cstt_llm_duration_seconds': ('histogram', 'LLM call latency, by URL name and model'),
+    'cstt_llm_tokens_total': ('counter', 'LLM tokens used, by URL name, model and kind'),
+    'cstt_serialize_duration_seconds_total': ('counter', 'Time spent serializing and rendering responses, by URL name'),
+}
+
+_current = contextvars.ContextVar('cstt_request_metrics', default=None)
+
+
+def is_enabled():
+    return getattr(settings, 'PERFORMANCE_METRICS', {}).get('ENABLED', False)
+
+
+class RequestMetrics:
+    """Timings collected over a single request"""
+    __slots__ = ('started', 'db_queries', 'db_time', 'serialize_time', 'llm_calls')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        # (model, seconds, prompt tokens, completion tokens, ok)
+        self.llm_calls = []
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def llm_time(self):
+        return sum(call[1] for call in self.llm_calls)
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Make these the current request's metrics, see time_queries()"""
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    def server_timing(self):
+        """Server-Timing header value, durations in milliseconds"""
+        entries = [
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.db_queries} queries"',
+            f'serialize;dur={self.serialize_time * 1000:.1f}',
+        ]
+        if self.llm_calls:
+            entries.append(f'llm;dur={self.llm_time * 1000:.1f};desc="{len(self.llm_calls)} calls"')
+        entries.append(f'total;dur={self.elapsed * 1000:.1f}')
+        return ', '.join(entries)
+
+
+def query_timer(execute, sql, params, many, context):
+    """Database execute wrapper, times the query against the current request's metrics"""
+    request_metrics = _current.get()
+    if request_metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        request_metrics.db_time += time.perf_counter() - started
+        request_metrics.db_queries += 1
+
+
+def install_query_timer(connection, **kwargs):
+    if query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_timer)
+
+
+def time_queries():
+    """
+    Time queries on every database connection from now on. Connections are
+    per thread and the async ORM runs queries on a worker thread, so the
+    timer is installed as connections open and finds the request through
+    the context, which sync_to_async carries over.
+    """
+    connection_created.connect(install_query_timer, dispatch_uid='cstt_query_timer')
+    for connection in connections.all(initialized_only=True):
+        install_query_timer(connection)
+
+
+class Registry:
+    """
+    In-process counters and histograms in the Prometheus text format. Every
+    worker process keeps its own, so scrape each of them.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, labels, value=1):
+        key = (name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        key = (name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            # Bucket counts, then +Inf, sum
+            histogram = self.histograms[key] = [0] * (len(DURATION_BUCKETS) + 1) + [0.0]
+        for index, bound in enumerate(DURATION_BUCKETS):
+            if value <= bound:
+                histogram[index] += 1
+                break
+        else:
+            histogram[len(DURATION_BUCKETS)] += 1
+        histogram[-1] += value
+
+    def record(self, request_metrics, view, method, status_code):
+        view_labels = (('view', view),)
+        with self.lock:
+            self.inc('cstt_requests_total', view_labels + (('method', method), ('status', str(status_code))))
+            self.observe('cstt_request_duration_seconds', view_labels + (('method', method),), request_metrics.elapsed)
+            self.inc('cstt_db_queries_total', view_labels, request_metrics.db_queries)
+            self.inc('cstt_db_duration_seconds_total', view_labels, request_metrics.db_time)
+            self.inc('cstt_serialize_duration_seconds_total', view_labels, request_metrics.serialize_time)
+            for model, seconds, prompt_tokens, completion_tokens, ok in request_metrics.llm_calls:
+                model_labels = view_labels + (('model', model or 'unknown'),)
+                self.inc('cstt_llm_calls_total', model_labels + (('outcome', 'ok' if ok else 'error'),))
+                self.observe('cstt_llm_duration_seconds', model_labels, seconds)
+                if prompt_tokens:
+                    self.inc('cstt_llm_tokens_total', model_labels + (('kind', 'prompt'),), prompt_tokens)
+                if completion_tokens:
+                    self.inc('cstt_llm_tokens_total', model_labels + (('kind', 'completion'),), completion_tokens)
+
+    def render(self):
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, list(value)) for key, value in self.histograms.items())
+
+        samples = {name: [] for name in METRICS}
+        for (name, labels), value in counters:
+            samples[name].append(f'{name}{format_labels(labels)} {format_value(value)}')
+        for (name, labels), histogram in histograms:
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS + ('+Inf',), histogram):
+                cumulative += count
+                samples[name].append(f'{name}_bucket{format_labels(labels + (("le", str(bound)),))} {cumulative}')
+            samples[name].append(f'{name}_sum{format_labels(labels)} {format_value(histogram[-1])}')
+            samples[name].append(f'{name}_count{format_labels(labels)} {cumulative}')
+
+        lines = []
+        for name, (metric_type, help_text) in METRICS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            lines.extend(samples[name])
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (key, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def format_value(value):
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+registry = Registry()
+
+
+def current():
+    """Metrics of the request being handled, None when instrumentation is off"""
+    return _current.get()
+
+
+@contextlib.contextmanager
+def serializing():
+    """Count the time spent in the block as serialization time"""
+    request_metrics = _current.get()
+    if request_metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        request_metrics.serialize_time += time.perf_counter() - started
+
+
+def record_llm_call(request_metrics, model, started, response=None):
+    usage = getattr(response, 'usage', None)
+    request_metrics.llm_calls.append((
+        model,
+        time.perf_counter() - started,
+        getattr(usage, 'prompt_tokens', 0) or 0,
+        getattr(usage, 'completion_tokens', 0) or 0,
+        response is not None
+    ))
+
+
+def chat_completion(client, **kwargs):
+    """
+    client.chat.completions.create() with its latency and token usage
+    recorded against the current request
+    """
+    request_metrics = _current.get()
+    if request_metrics is None:
+        return client.chat.completions.create(**kwargs)
+
+    started = time.perf_counter()
+    try:
+        response = client.chat.completions.create(**kwargs)
+    except Exception:
+        record_llm_call(request_metrics, kwargs.get('model'), started)
+        raise
+    record_llm_call(request_metrics, kwargs.get('model'), started, response)
+    return response
+
+
+async def achat_completion(client, **kwargs):
+    """chat_completion() for an AsyncOpenAI client"""
+    request_metrics = _current.get()
+    if request_metrics is None:
+        return await client.chat.completions.create(**kwargs)
+
+    started = time.perf_counter()
+    try:
+        response = await client.chat.completions.create(**kwargs)
+    except Exception:
+        record_llm_call(request_metrics, kwargs.get('model'), started)
+        raise
+    record_llm_call(request_metrics, kwargs.get('model'), started, response)
+    return response
@@ -0,0 +1,152 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import metrics
+from .routers import RoutingState, get_replicas, pin_to_primary
+
+
+class ContextMiddleware:
+    """
+    Base for middleware that keeps some per request state active while the
+    response is produced, including while a streamed body is sent. Works in
+    sync and async handler chains, so async views are not pushed through a
+    thread by this middleware.
+
+    Subclasses set `state_class`, whose instances have an `activate()`
+    context manager; one is created per request.
+    """
+    sync_capable = True
+    async_capable = True
+    state_class = None
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = self.start(request)
+        with state.activate():
+            response = self.get_response(request)
+        return self.finish(request, response, state)
+
+    async def __acall__(self, request):
+        state = self.start(request)
+        with state.activate():
+            response = await self.get_response(request)
+        return self.finish(request, response, state)
+
+    def start(self, request):
+        return self.state_class()
+
+    def finish(self, request, response, state):
+        if response.streaming:
+            stream = self.astream if response.is_async else self.stream
+            response.streaming_content = stream(request, response, state, response.streaming_content)
+        else:
+            self.done(request, response, state)
+        return response
+
+    def done(self, request, response, state):
+        """Called once the response, streamed or not, is complete"""
+
+    def stream(self, request, response, state, content):
+        chunks = iter(content)
+        try:
+            while True:
+                with state.activate():
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            self.done(request, response, state)
+
+    async def astream(self, request, response, state, content):
+        chunks = aiter(content)
+        try:
+            while True:
+                with state.activate():
+                    chunk = await anext(chunks, None)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            self.done(request, response, state)
+
+
+class PerformanceMiddleware(ContextMiddleware):
+    """
+    Records per request wall time, database queries, LLM calls and
+    serialization time, keyed by URL name. The totals go to the in-process
+    metrics registry, served at `metrics/`, and the breakdown is sent back in
+    a Server-Timing header.
+
+    Put it first in MIDDLEWARE so the other middleware is timed too. When
+    PERFORMANCE_METRICS['ENABLED'] is off the middleware unloads itself at
+    startup and costs nothing.
+    """
+    state_class = metrics.RequestMetrics
+
+    def __init__(self, get_response):
+        if not metrics.is_enabled():
+            raise MiddlewareNotUsed()
+        super().__init__(get_response)
+        self.server_timing = settings.PERFORMANCE_METRICS.get('SERVER_TIMING', True)
+        metrics.time_queries()
+
+    def finish(self, request, response, state):
+        # Streamed bodies are only timed up to the headers here, the
+        # registry gets the whole stream
+        if self.server_timing:
+            response['Server-Timing'] = state.server_timing()
+        return super().finish(request, response, state)
+
+    def done(self, request, response, state):
+        metrics.registry.record(state, self.get_view_name(request), request.method, response.status_code)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns, time the rendering
+        request_metrics = metrics.current()
+        if request_metrics is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                request_metrics.serialize_time += time.perf_counter() - started
+            response.add_post_render_callback(rendered)
+        return response
+
+    @staticmethod
+    def get_view_name(request):
+        resolver_match = getattr(request, 'resolver_match', None)
+        if resolver_match is None:
+            return 'unmatched'
+        return resolver_match.url_name or resolver_match.view_name or 'unnamed'
+
+
+class ReplicaRoutingMiddleware(ContextMiddleware):
+    """
+    Holds the read replica routing state of each request. When a request
+    writes, its user is pinned to the primary for REPLICA_STICKY_SECONDS so
+    their next reads see the write. Unloads itself when no replica is
+    configured.
+    """
+    state_class = RoutingState
+
+    def __init__(self, get_response):
+        if not get_replicas():
+            raise MiddlewareNotUsed()
+        super().__init__(get_response)
+
+    def finish(self, request, response, state):
+        if state.wrote:
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                pin_to_primary(user.pk)
+        return super().finish(request, response, state)
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.15 on 2026-10-19 06:43
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('csttapp', '0004_testcase_generation_query_testcase_input_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestCaseImport',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('source_path', models.CharField(max_length=500)),
+                ('format_type', models.CharField(max_length=20)),
+                ('status', models.CharField(db_index=True, default='Pending', max_length=20)),
+                ('records_processed', models.IntegerField(default=0)),
+                ('cases_created', models.IntegerField(default=0)),
+                ('steps_created', models.IntegerField(default=0)),
+                ('errors', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by_profile', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='csttapp.profile')),
+                ('suite', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='imports', to='csttapp.testsuite')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['suite', 'status'], name='csttapp_tes_suite_i_6a2d2f_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.15 on 2026-10-19 06:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('csttapp', '0005_testcaseimport'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='testdata',
+            index=models.Index(fields=['created_by_profile', 'is_active', '-created_at', 'id'], name='csttapp_tes_created_69cf4f_idx'),
+        ),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 5.1.15 on 2026-10-19 06:58
+
+import django.db.models.deletion
+import hashlib
+import json
+import uuid
+from django.db import migrations, models
+
+
+def content_hash(content):
+    # Same canonical form as datastore.content_hash
+    canonical = json.dumps(content, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def move_templates(apps, schema_editor):
+    """Point every TestData at a shared template row, one per distinct body"""
+    TestData = apps.get_model('csttapp', 'TestData')
+    TestDataTemplate = apps.get_model('csttapp', 'TestDataTemplate')
+    db_alias = schema_editor.connection.alias
+
+    templates = {}
+    for test_data in TestData.objects.using(db_alias).only('id', 'data_template').iterator(chunk_size=1000):
+        key = content_hash(test_data.data_template)
+        if key not in templates:
+            templates[key] = TestDataTemplate.objects.using(db_alias).create(content_hash=key, content=test_data.data_template)
+        template = templates[key]
+        template.ref_count += 1
+        TestData.objects.using(db_alias).filter(id=test_data.id).update(template=template)
+
+    for template in templates.values():
+        TestDataTemplate.objects.using(db_alias).filter(id=template.id).update(ref_count=template.ref_count)
+
+
+def restore_templates(apps, schema_editor):
+    TestData = apps.get_model('csttapp', 'TestData')
+    db_alias = schema_editor.connection.alias
+    for test_data in TestData.objects.using(db_alias).select_related('template').iterator(chunk_size=1000):
+        TestData.objects.using(db_alias).filter(id=test_data.id).update(
+            data_template=test_data.template.content if test_data.template else {}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('csttapp', '0006_testdata_list_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeneratedDataset',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('content_hash', models.CharField(max_length=64, unique=True)),
+                ('seed', models.BigIntegerField(blank=True, null=True)),
+                ('record_count', models.PositiveIntegerField(default=0)),
+                ('size_bytes', models.PositiveBigIntegerField(default=0)),
+                ('stored_bytes', models.PositiveBigIntegerField(default=0)),
+                ('records', models.JSONField(blank=True, null=True)),
+                ('storage_path', models.CharField(blank=True, max_length=255)),
+                ('block_records', models.PositiveIntegerField(default=0)),
+                ('block_offsets', models.JSONField(default=list)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TestDataTemplate',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('content_hash', models.CharField(max_length=64, unique=True)),
+                ('content', models.JSONField()),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='testdata',
+            name='datasets',
+            field=models.ManyToManyField(blank=True, related_name='test_data', to='csttapp.generateddataset'),
+        ),
+        migrations.AddField(
+            model_name='generateddataset',
+            name='template',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='datasets', to='csttapp.testdatatemplate'),
+        ),
+        migrations.AddField(
+            model_name='testdata',
+            name='template',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='test_data', to='csttapp.testdatatemplate'),
+        ),
+        # A default lets the column be added back when migrating backwards
+        migrations.AlterField(
+            model_name='testdata',
+            name='data_template',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.RunPython(move_templates, restore_templates),
+        migrations.RemoveField(
+            model_name='testdata',
+            name='data_template',
+        ),
+    ]
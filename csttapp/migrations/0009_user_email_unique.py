@@ -0,0 +1,87 @@
+import uuid
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, F, Q
+from django.db.models.functions import Upper
+
+# auth.User belongs to Django, so the constraint lives in the database only
+# and isn't part of the model state. Queries use it through
+# csttapp.authentication.users_by_email, which repeats its condition.
+EMAIL_CONSTRAINT = models.UniqueConstraint(
+    Upper('email'),
+    name='auth_user_email_upper_uniq',
+    condition=~Q(email=''),
+)
+
+
+def deduplicate_emails(apps, schema_editor):
+    """
+    Keep one account per email, ignoring case: the most recently logged in,
+    else the oldest. The others can't be logged into by email anymore, so
+    they're deactivated and their email is cleared, keeping their data. The
+    cleared emails are recorded in ClearedEmail.
+    """
+    User = apps.get_model('auth', 'User')
+    ClearedEmail = apps.get_model('csttapp', 'ClearedEmail')
+    db_alias = schema_editor.connection.alias
+    users = User.objects.using(db_alias)
+    duplicated = (
+        users.exclude(email='')
+        .values(key=Upper('email'))
+        .annotate(count=Count('id'))
+        .filter(count__gt=1)
+        .values_list('key', flat=True)
+    )
+    for key in duplicated:
+        kept, *cleared = (
+            users.annotate(key=Upper('email')).filter(key=key)
+            .order_by(F('last_login').desc(nulls_last=True), 'id')
+        )
+        ClearedEmail.objects.using(db_alias).bulk_create(
+            ClearedEmail(user=user, kept_by=kept, email=user.email, was_active=user.is_active)
+            for user in cleared
+        )
+        users.filter(id__in=[user.id for user in cleared]).update(email='', is_active=False)
+
+
+def restore_emails(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    ClearedEmail = apps.get_model('csttapp', 'ClearedEmail')
+    db_alias = schema_editor.connection.alias
+    for cleared in ClearedEmail.objects.using(db_alias).all():
+        User.objects.using(db_alias).filter(id=cleared.user_id).update(email=cleared.email, is_active=cleared.was_active)
+
+
+def add_constraint(apps, schema_editor):
+    schema_editor.add_constraint(apps.get_model('auth', 'User'), EMAIL_CONSTRAINT)
+
+
+def remove_constraint(apps, schema_editor):
+    schema_editor.remove_constraint(apps.get_model('auth', 'User'), EMAIL_CONSTRAINT)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('csttapp', '0008_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClearedEmail',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('email', models.EmailField(max_length=254)),
+                ('was_active', models.BooleanField()),
+                ('cleared_at', models.DateTimeField(auto_now_add=True)),
+                ('kept_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='cleared_email', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(deduplicate_emails, restore_emails),
+        migrations.RunPython(add_constraint, remove_constraint),
+    ]
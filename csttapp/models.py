@@ -1,10 +1,16 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+import copy
+import json
+import logging
+from django.core.cache import cache
 from django.contrib.auth.models import User
 import uuid
-from django.db.models import Count, Avg, F
+from django.db.models import Count, Avg, F, Q
 from django.db.models.functions import TruncDate
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+logger = logging.getLogger(__name__)
 
 class Profile(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -122,6 +128,25 @@ class TestStep(models.Model):
         ]
         ordering = ['order_number']
 
+class TestCaseImport(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    suite = models.ForeignKey(TestSuite, on_delete=models.CASCADE, related_name='imports', db_index=True)
+    created_by_profile = models.ForeignKey(Profile, on_delete=models.SET_NULL, null=True, db_index=True)
+    source_path = models.CharField(max_length=500)
+    format_type = models.CharField(max_length=20)
+    status = models.CharField(max_length=20, default='Pending', db_index=True)
+    records_processed = models.IntegerField(default=0)  # Resume point, counts skipped records too
+    cases_created = models.IntegerField(default=0)
+    steps_created = models.IntegerField(default=0)
+    errors = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['suite', 'status']),  # Imports per suite
+        ]
+
 class TestExecution(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     test_case = models.ForeignKey(TestCase, on_delete=models.CASCADE, related_name='executions', db_index=True)
@@ -155,11 +180,43 @@ class StepResult(models.Model):
             models.Index(fields=['test_step', 'status']),  # Step performance analysis
         ]
 
+class TestDataTemplate(models.Model):
+    """
+    Template body stored once per distinct content and shared by every
+    TestData that saves it. See datastore.TemplateStore.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    content_hash = models.CharField(max_length=64, unique=True)  # sha256 of the canonical JSON
+    content = models.JSONField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+class GeneratedDataset(models.Model):
+    """
+    Generated records, stored once per distinct content. Small datasets are
+    kept inline, larger ones as independently compressed NDJSON blocks under
+    MEDIA_ROOT so any range can be read back. See datastore.DatasetStore.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    content_hash = models.CharField(max_length=64, unique=True)  # sha256 of the NDJSON body
+    template = models.ForeignKey(TestDataTemplate, on_delete=models.SET_NULL, null=True, blank=True, related_name='datasets')
+    seed = models.BigIntegerField(null=True, blank=True)
+    record_count = models.PositiveIntegerField(default=0)
+    size_bytes = models.PositiveBigIntegerField(default=0)
+    stored_bytes = models.PositiveBigIntegerField(default=0)
+    records = models.JSONField(null=True, blank=True)  # Inline datasets only
+    storage_path = models.CharField(max_length=255, blank=True)  # Relative to MEDIA_ROOT
+    block_records = models.PositiveIntegerField(default=0)
+    block_offsets = models.JSONField(default=list)  # Byte offset of each block, plus the end of file
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
 class TestData(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=100, db_index=True)
     description = models.TextField()
-    data_template = models.JSONField()
+    template = models.ForeignKey(TestDataTemplate, on_delete=models.PROTECT, null=True, related_name='test_data')
+    datasets = models.ManyToManyField(GeneratedDataset, related_name='test_data', blank=True)
     format_type = models.CharField(max_length=50, db_index=True)
     created_by_profile = models.ForeignKey(Profile, on_delete=models.SET_NULL, null=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
@@ -167,10 +224,15 @@ class TestData(models.Model):
     is_active = models.BooleanField(default=True)
     test_cases = models.ManyToManyField(TestCase, related_name='test_data')
 
+    @property
+    def data_template(self):
+        return self.template.content if self.template_id else None
+
     class Meta:
         indexes = [
             models.Index(fields=['format_type', 'is_active']),  # Active data by format
             models.Index(fields=['name', 'format_type']),  # Data lookup by name and format
+            models.Index(fields=['created_by_profile', 'is_active', '-created_at', 'id']),  # Per-user list, newest first
         ]
 
 class Defect(models.Model):
@@ -204,12 +266,72 @@ class DefectHistory(models.Model):
     changed_by_profile = models.ForeignKey(Profile, on_delete=models.SET_NULL, null=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
+    # Defect columns whose changes are recorded, metadata is diffed per key
+    TRACKED_FIELDS = ['title', 'description', 'status', 'priority', 'severity', 'assigned_to_profile_id', 'metadata']
+
     class Meta:
         indexes = [
             models.Index(fields=['defect', 'field_name']),  # Field change history
             models.Index(fields=['defect', 'created_at']),  # Timeline of changes
         ]
 
+    @staticmethod
+    def format_value(value):
+        if value is None:
+            return ''
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, sort_keys=True)
+        return str(value)
+
+    @classmethod
+    def snapshot(cls, defect, fields=None):
+        """
+        Capture the tracked values of a defect before it is modified
+        """
+        values = {field: getattr(defect, field) for field in fields or cls.TRACKED_FIELDS}
+        if 'metadata' in values:
+            values['metadata'] = copy.deepcopy(values['metadata'] or {})
+        return values
+
+    @classmethod
+    def build_changes(cls, defect, before, changed_by_profile_id):
+        """
+        Diff a snapshot against the defect's current values and return one
+        unsaved history row per changed field (metadata keys included)
+        """
+        after = cls.snapshot(defect, list(before))
+        changes = []
+        for field in before:
+            if field == 'metadata':
+                for key in sorted(before['metadata'].keys() | after['metadata'].keys()):
+                    old_value = before['metadata'].get(key)
+                    new_value = after['metadata'].get(key)
+                    if old_value != new_value:
+                        changes.append((f"metadata.{key}", old_value, new_value))
+            elif before[field] != after[field]:
+                changes.append((field.removesuffix('_id'), before[field], after[field]))
+
+        return [
+            cls(
+                defect=defect,
+                field_name=field_name,
+                old_value=cls.format_value(old_value),
+                new_value=cls.format_value(new_value),
+                changed_by_profile_id=changed_by_profile_id,
+            )
+            for field_name, old_value, new_value in changes
+        ]
+
+    @classmethod
+    def record_changes(cls, defect, before, changed_by_profile_id):
+        """
+        Write the history rows for a defect update in a single INSERT
+        """
+        history = cls.build_changes(defect, before, changed_by_profile_id)
+        if history:
+            cls.objects.bulk_create(history)
+        return history
+
 class DefectLink(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     defect = models.ForeignKey(Defect, on_delete=models.CASCADE, related_name='test_case_links', db_index=True)
@@ -268,6 +390,92 @@ class AnalyticsMetric(models.Model):
             models.Index(fields=['metric_name', 'metric_value'])
         ]
 
+class RevokedToken(models.Model):
+    """
+    Refresh tokens that can't be used anymore, by jti. Only revoked tokens
+    are stored, one narrow row each, and only until they would have expired
+    anyway, so a check is a primary key lookup whatever the table's size.
+    """
+    jti = models.UUIDField(primary_key=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    @classmethod
+    def is_revoked(cls, jti):
+        return cls.objects.filter(jti=jti).exists()
+
+    @classmethod
+    def revoke(cls, jti, exp):
+        """
+        Revoke the token with the given jti and `exp` claim. Returns False
+        when it was revoked already, e.g. by a concurrent refresh.
+        """
+        try:
+            with transaction.atomic():
+                cls.objects.create(jti=jti, expires_at=datetime.fromtimestamp(exp, tz=dt_timezone.utc))
+        except IntegrityError:
+            return False
+        return True
+
+    @classmethod
+    def purge_expired(cls, batch_size=10000):
+        """
+        Delete the rows of expired tokens, in batches so locks stay short
+        """
+        now = timezone.now()
+        deleted = 0
+        while True:
+            batch = list(cls.objects.filter(expires_at__lt=now).values_list('jti', flat=True)[:batch_size])
+            if not batch:
+                return deleted
+            deleted += cls.objects.filter(jti__in=batch).delete()[0]
+
+class ClearedEmail(models.Model):
+    """
+    Emails cleared when addresses were made unique ignoring case (migration
+    0009): the account that lost the address, the account that kept it, and
+    whether the loser was active, so an admin can contact or merge them.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='cleared_email')
+    kept_by = models.ForeignKey(User, null=True, on_delete=models.SET_NULL, related_name='+')
+    email = models.EmailField()
+    was_active = models.BooleanField()
+    cleared_at = models.DateTimeField(auto_now_add=True)
+
+class TeamRosterService:
+    CACHE_TIMEOUT = 300
+
+    @classmethod
+    def cache_key(cls, team_id):
+        return f"team_roster:{team_id}"
+
+    @classmethod
+    def get_roster(cls, team_id):
+        """
+        Active members of a team for assignment dropdowns, cached per team
+        """
+        key = cls.cache_key(team_id)
+        roster = cache.get(key)
+        if roster is None:
+            team_members = TeamMember.objects.filter(
+                team_id=team_id,
+                is_active=True
+            ).select_related('profile__auth_user')
+            roster = [
+                {
+                    'id': str(tm.profile.id),
+                    'name': tm.profile.auth_user.get_full_name() or tm.profile.auth_user.email,
+                    'email': tm.profile.auth_user.email
+                }
+                for tm in team_members
+            ]
+            cache.set(key, roster, cls.CACHE_TIMEOUT)
+        return roster
+
+    @classmethod
+    def invalidate(cls, team_id):
+        cache.delete(cls.cache_key(team_id))
+
 class AnalyticsService:
     @classmethod
     def get_test_execution_metrics(cls, project_id):
@@ -302,8 +510,8 @@ class AnalyticsService:
                 'skipped_executions': skipped_executions,
                 'test_coverage': round(test_coverage, 2)
             }
-        except Exception as e:
-            print(f"Error in test execution metrics: {e}")
+        except Exception:
+            logger.exception("Error in test execution metrics")
             return {
                 'total_test_cases': 0,
                 'total_executions': 0,
@@ -353,8 +561,8 @@ class AnalyticsService:
                 'defect_distribution': full_distribution,
                 'avg_resolution_time': avg_resolution_time
             }
-        except Exception as e:
-            print(f"Error in defect metrics: {e}")
+        except Exception:
+            logger.exception("Error in defect metrics")
             return {
                 'total_defects': 0,
                 'open_defects': 0,
@@ -412,6 +620,6 @@ class AnalyticsService:
             ]
             
             return full_trend
-        except Exception as e:
-            print(f"Error in test execution trend: {e}")
+        except Exception:
+            logger.exception("Error in test execution trend")
             return []
\ No newline at end of file
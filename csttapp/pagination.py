@@ -0,0 +1,100 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over a fixed, unique ordering.
+
+    Each page is fetched with a WHERE clause on the last row of the previous
+    page instead of an OFFSET, so page N costs the same as page 1.
+    """
+    ordering = ('-created_at', 'id')
+    page_size = 50
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_ordering_fields(self):
+        return [field.lstrip('-') for field in self.ordering]
+
+    def encode_cursor(self, obj):
+        values = [str(getattr(obj, field)) for field in self.get_ordering_fields()]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, cursor, model):
+        """
+        Values of the ordering fields in a cursor, parsed as the model's
+        fields (datetimes, UUIDs), so a tampered cursor is a 400 rather than
+        a database error
+        """
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        except (ValueError, UnicodeDecodeError):
+            raise ValidationError({'cursor': 'Invalid cursor.'})
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise ValidationError({'cursor': 'Invalid cursor.'})
+        try:
+            values = [
+                model._meta.get_field(name).to_python(value)
+                for name, value in zip(self.get_ordering_fields(), values)
+            ]
+        except (DjangoValidationError, TypeError, ValueError):
+            raise ValidationError({'cursor': 'Invalid cursor.'})
+        if any(value is None for value in values):
+            raise ValidationError({'cursor': 'Invalid cursor.'})
+        return values
+
+    def get_seek_filter(self, values):
+        # (a, b) after (x, y)  <=>  a after x OR (a = x AND b after y)
+        seek = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            seek |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return seek
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.get_seek_filter(self.decode_cursor(cursor, queryset.model)))
+
+        # Fetch one extra row to know whether another page exists
+        page = list(queryset[:self.page_size_value + 1])
+        self.has_next = len(page) > self.page_size_value
+        page = page[:self.page_size_value]
+        self.next_cursor = self.encode_cursor(page[-1]) if self.has_next else None
+        return page
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        params = self.request.query_params.copy()
+        params[self.cursor_query_param] = self.next_cursor
+        return f"{self.request.build_absolute_uri(self.request.path)}?{params.urlencode()}"
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'next_cursor': self.next_cursor,
+            'results': data,
+        })
@@ -0,0 +1,94 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class HashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _("Too many sign-ins in progress, try again shortly.")
+    default_code = 'hashing_busy'
+    # Sent as Retry-After
+    wait = 1
+
+
+class HashingPool:
+    """
+    Worker processes for password hashing, so the CPU bound hashing of a
+    login spike can't take more than PASSWORD_HASHING_WORKERS cores from
+    the rest of the API. At most PASSWORD_HASHING_QUEUE hashes are in flight
+    per process; past that callers get HashingBusy rather than a slot in an
+    ever longer queue.
+    """
+    def __init__(self, workers, queue):
+        self.workers = workers
+        self.slots = threading.BoundedSemaphore(max(queue, 1))
+        self.lock = threading.Lock()
+        self.executor = None
+        self.pid = None
+
+    def get_executor(self):
+        # A pool started before the server forked belongs to the parent
+        if self.executor is None or self.pid != os.getpid():
+            with self.lock:
+                if self.executor is None or self.pid != os.getpid():
+                    # Spawned, not forked, so workers don't inherit the
+                    # server's threads and connections. They only load settings.
+                    self.executor = ProcessPoolExecutor(self.workers, multiprocessing.get_context('spawn'))
+                    self.pid = os.getpid()
+        return self.executor
+
+    def run(self, function, *args):
+        if not self.slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            if not self.workers:
+                return function(*args)
+            return self.get_executor().submit(function, *args).result()
+        finally:
+            self.slots.release()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HashingPool(
+                    getattr(settings, 'PASSWORD_HASHING_WORKERS', 0),
+                    getattr(settings, 'PASSWORD_HASHING_QUEUE', 16),
+                )
+    return _pool
+
+
+def make_password(password):
+    return get_pool().run(hashers.make_password, password)
+
+
+def check_password(user, password):
+    """
+    user.check_password() with the hashing done by the pool. A correct
+    password stored with an outdated hasher or work factor is rehashed.
+    """
+    is_correct, must_update = get_pool().run(hashers.verify_password, password, user.password)
+    if is_correct and must_update:
+        # Not a password change, so user._password stays unset
+        user.password = make_password(password)
+        user.save(update_fields=['password'])
+    return is_correct
+
+
+def set_password(user, password):
+    """user.set_password() with the hashing done by the pool"""
+    user.password = make_password(password)
+    user._password = password
@@ -0,0 +1,291 @@
+import asyncio
+import logging
+import math
+import threading
+import time
+from contextlib import asynccontextmanager
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed, Throttled
+
+from .authentication import JWTAuthentication
+
+logger = logging.getLogger(__name__)
+
+# In flight counts left behind by a crashed worker expire after this long
+# without requests, in seconds
+CONCURRENCY_TTL = 300
+# How long a bucket update waits for another process's update
+LOCK_TTL = 1
+LOCK_WAIT = 0.2
+# How often a cache outage is logged, in seconds
+OUTAGE_LOG_INTERVAL = 60
+
+
+class QuotaExceeded(Throttled):
+    default_detail = _("Too many AI requests.")
+    default_code = 'quota_exceeded'
+
+
+class StoreBusy(Exception):
+    pass
+
+
+def take_tokens(state, now, rate, burst, cost=1, max_wait=0.0):
+    """
+    One token bucket step: `rate` tokens a second, up to `burst`. Tokens may
+    be borrowed from the next `max_wait` seconds, the caller then waits for
+    them. Returns the new state and (granted, seconds), seconds being the
+    wait when granted and the retry delay when not.
+    """
+    tokens, updated = state if state is not None else (burst, now)
+    tokens = min(burst, tokens + max(now - updated, 0) * rate)
+    wait = max(cost - tokens, 0) / rate
+    if wait > max_wait:
+        return (tokens, now), (False, wait - max_wait)
+    return (tokens - cost, now), (True, wait)
+
+
+def give_back_tokens(state, now, rate, burst, cost=1):
+    tokens, updated = state if state is not None else (burst, now)
+    return (min(burst, tokens + max(now - updated, 0) * rate + cost), now), None
+
+
+class LocalStore:
+    """Quota state of this process only, used when the cache is unavailable"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = {}
+        self.counts = {}
+
+    def update(self, key, function, timeout):
+        with self.lock:
+            self.buckets[key], result = function(self.buckets.get(key))
+            return result
+
+    def acquire(self, key, limit):
+        with self.lock:
+            count = self.counts.get(key, 0)
+            if count >= limit:
+                return False
+            self.counts[key] = count + 1
+            return True
+
+    def release(self, key):
+        with self.lock:
+            count = self.counts.pop(key, 0) - 1
+            if count > 0:
+                self.counts[key] = count
+
+
+class CacheStore:
+    """Quota state in the default cache, shared by every process using it"""
+    def update(self, key, function, timeout):
+        lock_key = f'{key}:lock'
+        deadline = time.monotonic() + LOCK_WAIT
+        while not cache.add(lock_key, 1, LOCK_TTL):
+            if time.monotonic() > deadline:
+                raise StoreBusy(key)
+            time.sleep(0.002)
+        try:
+            state, result = function(cache.get(key))
+            cache.set(key, state, timeout)
+            return result
+        finally:
+            cache.delete(lock_key)
+
+    def acquire(self, key, limit):
+        cache.add(key, 0, CONCURRENCY_TTL)
+        count = cache.incr(key)
+        cache.touch(key, CONCURRENCY_TTL)
+        if count > limit:
+            cache.decr(key)
+            return False
+        return True
+
+    def release(self, key):
+        try:
+            cache.decr(key)
+        except ValueError:
+            # Expired in the meantime
+            pass
+
+
+class FallbackStore:
+    """The shared store, or the local one while the shared one fails"""
+    def __init__(self, shared, local):
+        self.shared = shared
+        self.local = local
+        self.logged = 0.0
+
+    def call(self, method, *args):
+        """Returns the store that answered, for the matching release, and its result"""
+        try:
+            return self.shared, getattr(self.shared, method)(*args)
+        except Exception:
+            if time.monotonic() - self.logged > OUTAGE_LOG_INTERVAL:
+                self.logged = time.monotonic()
+                logger.warning("Quota store unavailable, limiting per process", exc_info=True)
+            return self.local, getattr(self.local, method)(*args)
+
+
+store = FallbackStore(CacheStore(), LocalStore())
+
+
+def get_config():
+    return getattr(settings, 'AI_QUOTAS', {})
+
+
+def is_enabled():
+    return get_config().get('ENABLED', False)
+
+
+class Bucket:
+    """A token bucket of the quotas, configured per minute"""
+    def __init__(self, key, per_minute, burst, max_wait=0.0):
+        self.key = key
+        self.rate = per_minute / 60
+        self.burst = max(burst, 1)
+        self.max_wait = max_wait
+        # Until it's full again, after that a missing bucket is the same
+        self.timeout = math.ceil(self.burst / self.rate + max_wait) + 1
+
+    def take(self, cost=1):
+        used, result = store.call(
+            'update', self.key, partial(take_tokens, now=time.time(), rate=self.rate, burst=self.burst, cost=cost, max_wait=self.max_wait), self.timeout
+        )
+        return result
+
+    def give_back(self, cost=1):
+        store.call(
+            'update', self.key, partial(give_back_tokens, now=time.time(), rate=self.rate, burst=self.burst, cost=cost), self.timeout
+        )
+
+
+def get_buckets(identity, team_id):
+    config = get_config()
+    scopes = [(f'quota:{identity}', 'USER')]
+    if team_id is not None:
+        scopes.append((f'quota:team:{team_id}', 'TEAM'))
+    return [
+        (key, config.get(f'{scope}_CONCURRENCY', 0),
+         Bucket(key, config[f'{scope}_RATE'], config.get(f'{scope}_BURST', 1)) if config.get(f'{scope}_RATE') else None)
+        for key, scope in scopes
+    ]
+
+
+def get_upstream_bucket():
+    config = get_config()
+    if not config.get('UPSTREAM_RATE'):
+        return None
+    return Bucket('quota:upstream', config['UPSTREAM_RATE'], config.get('UPSTREAM_BURST', 1), config.get('UPSTREAM_MAX_WAIT', 0))
+
+
+def acquire(identity, team_id=None, upstream_calls=1):
+    """
+    Take the request's in flight slots and tokens for `identity` (the user,
+    or the client address) and their team, and reserve `upstream_calls` of
+    the upstream budget. Returns the slots to release and how long to wait
+    for the upstream budget, raises QuotaExceeded.
+    """
+    held = []
+    taken = []
+    try:
+        buckets = get_buckets(identity, team_id)
+        for key, limit, bucket in buckets:
+            if limit:
+                used, acquired = store.call('acquire', f'{key}:inflight', limit)
+                if not acquired:
+                    raise QuotaExceeded(wait=1)
+                held.append((used, f'{key}:inflight'))
+
+        for key, limit, bucket in buckets:
+            if bucket is not None:
+                granted, seconds = bucket.take()
+                if not granted:
+                    raise QuotaExceeded(wait=seconds)
+                taken.append((bucket, 1))
+
+        wait = 0.0
+        upstream = get_upstream_bucket()
+        if upstream is not None and upstream_calls:
+            granted, seconds = upstream.take(upstream_calls)
+            if not granted:
+                raise QuotaExceeded(wait=seconds)
+            wait = seconds
+        return held, wait
+    except BaseException:
+        # Nothing was used, so the other limits keep what they gave
+        for bucket, cost in taken:
+            bucket.give_back(cost)
+        release(held)
+        raise
+
+
+def release(held):
+    for used, key in held:
+        used.release(key)
+
+
+authentication = JWTAuthentication()
+
+
+async def get_identity(request):
+    """The requesting user, or their address for anonymous requests"""
+    # Set by AsyncAPIView once the token is checked
+    user = request.user if hasattr(request, 'auth') else None
+    if user is None:
+        try:
+            result = await authentication.aauthenticate(request)
+        except AuthenticationFailed:
+            result = None
+        user = result[0] if result is not None else None
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return f"addr:{request.META.get('REMOTE_ADDR')}"
+
+
+@asynccontextmanager
+async def limit(request, team_id=None, upstream_calls=1):
+    """
+    Run the body within the AI quotas of the requesting user and of
+    `team_id`, holding an in flight slot of each until it's done. Bursts
+    over the upstream budget are spread out by waiting here.
+    """
+    if not is_enabled():
+        yield
+        return
+
+    identity = await get_identity(request)
+    held, wait = await sync_to_async(acquire, thread_sensitive=False)(identity, team_id, upstream_calls)
+    try:
+        if wait:
+            await asyncio.sleep(wait)
+        yield
+    finally:
+        await sync_to_async(release, thread_sensitive=False)(held)
+
+
+async def reserve_upstream(calls=1):
+    """Wait for `calls` of the upstream budget, for LLM calls made outside limit()"""
+    upstream = get_upstream_bucket() if is_enabled() else None
+    if upstream is None:
+        return
+    granted, seconds = await sync_to_async(upstream.take, thread_sensitive=False)(calls)
+    if not granted:
+        raise QuotaExceeded(wait=seconds)
+    if seconds:
+        await asyncio.sleep(seconds)
+
+
+def exceeded_response(exc):
+    """QuotaExceeded as a response, for plain Django views"""
+    response = JsonResponse({'detail': exc.detail}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+    response['Retry-After'] = str(exc.wait)
+    return response
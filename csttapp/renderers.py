@@ -0,0 +1,80 @@
+import json
+import math
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+# orjson writes datetimes, dates and UUIDs natively, everything else it does
+# not know (Decimal, timedelta, lazy strings...) goes through DRF's encoder
+ORJSON_OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+encoder_default = JSONEncoder().default
+
+
+def has_non_finite(value):
+    """Whether a NaN or an infinite float is nested in value"""
+    value_type = type(value)
+    if value_type is dict:
+        value = value.values()
+    elif value_type is not list and value_type is not tuple:
+        return value_type is float and not math.isfinite(value)
+    for item in value:
+        item_type = type(item)
+        if item is None or item_type is str or item_type is int or item_type is bool:
+            continue
+        if has_non_finite(item):
+            return True
+    return False
+
+
+def stdlib_dumps(data):
+    return json.dumps(
+        data, cls=JSONEncoder, ensure_ascii=False, allow_nan=not api_settings.STRICT_JSON, separators=(',', ':')
+    ).encode()
+
+
+def dumps(data):
+    """
+    Compact UTF-8 JSON bytes, the same output as DRF's JSONRenderer with the
+    default settings
+    """
+    if orjson is None:
+        ret = stdlib_dumps(data)
+    else:
+        try:
+            ret = orjson.dumps(data, default=encoder_default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # Integers past 64 bits, which the json module writes
+            ret = stdlib_dumps(data)
+        else:
+            # orjson writes NaN and Infinity as null. They are only looked for
+            # when there's a null, the json module then rejects or writes them.
+            if b'null' in ret and has_non_finite(data):
+                ret = stdlib_dumps(data)
+    # Keep the output a strict javascript subset, as JSONRenderer does
+    if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+        ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return ret
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer backed by orjson. Indented output (the browsable API,
+    `Accept: application/json; indent=4`) and non-default JSON settings
+    are left to the stock renderer, as is everything when orjson is not
+    installed.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is None or indent is not None or self.ensure_ascii or not self.compact or self.strict != api_settings.STRICT_JSON:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
@@ -0,0 +1,90 @@
+import contextlib
+import contextvars
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+_state = contextvars.ContextVar('cstt_replica_routing', default=None)
+
+
+class RoutingState:
+    """Per request routing: which replica to read from, and whether the request wrote"""
+    __slots__ = ('replica', 'wrote')
+
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+
+    @contextlib.contextmanager
+    def activate(self):
+        token = _state.set(self)
+        try:
+            yield self
+        finally:
+            _state.reset(token)
+
+
+def get_replicas():
+    return getattr(settings, 'REPLICA_DATABASES', [])
+
+
+def pin_key(user_id):
+    return f'replica_pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    """Send the user's reads to the primary until replicas have caught up with their write"""
+    cache.set(pin_key(user_id), True, getattr(settings, 'REPLICA_STICKY_SECONDS', 10))
+
+
+def is_pinned(user_id):
+    return cache.get(pin_key(user_id)) is not None
+
+
+def use_replica(user):
+    """
+    Route the current request's reads to a replica, unless none is
+    configured or the user wrote recently. Only call it for read-only
+    requests.
+    """
+    state = _state.get()
+    replicas = get_replicas()
+    if state is None or not replicas or state.wrote:
+        return None
+    if user is not None and user.is_authenticated and is_pinned(user.pk):
+        return None
+    state.replica = random.choice(replicas)
+    return state.replica
+
+
+class ReplicaRouter:
+    """
+    Writes, and reads outside of read-only views, go to the primary. Views
+    opt in to replica reads through use_replica(), ReplicaRoutingMiddleware
+    keeps track of writes so the writer keeps reading from the primary for
+    REPLICA_STICKY_SECONDS.
+    """
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is not None and state.replica and not state.wrote:
+            return state.replica
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication
+        return db not in get_replicas()
@@ -1,7 +1,11 @@
+import copy
 from rest_framework import serializers
+from django.db import IntegrityError, transaction
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
-from .models import Profile, TestCase, TestSuite, TestCase, TestStep, Team, Project, Defect
+from . import passwords
+from .authentication import users_by_email
+from .models import Profile, TestCase, TestSuite, TestCase, TestStep, Team, Project, Defect, DefectHistory, TestCaseImport, GeneratedDataset
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     full_name = serializers.CharField(required=True)
@@ -19,7 +23,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         if attrs['password'] != attrs['confirm_password']:
             raise serializers.ValidationError({"password": "Password fields didn't match."})
         
-        if User.objects.filter(email=attrs['email']).exists():
+        if users_by_email(attrs['email']).exists():
             raise serializers.ValidationError({"email": "User with this email already exists."})
         
         return attrs
@@ -29,21 +33,27 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         first_name = full_name[0]
         last_name = full_name[1] if len(full_name) > 1 else ''
 
-        user = User.objects.create(
+        user = User(
             username=validated_data['email'],  # Using email as username
             email=validated_data['email'],
             first_name=first_name,
             last_name=last_name
         )
 
-        user.set_password(validated_data['password'])
-        user.save()
+        # Hashed before the insert, so the row is written once
+        passwords.set_password(user, validated_data['password'])
+        try:
+            with transaction.atomic():
+                user.save()
 
-        # Create associated profile
-        Profile.objects.create(
-            auth_user=user,
-            role=validated_data['role']
-        )
+                # Create associated profile
+                Profile.objects.create(
+                    auth_user=user,
+                    role=validated_data['role']
+                )
+        except IntegrityError:
+            # Registered concurrently, caught by the unique email index
+            raise serializers.ValidationError({"email": "User with this email already exists."})
 
         return user
 
@@ -87,12 +97,22 @@ class TestSuiteSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description', 'created_at', 'is_active']
         
 class TestStepSerializer(serializers.ModelSerializer):
+    # Writable so batch updates can match incoming steps to existing rows
+    id = serializers.UUIDField(required=False)
+
     class Meta:
         model = TestStep
-        fields = ['test_case', 'order_number', 'action', 'expected_result']
+        fields = ['id', 'test_case', 'order_number', 'action', 'expected_result']
+        # Batch writers supply the test case once instead of per step
+        extra_kwargs = {'test_case': {'required': False}}
+
+class NestedTestStepSerializer(TestStepSerializer):
+    class Meta(TestStepSerializer.Meta):
+        # Nested steps always belong to the parent test case
+        read_only_fields = ['test_case']
 
 class TestCaseSerializer(serializers.ModelSerializer):
-    steps = TestStepSerializer(many=True, required=False)
+    steps = NestedTestStepSerializer(many=True, required=False)
     suite = serializers.PrimaryKeyRelatedField(queryset=TestSuite.objects.all())
 
     class Meta:
@@ -103,9 +123,17 @@ class TestCaseSerializer(serializers.ModelSerializer):
         
     def create(self, validated_data):
         steps_data = validated_data.pop('steps', [])
-        test_case = TestCase.objects.create(**validated_data)
-        for step_data in steps_data:
-            TestStep.objects.create(test_case=test_case, **step_data)
+        with transaction.atomic():
+            test_case = TestCase.objects.create(**validated_data)
+            TestStep.objects.bulk_create([
+                TestStep(
+                    test_case=test_case,
+                    order_number=step_data['order_number'],
+                    action=step_data['action'],
+                    expected_result=step_data['expected_result']
+                )
+                for step_data in steps_data
+            ])
         return test_case
 
     def update(self, instance, validated_data):
@@ -117,13 +145,13 @@ class TestCaseSerializer(serializers.ModelSerializer):
         instance.status = validated_data.get('status', instance.status)
         instance.suite = validated_data.get('suite', instance.suite)
         instance.metadata = validated_data.get('metadata', instance.metadata)
-        instance.save()
 
-        # Handle steps update
-        if steps_data:
-            instance.steps.all().delete()  # Delete old steps
-            for step_data in steps_data:
-                TestStep.objects.create(test_case=instance, **step_data)
+        with transaction.atomic():
+            instance.save()
+
+            # Handle steps update, reordering and edits are written in bulk
+            if steps_data:
+                TestStepBatchSerializer.merge_steps(instance, steps_data)
 
         return instance
 
@@ -138,10 +166,118 @@ class TestStepBatchSerializer(serializers.Serializer):
 
     def create(self, validated_data):
         steps_data = validated_data.get('steps')
-        steps = [TestStep(**step_data) for step_data in steps_data]
+        test_case = validated_data.get('test_case')
+        steps = [
+            TestStep(**{'test_case': test_case, **{key: value for key, value in step_data.items() if key != 'id'}})
+            for step_data in steps_data
+        ]
         created_steps = TestStep.objects.bulk_create(steps)
         return {'steps': created_steps}
+
+    @staticmethod
+    def merge_steps(test_case, steps_data):
+        """
+        Reconcile a test case's steps with the incoming list. Steps are
+        matched by id first, then by order number; only rows whose values
+        changed are updated, unmatched incoming steps are created and
+        unmatched existing steps deleted. Step ids are preserved, so
+        StepResult rows referencing them survive the edit. Ids of another
+        test case's steps are a ValidationError, as are steps without an
+        integer order number.
+        """
+        editable_fields = ['order_number', 'action', 'expected_result']
+        # Partial updates leave the other fields out, never the order number
+        for step_data in steps_data:
+            order_number = step_data.get('order_number')
+            if not isinstance(order_number, int) or isinstance(order_number, bool):
+                raise serializers.ValidationError({'steps': ["Every step needs an integer order_number."]})
+
+        with transaction.atomic():
+            # Concurrent merges into the same test case run one after the other,
+            # each against the steps the previous one left
+            TestCase.objects.select_for_update().filter(pk=test_case.pk).exists()
+            existing = {step.id: step for step in TestStep.objects.filter(test_case=test_case)}
+
+            step_ids = [step_data['id'] for step_data in steps_data if step_data.get('id') is not None]
+            unknown = [str(step_id) for step_id in step_ids if step_id not in existing]
+            if unknown:
+                raise serializers.ValidationError({'steps': [f"Steps {', '.join(unknown)} don't belong to this test case."]})
+            if len(set(step_ids)) != len(step_ids):
+                raise serializers.ValidationError({'steps': ["Step ids must be unique."]})
+
+            matched = {}
+            unmatched = []
+            for index, step_data in enumerate(steps_data):
+                if step_data.get('id') is not None:
+                    matched[index] = step_data['id']
+                else:
+                    unmatched.append(index)
+
+            claimed = set(matched.values())
+            by_order = {}
+            for step in existing.values():
+                if step.id not in claimed:
+                    by_order.setdefault(step.order_number, step.id)
+
+            to_create = []
+            for index in unmatched:
+                step_id = by_order.pop(steps_data[index]['order_number'], None)
+                if step_id is None:
+                    to_create.append(index)
+                else:
+                    matched[index] = step_id
+
+            to_update = []
+            updated_fields = set()
+            for index, step_id in matched.items():
+                step = existing[step_id]
+                changed = [
+                    field for field in editable_fields
+                    if field in steps_data[index] and getattr(step, field) != steps_data[index][field]
+                ]
+                for field in changed:
+                    setattr(step, field, steps_data[index][field])
+                if changed:
+                    to_update.append(step)
+                    updated_fields.update(changed)
+
+            missing = sorted({field for index in to_create for field in editable_fields if field not in steps_data[index]})
+            if missing:
+                raise serializers.ValidationError({'steps': [f"New steps need {', '.join(missing)}."]})
+            new_steps = [
+                TestStep(test_case=test_case, **{field: steps_data[index][field] for field in editable_fields})
+                for index in to_create
+            ]
+            stale_ids = set(existing) - set(matched.values())
+
+            if stale_ids:
+                TestStep.objects.filter(id__in=stale_ids).delete()
+            if to_update:
+                TestStep.objects.bulk_update(to_update, sorted(updated_fields))
+            if new_steps:
+                TestStep.objects.bulk_create(new_steps)
+
+        steps = [existing[step_id] for step_id in matched.values()] + new_steps
+        return sorted(steps, key=lambda step: step.order_number)
+    
+class TestCaseImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TestCaseImport
+        fields = [
+            'id', 'suite', 'format_type', 'status', 'records_processed',
+            'cases_created', 'steps_created', 'errors', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
     
+class GeneratedDatasetSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GeneratedDataset
+        fields = [
+            'id', 'content_hash', 'template', 'seed', 'record_count',
+            'size_bytes', 'stored_bytes', 'created_at'
+        ]
+        read_only_fields = fields
+
 class DefectSerializer(serializers.ModelSerializer):
     class Meta:
         model = Defect
@@ -166,6 +302,31 @@ class DefectSerializer(serializers.ModelSerializer):
         validated_data['metadata'] = metadata
         return super().create(validated_data)
 
+class SparseFieldsetMixin:
+    """
+    Accepts a `fields` kwarg and drops every other field from the output.
+    """
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+class DefectListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Slim, read-only representation for the defects table. Leaves out the
+    `description` and `metadata` bodies so list queries can use `.only()`.
+    """
+    class Meta:
+        model = Defect
+        fields = [
+            'id', 'title', 'status', 'priority', 'severity',
+            'assigned_to_profile', 'reported_by_profile',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
 class DefectDetailSerializer(serializers.ModelSerializer):
     reporter = serializers.SerializerMethodField()
     assignee = serializers.SerializerMethodField()
@@ -182,6 +343,17 @@ class DefectDetailSerializer(serializers.ModelSerializer):
             'assignee', 'tags', 'affected_area', 'reporter_id',
             'assignee_id', 'metadata'
         ]
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Join the reporter and assignee users so the method fields below
+        don't issue a query per defect
+        """
+        return queryset.select_related(
+            'reported_by_profile__auth_user',
+            'assigned_to_profile__auth_user'
+        )
         
     def get_reporter(self, obj):
         if obj.reported_by_profile:
@@ -221,4 +393,63 @@ class DefectDetailSerializer(serializers.ModelSerializer):
             setattr(instance, attr, value)
         
         instance.save()
-        return instance
\ No newline at end of file
+        return instance
+
+class DefectHistorySerializer(serializers.ModelSerializer):
+    changed_by = serializers.SerializerMethodField()
+    changed_by_id = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DefectHistory
+        fields = [
+            'id', 'field_name', 'old_value', 'new_value',
+            'changed_by', 'changed_by_id', 'created_at'
+        ]
+
+    def get_changed_by(self, obj):
+        if obj.changed_by_profile:
+            return obj.changed_by_profile.auth_user.get_full_name() or obj.changed_by_profile.auth_user.email
+        return "Unknown"
+
+    def get_changed_by_id(self, obj):
+        return str(obj.changed_by_profile_id) if obj.changed_by_profile_id else None
+
+
+class DefectChangeSetSerializer(serializers.Serializer):
+    # status, priority and severity are validated as DefectDetailSerializer
+    # validates them for a single defect, see get_fields()
+    DETAIL_FIELDS = ('status', 'priority', 'severity')
+
+    assignee_id = serializers.UUIDField(required=False, allow_null=True)
+    tags = serializers.ListField(child=serializers.CharField(), required=False)
+    add_tags = serializers.ListField(child=serializers.CharField(), required=False)
+    remove_tags = serializers.ListField(child=serializers.CharField(), required=False)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        detail_fields = DefectDetailSerializer().fields
+        for name in self.DETAIL_FIELDS:
+            fields[name] = copy.deepcopy(detail_fields[name])
+            fields[name].required = False
+        return fields
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError("At least one change is required.")
+        if 'tags' in attrs and ('add_tags' in attrs or 'remove_tags' in attrs):
+            raise serializers.ValidationError("Use either tags or add_tags/remove_tags, not both.")
+        if attrs.get('assignee_id') and not Profile.objects.filter(id=attrs['assignee_id']).exists():
+            raise serializers.ValidationError({"assignee_id": "Invalid assignee ID"})
+        return attrs
+
+class DefectBulkUpdateSerializer(serializers.Serializer):
+    MAX_DEFECTS = 5000
+
+    ids = serializers.ListField(child=serializers.UUIDField(), required=False, max_length=MAX_DEFECTS)
+    filter = serializers.DictField(required=False)
+    changes = DefectChangeSetSerializer()
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError("Provide either ids or filter.")
+        return attrs
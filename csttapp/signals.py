@@ -0,0 +1,50 @@
+from functools import partial
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from .models import Profile, TeamMember, TeamRosterService, TestData
+from .authentication import invalidate_user
+from .datastore import DatasetStore, TemplateStore
+
+
+# User fields shown in team rosters
+ROSTER_USER_FIELDS = frozenset({'first_name', 'last_name', 'email'})
+
+
+@receiver([post_save, post_delete], sender=TeamMember)
+def invalidate_team_roster(sender, instance, **kwargs):
+    TeamRosterService.invalidate(instance.team_id)
+
+
+@receiver(post_save, sender=User)
+def invalidate_member_rosters(sender, instance, created, update_fields=None, **kwargs):
+    # New users aren't on a team yet, logins only save last_login
+    if created or (update_fields is not None and ROSTER_USER_FIELDS.isdisjoint(update_fields)):
+        return
+    team_ids = list(TeamMember.objects.filter(profile__auth_user_id=instance.pk).values_list('team_id', flat=True))
+    for team_id in team_ids:
+        transaction.on_commit(partial(TeamRosterService.invalidate, team_id))
+
+
+@receiver(pre_delete, sender=TestData)
+def release_test_data_datasets(sender, instance, **kwargs):
+    # Drop the references while the links still exist, unshared datasets go with them
+    for dataset in instance.datasets.all():
+        DatasetStore.detach(instance, dataset)
+
+
+@receiver(post_delete, sender=TestData)
+def release_test_data_template(sender, instance, **kwargs):
+    TemplateStore.release(instance.template_id)
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # After commit, or a request in between could cache the old row again
+    transaction.on_commit(partial(invalidate_user, instance.pk))
+
+
+@receiver([post_save, post_delete], sender=Profile)
+def invalidate_cached_profile(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_user, instance.auth_user_id))
@@ -0,0 +1,79 @@
+import itertools
+
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+
+from .metrics import serializing
+from .renderers import dumps
+
+# `?stream=` value -> content type of the streamed body
+STREAM_FORMATS = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def get_stream_format(request):
+    """
+    Return the streaming format requested with `?stream=json|ndjson`, or None
+    when the client wants a regular response.
+    """
+    stream_format = request.query_params.get('stream')
+    if not stream_format:
+        return None
+    if stream_format in ('1', 'true'):
+        return 'json'
+    if stream_format not in STREAM_FORMATS:
+        raise ValidationError({'stream': f"Expected one of {list(STREAM_FORMATS)}."})
+    return stream_format
+
+
+def iter_serialized(queryset, serializer_class, chunk_size=500, **kwargs):
+    """
+    Serialize a queryset chunk by chunk from a server-side cursor. Only one
+    chunk of model instances is held in memory at a time, and any
+    prefetch_related lookups are resolved per chunk.
+    """
+    rows = queryset.iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            break
+        with serializing():
+            data = serializer_class(chunk, many=True, **kwargs).data
+        yield from data
+
+
+def iter_json_array(items, buffer_size=64 * 1024):
+    buffer = bytearray(b'[')
+    for index, item in enumerate(items):
+        if index:
+            buffer += b','
+        buffer += dumps(item)
+        if len(buffer) >= buffer_size:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b']'
+    yield bytes(buffer)
+
+
+def iter_ndjson(items, buffer_size=64 * 1024):
+    buffer = bytearray()
+    for item in items:
+        buffer += dumps(item) + b'\n'
+        if len(buffer) >= buffer_size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    """
+    Streams an iterable of already serialized items as a JSON array or as
+    newline delimited JSON, so memory stays flat whatever the result size.
+    """
+    def __init__(self, items, stream_format='json', **kwargs):
+        encoder = iter_ndjson if stream_format == 'ndjson' else iter_json_array
+        kwargs.setdefault('content_type', STREAM_FORMATS[stream_format])
+        super().__init__(encoder(items), **kwargs)
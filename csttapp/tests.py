@@ -1,3 +1,651 @@
-from django.test import TestCase
+import base64
+import copy
+import datetime
+import decimal
+import json
+import re
+import tempfile
+import time
+import uuid
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import quotas
+from .authentication import JWTAuthentication
+from .datagen import TestDataGenerator
+from .exporters import EXPORT_FORMATS, iter_export
+from .fast_serializers import FastSerializer
+from .importers import TestCaseImporter
+from .models import Defect, DefectHistory, Profile, Project, RevokedToken, Team, TeamMember, TeamRosterService, TestCase as Case, TestCaseImport, TestStep, TestSuite
+from .renderers import ORJSONRenderer
+from .routers import pin_key
+from .serializers import DefectSerializer, ProjectSerializer, TestCaseSerializer, TestStepBatchSerializer, TestSuiteSerializer
+from .views import GenerateTestDataView
+
+
+class FastSerializerParityTests(TestCase):
+    """FastSerializer must render the same JSON bytes as the serializer it stands in for"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profile = Profile.objects.create(auth_user=User.objects.create_user('qa', 'qa@example.com', 'pw'), role='QA')
+        team = Team.objects.create(name='Team', description='', created_by_profile=cls.profile)
+        cls.project = Project.objects.create(name='Project', description='', status='Pending', team=team)
+        Project.objects.create(name='Inactive', description='Ünïcode "quoted"', status='Completed', team=team, is_active=False)
+        cls.suite = TestSuite.objects.create(name='Suite', description='', project=cls.project)
+        TestSuite.objects.create(name='Empty', description='\n', project=cls.project)
+
+        with_steps = Case.objects.create(
+            title='With steps', description='', priority='High', type='Functional', status='Draft',
+            suite=cls.suite, created_by_profile=cls.profile, metadata={'tags': ['a', 'b'], 'nested': {'n': 1.5}},
+            generation_query='login page', input_image='test_cases/images/login.png',
+        )
+        # Inserted out of order, they are listed by order_number
+        TestStep.objects.bulk_create([
+            TestStep(test_case=with_steps, order_number=order, action=f'Step {order}', expected_result='')
+            for order in (3, 1, 2)
+        ])
+        Case.objects.create(
+            title='Without steps', description='', priority='Low', type='UI', status='Draft',
+            suite=cls.suite, created_by_profile=None, metadata={}, generation_query=None, input_image=None,
+        )
+
+        Defect.objects.create(
+            title='Assigned', description='', status='Open', priority='High', severity='Critical', project=cls.project,
+            assigned_to_profile=cls.profile, reported_by_profile=cls.profile, metadata={'tags': []},
+        )
+        Defect.objects.create(
+            title='Unassigned', description='', status='Closed', priority='Low', severity='Minor', project=cls.project,
+            assigned_to_profile=None, reported_by_profile=None, metadata={},
+        )
+
+        # Whole seconds and microseconds render differently, so both are covered
+        Case.objects.filter(title='With steps').update(
+            created_at=datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc),
+            updated_at=datetime.datetime(2024, 6, 7, 8, 9, 10, 123456, tzinfo=datetime.timezone.utc),
+        )
+
+    def assertParity(self, serializer_class, queryset):
+        expected = serializer_class(queryset, many=True).data
+        actual = FastSerializer(serializer_class).serialize(queryset)
+        self.assertEqual(actual, expected)
+        for renderer in (JSONRenderer(), ORJSONRenderer()):
+            self.assertEqual(renderer.render(actual), renderer.render(expected))
+        self.assertEqual(list(FastSerializer(serializer_class).iter_serialize(queryset, chunk_size=1)), expected)
+
+    def test_test_cases(self):
+        self.assertParity(TestCaseSerializer, Case.objects.order_by('title'))
+
+    def test_test_cases_in_another_timezone(self):
+        with timezone.override('America/New_York'):
+            self.assertParity(TestCaseSerializer, Case.objects.order_by('title'))
+
+    def test_projects(self):
+        self.assertParity(ProjectSerializer, Project.objects.order_by('name'))
+
+    def test_test_suites(self):
+        self.assertParity(TestSuiteSerializer, TestSuite.objects.order_by('name'))
+
+    def test_defects(self):
+        self.assertParity(DefectSerializer, Defect.objects.order_by('title'))
+
+    def test_empty_queryset(self):
+        self.assertParity(TestCaseSerializer, Case.objects.none())
+
+
+class MergeStepsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        team = Team.objects.create(name='Team', description='')
+        project = Project.objects.create(name='Project', description='', status='Pending', team=team)
+        suite = TestSuite.objects.create(name='Suite', description='', project=project)
+        cls.test_case, cls.other_case = (
+            Case.objects.create(title=title, description='', priority='High', type='Functional', status='Draft', suite=suite)
+            for title in ('Test case', 'Other')
+        )
+        cls.first, cls.second = (
+            TestStep.objects.create(test_case=cls.test_case, order_number=order, action=f'Step {order}', expected_result='')
+            for order in (1, 2)
+        )
+        cls.foreign = TestStep.objects.create(test_case=cls.other_case, order_number=1, action='Other', expected_result='')
+
+    def test_keeps_matched_ids(self):
+        steps = TestStepBatchSerializer.merge_steps(self.test_case, [
+            {'id': self.second.id, 'order_number': 1, 'action': 'Moved', 'expected_result': ''},
+            {'order_number': 2, 'action': 'Step 2', 'expected_result': ''},
+        ])
+        self.assertEqual(steps[0].id, self.second.id)
+        self.assertEqual(
+            list(TestStep.objects.filter(test_case=self.test_case).values_list('order_number', 'action')),
+            [(1, 'Moved'), (2, 'Step 2')],
+        )
+
+    def test_rejects_steps_of_another_test_case(self):
+        with self.assertRaises(serializers.ValidationError):
+            TestStepBatchSerializer.merge_steps(self.test_case, [
+                {'id': self.foreign.id, 'order_number': 1, 'action': 'Taken', 'expected_result': ''},
+            ])
+        self.foreign.refresh_from_db()
+        self.assertEqual(self.foreign.action, 'Other')
+        self.assertEqual(TestStep.objects.filter(test_case=self.test_case).count(), 2)
+
+    def test_rejects_steps_without_order_number(self):
+        for step in (
+            {'id': self.first.id, 'action': 'No order'},
+            {'action': 'New', 'expected_result': ''},
+            {'order_number': '1', 'action': 'Text', 'expected_result': ''},
+        ):
+            with self.assertRaises(serializers.ValidationError):
+                TestStepBatchSerializer.merge_steps(self.test_case, [step])
+
+        user = User.objects.create_user('qa', 'qa@example.com', 'pw')
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.put(
+            f'/test-cases/{self.test_case.id}/edit/', {'steps': [{'id': str(self.first.id), 'action': 'No order'}]}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            list(TestStep.objects.filter(test_case=self.test_case).values_list('order_number', 'action')),
+            [(1, 'Step 1'), (2, 'Step 2')],
+        )
+
+
+class ORJSONRendererTests(TestCase):
+    def assertSameAsJSONRenderer(self, data):
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_output_matches(self):
+        self.assertSameAsJSONRenderer({
+            'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'datetime': datetime.datetime(2024, 1, 2, 3, 4, 5, 6, tzinfo=datetime.timezone.utc),
+            'decimal': decimal.Decimal('1.10'), 'text': 'Ünïcode \u2028', 'null': None, 'float': 1.5,
+        })
+
+    def test_integers_past_64_bits(self):
+        self.assertSameAsJSONRenderer({'big': 2 ** 64, 'negative': [-2 ** 70]})
+
+    def test_rejects_nan_and_infinity(self):
+        for value in (float('nan'), float('inf'), float('-inf')):
+            with self.assertRaises(ValueError):
+                ORJSONRenderer().render({'nested': [None, {'value': value}]})
+
+
+class TeamRosterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('member', 'member@example.com', 'pw', first_name='Ann', last_name='Lee')
+        profile = Profile.objects.create(auth_user=cls.user, role='QA')
+        cls.team = Team.objects.create(name='Team', description='')
+        TeamMember.objects.create(team=cls.team, profile=profile, role='Member')
+
+    def setUp(self):
+        TeamRosterService.invalidate(self.team.id)
+
+    def test_renamed_member(self):
+        self.assertEqual([member['name'] for member in TeamRosterService.get_roster(self.team.id)], ['Ann Lee'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = 'Anna'
+            self.user.save()
+        self.assertEqual([member['name'] for member in TeamRosterService.get_roster(self.team.id)], ['Anna Lee'])
+
+    def test_login_keeps_roster(self):
+        TeamRosterService.get_roster(self.team.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save(update_fields=['last_login'])
+        self.assertIsNotNone(cache.get(TeamRosterService.cache_key(self.team.id)))
+
+
+class DefectFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('qa', 'qa@example.com', 'pw')
+        Profile.objects.create(auth_user=cls.user, role='QA')
+        cls.team = Team.objects.create(name='Team', description='')
+        cls.project = Project.objects.create(name='Project', description='', status='Pending', team=cls.team)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'/teams/{self.team.id}/projects/{self.project.id}/defects/'
+
+    def test_malformed_assignee(self):
+        response = self.client.get(self.url, {'assignee': 'not-a-uuid', 'facets': 'true'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('assignee', response.json())
+
+        response = self.client.post(
+            f'{self.url}bulk/', {'filter': {'assignee': 'not-a-uuid'}, 'changes': {'status': 'Closed'}}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_valid_filters(self):
+        for assignee in ('unassigned', str(uuid.uuid4()).upper(), 'all'):
+            self.assertEqual(self.client.get(self.url, {'assignee': assignee}).status_code, 200)
+
+
+REPLICA = 'replica_test'
+
+
+class ReplicaRoutingTests(TestCase):
+    """
+    Reads of read-only views against a second SQLite database standing in
+    for a replica. The two hold different rows, so responses tell which one
+    was read.
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(cls.directory.cleanup)
+        replica = copy.deepcopy(connections.settings['default'])
+        replica.update(ENGINE='django.db.backends.sqlite3', NAME=f'{cls.directory.name}/replica.sqlite3', OPTIONS={})
+        connections.settings[REPLICA] = replica
+        cls.addClassCleanup(cls.remove_replica)
+        # Before REPLICA_DATABASES names it, replicas don't get migrated
+        call_command('migrate', database=REPLICA, verbosity=0)
+        # Not a class attribute, the test runner checks every test's databases
+        # before the alias exists
+        cls.databases = {'default', REPLICA}
+        super().setUpClass()
+        cls.enterClassContext(override_settings(REPLICA_DATABASES=[REPLICA], REPLICA_STICKY_SECONDS=1))
+
+    @staticmethod
+    def remove_replica():
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('writer', 'writer@example.com', 'pw')
+        cls.team = Team.objects.create(name='Team', description='')
+        Project.objects.create(name='Primary', description='', status='Pending', team=cls.team)
+        Team(id=cls.team.id, name='Team', description='').save(using=REPLICA)
+        Project(name='Replica', description='', status='Pending', team_id=cls.team.id).save(using=REPLICA)
+
+    def setUp(self):
+        cache.delete(pin_key(self.user.pk))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_project_names(self):
+        response = self.client.get(f'/teams/{self.team.id}/projects/')
+        self.assertEqual(response.status_code, 200)
+        return sorted(project['name'] for project in response.json())
+
+    def test_reads_go_to_the_replica(self):
+        self.assertEqual(self.get_project_names(), ['Replica'])
+
+    def test_writer_reads_from_the_primary_until_the_window_ends(self):
+        response = self.client.post(
+            f'/teams/{self.team.id}/projects/create/', {'name': 'New', 'description': 'New project', 'status': 'Pending'}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.get_project_names(), ['New', 'Primary'])
+
+        time.sleep(1.1)
+        self.assertEqual(self.get_project_names(), ['Replica'])
+
+
+class TestDataGeneratorTests(TestCase):
+    FIELDS = [
+        {'name': 'code', 'type': 'string', 'constraints': r'pattern [A-Z]{3}-\d{4}'},
+        {'name': 'age', 'type': 'integer', 'constraints': 'between 5 and 10'},
+        {'name': 'email', 'type': 'string'},
+    ]
+
+    def test_same_seed_same_records(self):
+        records = TestDataGenerator(self.FIELDS, seed=42, chunk_size=4).records(10)
+        self.assertEqual(TestDataGenerator(self.FIELDS, seed=42, chunk_size=4).records(10), records)
+        self.assertNotEqual(TestDataGenerator(self.FIELDS, seed=43, chunk_size=4).records(10), records)
+        # The second chunk doesn't depend on how the first was read
+        self.assertEqual(list(TestDataGenerator(self.FIELDS, seed=42, chunk_size=4).iter_records(10))[4:], records[4:])
+
+    def test_constraints(self):
+        records = TestDataGenerator(self.FIELDS, seed=1).records(500)
+        self.assertTrue(all(5 <= record['age'] <= 10 for record in records))
+        self.assertTrue(all(re.fullmatch(r'[A-Z]{3}-\d{4}', record['code']) for record in records))
+
+    def test_malformed_templates(self):
+        client = APIClient()
+        # Async views read the token themselves
+        access = RefreshToken.for_user(User.objects.create_user('qa', 'qa@example.com', 'pw')).access_token
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        for field in (
+            {'name': 'code', 'constraints': 'pattern [a-'},
+            {'name': 'code', 'constraints': 'pattern a{x}'},
+            {'name': 'code', 'constraints': {'pattern': '[A-Z]{3}'}},
+            {'name': 'age', 'type': 'integer', 'constraints': {'min': 5, 'max': 10}},
+        ):
+            response = client.post('/test-data/generate/', {'template': {'fields': [field]}, 'use_llm': False}, format='json')
+            self.assertEqual(response.status_code, 400, field)
+            self.assertIn(field['name'], response.json()['error'])
+
+
+class TokenRefreshTests(TestCase):
+    def test_refresh_token_is_used_once(self):
+        refresh = str(RefreshToken.for_user(User.objects.create_user('qa', 'qa@example.com', 'pw')))
+        client = APIClient()
+        response = client.post('/token/refresh/', {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.json()['refresh'], refresh)
+
+        self.assertEqual(client.post('/token/refresh/', {'refresh': refresh}, format='json').status_code, 401)
+        # The rotated token still works
+        self.assertEqual(client.post('/token/refresh/', {'refresh': response.json()['refresh']}, format='json').status_code, 200)
+
+    def test_purge_keeps_unexpired_tokens(self):
+        now = timezone.now()
+        expired, unexpired = uuid.uuid4(), uuid.uuid4()
+        RevokedToken.objects.create(jti=expired, expires_at=now - datetime.timedelta(seconds=1))
+        RevokedToken.objects.create(jti=unexpired, expires_at=now + datetime.timedelta(hours=1))
+        self.assertEqual(RevokedToken.purge_expired(batch_size=1), 1)
+        self.assertEqual(list(RevokedToken.objects.values_list('jti', flat=True)), [unexpired])
+
+
+class EmailCaseTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.register('Ann.Lee@Example.com')
+
+    def register(self, email):
+        return self.client.post('/register/', {
+            'full_name': 'Ann Lee', 'email': email, 'password': 'Sup3r-secret-pw',
+            'confirm_password': 'Sup3r-secret-pw', 'role': 'QA',
+        }, format='json')
+
+    def test_case_only_duplicate_is_rejected(self):
+        response = self.register('ann.lee@example.COM')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('email', response.json())
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_login_ignores_case(self):
+        response = self.client.post('/login/', {'email': 'ANN.LEE@example.com', 'password': 'Sup3r-secret-pw'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post('/login/', {'email': 'ann.lee@example.com', 'password': 'wrong'}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(JWT_USER_CACHE_TIMEOUT=60)
+class JWTUserCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('qa', 'qa@example.com', 'pw')
+        cls.profile = Profile.objects.create(auth_user=cls.user, role='QA')
+
+    def setUp(self):
+        cache.clear()
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+
+    def authenticate(self):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        user, _ = JWTAuthentication().authenticate(request)
+        return user
+
+    def test_cached_until_changed(self):
+        self.assertEqual(self.authenticate().profile.role, 'QA')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate().profile.role, 'QA')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.role = 'Developer'
+            self.profile.save()
+        self.assertEqual(self.authenticate().profile.role, 'Developer')
+
+    def test_deactivated_user_is_rejected(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('qa', 'qa@example.com', 'pw')
+        team = Team.objects.create(name='Team', description='')
+        project = Project.objects.create(name='Project', description='', status='Pending', team=team)
+        cls.url = f'/teams/{team.id}/projects/{project.id}/defects/'
+        created_at = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+        for i in range(5):
+            defect = Defect.objects.create(
+                title=f'Defect {i}', description='', status='Open', priority='High', severity='Minor', project=project,
+            )
+            # Two rows share a timestamp, the id breaks the tie
+            Defect.objects.filter(id=defect.id).update(created_at=created_at + datetime.timedelta(hours=min(i, 3)))
+        cls.expected = [
+            str(defect_id) for defect_id in Defect.objects.order_by('-created_at', 'id').values_list('id', flat=True)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_pages_follow_the_ordering(self):
+        ids, cursor = [], None
+        while True:
+            params = {'page_size': 2, **({'cursor': cursor} if cursor else {})}
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 200)
+            ids += [defect['id'] for defect in response.json()['results']]
+            cursor = response.json()['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(ids, self.expected)
+
+    def test_tampered_cursor(self):
+        for values in (['not a date', self.expected[0]], ['2024-01-01 00:00:00+00:00', 'not-a-uuid'], [1, 2], [None, None]):
+            cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+            response = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual(response.status_code, 400, values)
+            self.assertIn('cursor', response.json())
+
+
+class DefectBulkUpdateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('qa', 'qa@example.com', 'pw')
+        Profile.objects.create(auth_user=cls.user, role='QA')
+        team = Team.objects.create(name='Team', description='')
+        project = Project.objects.create(name='Project', description='', status='Pending', team=team)
+        cls.url = f'/teams/{team.id}/projects/{project.id}/defects/bulk/'
+        cls.ids = [str(defect.id) for defect in Defect.objects.bulk_create([
+            Defect(title=f'Defect {i}', description='', status='Open', priority='High', severity='Minor', project=project)
+            for i in range(1000)
+        ])]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_queries_dont_grow_with_the_change_set(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {'ids': self.ids, 'changes': {'status': 'Closed'}}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['updated'], 1000)
+        self.assertLess(len(queries), 20)
+        self.assertEqual(DefectHistory.objects.filter(field_name='status', new_value='Closed').count(), 1000)
+
+    def test_values_are_validated_like_a_single_defect(self):
+        for changes in ({'status': ''}, {'priority': 'x' * 21}, {'severity': None}, {'status': {'name': 'Closed'}}):
+            response = self.client.post(self.url, {'ids': self.ids[:1], 'changes': changes}, format='json')
+            self.assertEqual(response.status_code, 400, changes)
+        self.assertFalse(Defect.objects.exclude(status='Open', priority='High', severity='Minor').exists())
+
+
+class DefectHistoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('qa', 'qa@example.com', 'pw')
+        cls.profile = Profile.objects.create(auth_user=cls.user, role='QA')
+        team = Team.objects.create(name='Team', description='')
+        project = Project.objects.create(name='Project', description='', status='Pending', team=team)
+        cls.defect = Defect.objects.create(
+            title='Defect', description='', status='Open', priority='High', severity='Minor', project=project,
+            metadata={'tags': ['ui']},
+        )
+        cls.url = f'/teams/{team.id}/projects/{project.id}/defects/{cls.defect.id}/'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_one_row_per_changed_field(self):
+        response = self.client.patch(self.url, {
+            'title': 'Defect', 'status': 'Closed', 'priority': 'Low', 'tags': ['ui', 'login'],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(DefectHistory.objects.filter(defect=self.defect).values_list('field_name', 'old_value', 'new_value', 'changed_by_profile')),
+            [
+                ('metadata.tags', '["ui"]', '["ui", "login"]', self.profile.id),
+                ('priority', 'High', 'Low', self.profile.id),
+                ('status', 'Open', 'Closed', self.profile.id),
+            ],
+        )
+
+    def test_history_pages(self):
+        created_at = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+        for i in range(5):
+            row = DefectHistory.objects.create(defect=self.defect, field_name='status', old_value=str(i), new_value=str(i + 1))
+            DefectHistory.objects.filter(id=row.id).update(created_at=created_at + datetime.timedelta(minutes=i))
+
+        values, cursor = [], None
+        while True:
+            response = self.client.get(f'{self.url}history/', {'page_size': 2, **({'cursor': cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200)
+            values += [row['new_value'] for row in response.json()['results']]
+            cursor = response.json()['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(values, ['5', '4', '3', '2', '1'])
+
+
+class TestCaseImportExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        team = Team.objects.create(name='Team', description='')
+        project = Project.objects.create(name='Project', description='', status='Pending', team=team)
+        cls.source, cls.target = (
+            TestSuite.objects.create(name=name, description='', project=project) for name in ('Source', 'Target')
+        )
+        for i in range(5):
+            test_case = Case.objects.create(
+                title=f'Case {i}', description=f'Line one\nline "two" of {i}', priority='High', type='Functional',
+                status='Draft', suite=cls.source, metadata={'tags': ['a', str(i)]}, generation_query='login' if i % 2 else None,
+            )
+            TestStep.objects.bulk_create([
+                TestStep(test_case=test_case, order_number=order, action=f'Action {i}.{order}', expected_result=f'Result, {order}')
+                for order in range(1, i + 1)
+            ])
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def get_cases(self, suite):
+        return [
+            (case.title, case.description, case.priority, case.type, case.status, case.metadata, case.generation_query,
+             list(case.steps.order_by('order_number').values_list('order_number', 'action', 'expected_result')))
+            for case in Case.objects.filter(suite=suite).order_by('title')
+        ]
+
+    def export(self, format_type):
+        path = f'{self.directory}/export.{format_type}'
+        with open(path, 'w', encoding='utf-8', newline='') as target:
+            target.writelines(iter_export(Case.objects.filter(suite=self.source), format_type))
+        return TestCaseImport.objects.create(suite=self.target, source_path=path, format_type=format_type)
+
+    def test_round_trip(self):
+        for format_type in EXPORT_FORMATS:
+            with self.subTest(format_type):
+                Case.objects.filter(suite=self.target).delete()
+                test_case_import = TestCaseImporter(self.export(format_type)).run()
+                self.assertEqual(test_case_import.status, 'Completed')
+                self.assertEqual(test_case_import.errors, [])
+                self.assertEqual(self.get_cases(self.target), self.get_cases(self.source))
+
+    def test_resume(self):
+        test_case_import = self.export('jsonl')
+        self.assertEqual(TestCaseImporter(test_case_import, batch_size=2).run(max_records=3).status, 'Pending')
+        self.assertEqual(Case.objects.filter(suite=self.target).count(), 3)
+
+        # A run that dies after its first batch leaves that batch committed
+        importer = TestCaseImporter(test_case_import, batch_size=1)
+        write_batch = importer.write_batch
+
+        def fail_after_one(batch, start):
+            if start > 3:
+                raise RuntimeError("Worker died")
+            write_batch(batch, start)
+
+        importer.write_batch = fail_after_one
+        with self.assertRaises(RuntimeError):
+            importer.run()
+        test_case_import.refresh_from_db()
+        self.assertEqual((test_case_import.status, test_case_import.records_processed), ('Failed', 4))
+
+        test_case_import = TestCaseImporter(test_case_import, batch_size=2).run()
+        self.assertEqual(test_case_import.status, 'Completed')
+        self.assertEqual((test_case_import.records_processed, test_case_import.cases_created), (5, 5))
+        self.assertEqual(self.get_cases(self.target), self.get_cases(self.source))
+
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'quota-tests'}}
+QUOTAS = {'ENABLED': True, 'USER_RATE': 1, 'USER_BURST': 1, 'USER_CONCURRENCY': 1}
+
+
+@override_settings(CACHES=LOCMEM_CACHE, AI_QUOTAS=QUOTAS)
+class QuotaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('qa', 'qa@example.com', 'pw')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_exhausted_bucket(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        # A field the generator knows nothing about, so the model would be asked
+        body = {'template': {'fields': [{'name': 'widget', 'type': 'blob'}]}, 'count': 1}
+
+        async def suggest_examples(view, test_case, fields):
+            return {'widget': ['a', 'b']}
+
+        with mock.patch.object(GenerateTestDataView, 'suggest_examples', suggest_examples):
+            self.assertEqual(client.post('/test-data/generate/', body, format='json').status_code, 200)
+            response = client.post('/test-data/generate/', body, format='json')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(float(response['Retry-After']), 0)
+
+    def test_failed_call_gives_back_its_slot(self):
+        request = APIRequestFactory().post('/')
+        request.user, request.auth = self.user, None
+        key = f'quota:user:{self.user.pk}:inflight'
+
+        async def call_upstream():
+            async with quotas.limit(request):
+                self.assertEqual(cache.get(key), 1)
+                raise RuntimeError("Upstream failed")
+
+        with self.assertRaises(RuntimeError):
+            async_to_sync(call_upstream)()
+        self.assertEqual(cache.get(key), 0)
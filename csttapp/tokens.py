@@ -0,0 +1,30 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import serializers, tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import RevokedToken
+
+
+class RefreshToken(tokens.RefreshToken):
+    """
+    simplejwt's refresh token, blacklisted through RevokedToken rather than
+    the token_blacklist app, which also keeps a row for every token issued
+    """
+    def verify(self, *args, **kwargs):
+        # Signature and expiry first, they don't need the database
+        super().verify(*args, **kwargs)
+        self.check_blacklist()
+
+    def check_blacklist(self):
+        if RevokedToken.is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        if not RevokedToken.revoke(self.payload[api_settings.JTI_CLAIM], self.payload['exp']):
+            # Another request refreshed with this token in the meantime
+            raise TokenError(_("Token is blacklisted"))
+
+
+class TokenRefreshSerializer(serializers.TokenRefreshSerializer):
+    token_class = RefreshToken
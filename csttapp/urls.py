@@ -10,6 +10,7 @@ urlpatterns = [
     path('login/', views.LoginView.as_view(), name='login'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('verify/', views.VerifyTokenView.as_view(), name='verify-token'),
+    path('.well-known/jwks.json', views.jwks_view, name='jwks'),
     path('save-test-case/', views.SaveTestCaseView.as_view(), name='save_test_case'),
     path('save-test-steps/', views.SaveTestStepsView.as_view(), name='save_test_steps'),
     path("teams/<uuid:team_id>/generate-invite/", views.GenerateInviteView.as_view(), name="generate_invite"),
@@ -25,6 +26,11 @@ urlpatterns = [
     path('projects/<uuid:project_id>/test-suites/', views.TestSuiteListView.as_view(), name='test_suites_list'),
     path('projects/<uuid:project_id>/test-suites/create/', views.CreateTestSuiteView.as_view(), name='create_test_suite'),
     path('test-suites/<uuid:test_suite_id>/test-cases/', views.TestSuiteTestCasesView.as_view(), name='test_suite_test_cases'),
+    path('test-suites/<uuid:test_suite_id>/test-cases/import/', views.ImportTestCasesView.as_view(), name='import_test_cases'),
+    path('test-suites/<uuid:test_suite_id>/test-cases/export/', views.ExportTestCasesView.as_view(), name='export_suite_test_cases'),
+    path('projects/<uuid:project_id>/test-cases/export/', views.ExportTestCasesView.as_view(), name='export_project_test_cases'),
+    path('test-case-imports/<uuid:import_id>/', views.TestCaseImportDetailView.as_view(), name='test_case_import_detail'),
+    path('test-case-imports/<uuid:import_id>/resume/', views.ResumeTestCaseImportView.as_view(), name='resume_test_case_import'),
     path('test-cases/<uuid:test_case_id>/', views.TestCaseDetailView.as_view(), name='test_case_detail'),
     path('test-cases/<uuid:test_case_id>/edit/', views.EditTestCaseView.as_view(), name='edit_test_case'),
     path('test-cases/<uuid:test_case_id>/steps/batch/', views.BatchUpdateTestStepsView.as_view(), name='batch_update_test_steps'),
@@ -32,11 +38,17 @@ urlpatterns = [
     path('test-data/generate/', views.GenerateTestDataView.as_view(), name='generate_test_data'),
     path('test-data/save/', views.SaveTestDataView.as_view(), name='save_test_data'),
     path('test-data/', views.TestDataListView.as_view(), name='test_data_list'),
+    path('test-data/<uuid:test_data_id>/datasets/', views.TestDataDatasetsView.as_view(), name='test_data_datasets'),
+    path('test-data/<uuid:test_data_id>/datasets/<uuid:dataset_id>/', views.TestDataDatasetDetailView.as_view(), name='test_data_dataset_detail'),
+    path('datasets/<uuid:dataset_id>/records/', views.DatasetRecordsView.as_view(), name='dataset_records'),
     path('teams/<uuid:team_id>/projects/<uuid:project_id>/defects/create/', views.CreateDefectView.as_view(), name='create_defect'),
     path('teams/<uuid:team_id>/projects/<uuid:project_id>/defects/', views.DefectsListView.as_view(), name='defects_list'),
+    path('teams/<uuid:team_id>/projects/<uuid:project_id>/defects/bulk/', views.DefectBulkUpdateView.as_view(), name='defects_bulk_update'),
     path('teams/<uuid:team_id>/projects/<uuid:project_id>/defects/<uuid:defect_id>/', views.DefectDetailView.as_view(), name='defect_detail'),
     path('teams/<uuid:team_id>/projects/<uuid:project_id>/defects/<uuid:defect_id>/update/', views.DefectDetailView.as_view(),
     name='defect_update'),
+    path('teams/<uuid:team_id>/projects/<uuid:project_id>/defects/<uuid:defect_id>/history/', views.DefectHistoryView.as_view(), name='defect_history'),
     path('projects/<uuid:project_id>/analytics/', views.ProjectAnalyticsView.as_view(), name='project_analytics'),
     path('projects/<uuid:project_id>/dashboard/', views.ProjectDashboardView.as_view(), name='project_dashboard'),
+    path('metrics/', views.metrics_view, name='metrics'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
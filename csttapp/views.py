@@ -1,39 +1,89 @@
 import os
+import asyncio
 import json
-from openai import OpenAI
+import logging
+import uuid
+import weakref
+from openai import AsyncOpenAI
+from asgiref.sync import sync_to_async
 from django.db.models import Count, Avg, F, Q
 from django.utils import timezone
 from datetime import timedelta
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.core.files.storage import default_storage
+from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
-from django.utils.crypto import get_random_string
+from django.views.decorators.http import require_safe
+from django.utils.cache import patch_cache_control
+from django.utils.crypto import constant_time_compare, get_random_string
 from django.utils.timezone import now, timedelta
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
-from django.shortcuts import get_object_or_404
-from django.db.models import Q
-from .models import Team, TeamInvite, TeamMember, Profile, Project, TestSuite, TestCase, TestStep, TestData, Defect, AnalyticsService, TestExecution
+from django.shortcuts import aget_object_or_404, get_object_or_404
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Q, Subquery, Prefetch
+from django.db import transaction
+from .models import Team, TeamInvite, TeamMember, Profile, Project, TestSuite, TestCase, TestStep, TestData, Defect, DefectHistory, AnalyticsService, TeamRosterService, TestExecution, TestCaseImport, GeneratedDataset
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, SAFE_METHODS
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny
-from rest_framework_simplejwt.tokens import RefreshToken
-from .serializers import UserRegistrationSerializer, UserLoginSerializer, TestCaseSerializer, TestStepBatchSerializer, TeamSerializer, ProjectSerializer, TestSuiteSerializer, TestStepSerializer, DefectSerializer, DefectDetailSerializer
+from .serializers import UserRegistrationSerializer, UserLoginSerializer, TestCaseSerializer, TestStepBatchSerializer, TeamSerializer, ProjectSerializer, TestSuiteSerializer, TestStepSerializer, DefectSerializer, DefectDetailSerializer, DefectListSerializer, DefectHistorySerializer, DefectBulkUpdateSerializer, TestCaseImportSerializer, GeneratedDatasetSerializer
+from .pagination import KeysetPagination
+from .streaming import StreamingJSONResponse, get_stream_format, iter_serialized
+from .fast_serializers import get_fast_serializer
+from .datagen import MAX_RECORDS, OUTPUT_FORMATS, OUTPUT_CONTENT_TYPES, TestDataGenerator
+from .datastore import DatasetStore, TemplateStore
+from .importers import IMPORT_FORMATS, ImportInProgress, TestCaseImporter, detect_format
+from .exporters import EXPORT_FORMATS, EXPORT_CONTENT_TYPES, iter_export
+from .routers import use_replica
+from .tokens import RefreshToken
+from . import quotas
+from .authentication import users_by_email
+from .jwt_keys import JWKS_MAX_AGE, get_key_ring
+from .async_views import AsyncAPIView, JSONResponse, aiter_sync
+from .metrics import achat_completion, is_enabled as metrics_enabled, registry as metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# An AsyncOpenAI client keeps a connection pool tied to the event loop it
+# is used on, and is slow to build, so each loop gets one
+_openai_clients = weakref.WeakKeyDictionary()
+
+
+def get_openai_client():
+    loop = asyncio.get_running_loop()
+    client = _openai_clients.get(loop)
+    if client is None:
+        client = _openai_clients[loop] = AsyncOpenAI()
+    return client
+
+
+class ReadReplicaMixin:
+    """
+    Safe requests to the view read from a replica when one is configured,
+    see csttapp.routers
+    """
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            use_replica(request.user)
 
 
 class RegisterView(APIView):
     permission_classes = (AllowAny,)
 
     def post(self, request):
-        print("Registering...: ", request.data)
+        # Only the username (the email), the rest of the payload is personal details
+        logger.debug("Registering user %s", request.data.get('email'))
         serializer = UserRegistrationSerializer(data=request.data)
         
-        print("Serialized!")
         if serializer.is_valid():
             user = serializer.save()
-            print("user saved")
+            logger.info("Registered user %s", user.id)
             # Generate tokens
             
             refresh = RefreshToken.for_user(user)
@@ -55,28 +105,23 @@ class LoginView(APIView):
 
     def post(self, request):
         serializer = UserLoginSerializer(data=request.data)
-        print("Login Serialized!")
         if serializer.is_valid():
             email = serializer.validated_data['email']
             password = serializer.validated_data['password']
             
-            # Get user by email
+            # Get user by email, whatever its case
             try:
-                print("Getting user...")
-                user = User.objects.get(email=email)
-                print("Got the user!", user)
+                user = users_by_email(email).get()
             except User.DoesNotExist:
                 return Response({
                     'error': 'Invalid email or password'
                 }, status=status.HTTP_401_UNAUTHORIZED)
             
             # Authenticate using username (email) and password
-            print("Authenticating the user!")
-            user = authenticate(username=user.username, password=password)
-            
-            print("User authenticated!", user)
+            user = authenticate(request, username=user.username, password=password)
             
             if user:
+                logger.info("User %s logged in", user.id)
                 refresh = RefreshToken.for_user(user)
                 return Response({
                     'token': str(refresh.access_token),
@@ -88,6 +133,7 @@ class LoginView(APIView):
                     }
                 })
             
+            logger.info("Failed login attempt")
             return Response({
                 'error': 'Invalid email or password'
             }, status=status.HTTP_401_UNAUTHORIZED)
@@ -155,7 +201,7 @@ class JoinTeamView(APIView):
         TeamMember.objects.create(team=invite.team, profile=profile, role="Member")
         return Response({"message": f"You have successfully joined {invite.team.name}"})
 
-class MemberTeamsView(APIView):
+class MemberTeamsView(ReadReplicaMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -199,23 +245,7 @@ class CreateTeamView(APIView):
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-class TeamProjectsView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request, team_id):
-        try:
-            # Ensure the team exists
-            team = Team.objects.get(id=team_id)
-
-            # Fetch projects related to the team
-            projects = Project.objects.filter(team=team, is_active=True)
-            serializer = ProjectSerializer(projects, many=True)
-
-            return Response(serializer.data, status=200)
-        except Team.DoesNotExist:
-            return Response({"error": "Team not found."}, status=404)
-
-class LatestTeamsView(APIView):
+class LatestTeamsView(ReadReplicaMixin, APIView):
     
     permission_classes = [IsAuthenticated]
 
@@ -243,13 +273,12 @@ class TeamDetailsView(APIView):
         serializer = TeamSerializer(team)
         return Response(serializer.data)
 
-class TeamProjectsView(APIView):
+class TeamProjectsView(ReadReplicaMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, team_id):
         projects = Project.objects.filter(team_id=team_id)
-        serializer = ProjectSerializer(projects, many=True)
-        return Response(serializer.data)
+        return Response(get_fast_serializer(ProjectSerializer).serialize(projects))
 
 class CreateProjectView(APIView):
     permission_classes = [IsAuthenticated]
@@ -258,9 +287,8 @@ class CreateProjectView(APIView):
         try:
             # Ensure the team exists and the user has permission
             team = Team.objects.get(id=team_id)
-            print(team_id)
             # Validate and save the project data
-            print("data: ", request.data)
+            logger.debug("Creating project for team %s", team_id, extra={'payload': request.data, 'sample': 'payload'})
             serializer = ProjectSerializer(data=request.data)
             if serializer.is_valid():
                 serializer.save(team=team)  # Link the project to the team
@@ -280,14 +308,13 @@ class ProjectDetailView(APIView):
         except Project.DoesNotExist:
             return Response({"error": "Project not found."}, status=404)
 
-class TestSuiteListView(APIView):
+class TestSuiteListView(ReadReplicaMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, project_id):
         project = get_object_or_404(Project, id=project_id, is_active=True)
         test_suites = TestSuite.objects.filter(project=project, is_active=True)
-        serializer = TestSuiteSerializer(test_suites, many=True)
-        return Response(serializer.data)
+        return Response(get_fast_serializer(TestSuiteSerializer).serialize(test_suites))
 
 class CreateTestSuiteView(APIView):
     permission_classes = [IsAuthenticated]
@@ -300,108 +327,119 @@ class CreateTestSuiteView(APIView):
             return Response(serializer.data, status=201)
         return Response(serializer.errors, status=400)
 
-class TestSuiteTestCasesView(APIView):
+class TestSuiteTestCasesView(ReadReplicaMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, test_suite_id):
         test_suite = get_object_or_404(TestSuite, id=test_suite_id, is_active=True)
         test_cases = TestCase.objects.filter(suite=test_suite, is_active=True)
-        serializer = TestCaseSerializer(test_cases, many=True)
-        return Response(serializer.data)
+        return Response(get_fast_serializer(TestCaseSerializer).serialize(test_cases))
 
 @csrf_exempt
-def test_cases(request):
-    if request.method == 'POST':
-        try:
-            client = OpenAI()
-            
-            # Handle multipart form data
-            content = request.POST.get('content', '')
-            project_description = request.POST.get('project_description', '')
-            input_type = request.POST.get('input_type', 'text')
-            image = request.FILES.get('image')
-            
-            # Prepare content based on input type
-            if input_type == 'image' and image:
-                # Convert image to base64 if needed
-                import base64
-                image_content = base64.b64encode(image.read()).decode('utf-8')
-                content = f"[Image Description] This is an image upload. Please analyze this image and generate appropriate test cases."
-                # Add image to the messages for vision model
-                messages = [
-                    {
-                        "role": "system",
-                        "content": "You are a professional test case generator. You will receive images or text content along with project descriptions to generate comprehensive test cases."
-                    },
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": f"Project Context: {project_description}\n\nPlease generate test cases based on this image."
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{image_content}"
-                                }
-                            }
-                        ]
-                    }
-                ]
-                
-                print(messages)
-                # Use GPT-4 Vision for image analysis
-                response = client.chat.completions.create(
-                    model="gpt-4o",
-                    messages=messages,
-                    max_tokens=1000,
-                )
-                # Extract the response and feed it to the test case generation
-                content = response.choices[0].message.content
-            
-            # Define function schema
-            functions = [
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "create_test_case",
-                        "description": "Create a test case object from the given parameters",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "test_case_description": {
-                                    "type": "string",
-                                    "description": "Description of the test case"
-                                },
-                                "preconditions": {
-                                    "type": "string",
-                                    "description": "Preconditions for the test case"
-                                },
-                                "test_steps": {
-                                    "type": "string",
-                                    "description": "Bullet points steps to perform in the test case"
-                                },
-                                "expected_results": {
-                                    "type": "string",
-                                    "description": "Expected results of the test case"
-                                }
-                            },
-                            "required": ["test_case_description", "preconditions", "test_steps", "expected_results"]
-                        }
-                    }
-                }
-            ]
-            
-            # Create messages including project description
+async def test_cases(request):
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid request method'}, status=405)
+
+    # Images take a second call, to describe them
+    image_input = request.POST.get('input_type') == 'image' and 'image' in request.FILES
+    try:
+        async with quotas.limit(request, upstream_calls=2 if image_input else 1):
+            return await generate_test_case(request)
+    except quotas.QuotaExceeded as e:
+        return quotas.exceeded_response(e)
+
+async def generate_test_case(request):
+    try:
+        client = get_openai_client()
+        
+        # Handle multipart form data
+        content = request.POST.get('content', '')
+        project_description = request.POST.get('project_description', '')
+        input_type = request.POST.get('input_type', 'text')
+        image = request.FILES.get('image')
+        
+        # Prepare content based on input type
+        if input_type == 'image' and image:
+            # Convert image to base64 if needed
+            import base64
+            image_content = base64.b64encode(image.read()).decode('utf-8')
+            content = f"[Image Description] This is an image upload. Please analyze this image and generate appropriate test cases."
+            # Add image to the messages for vision model
             messages = [
                 {
                     "role": "system",
-                    "content": "You are a professional test case generator. Generate detailed test cases based on the provided content and project context."
+                    "content": "You are a professional test case generator. You will receive images or text content along with project descriptions to generate comprehensive test cases."
                 },
                 {
                     "role": "user",
-                    "content": f"""
+                    "content": [
+                        {
+                            "type": "text",
+                            "text": f"Project Context: {project_description}\n\nPlease generate test cases based on this image."
+                        },
+                        {
+                            "type": "image_url",
+                            "image_url": {
+                                "url": f"data:image/jpeg;base64,{image_content}"
+                            }
+                        }
+                    ]
+                }
+            ]
+            
+            logger.debug("Generating test cases from an image", extra={'messages': messages, 'sample': 'payload'})
+            # Use GPT-4 Vision for image analysis
+            response = await achat_completion(
+                client,
+                model="gpt-4o",
+                messages=messages,
+                max_tokens=1000,
+            )
+            # Extract the response and feed it to the test case generation
+            content = response.choices[0].message.content
+        
+        # Define function schema
+        functions = [
+            {
+                "type": "function",
+                "function": {
+                    "name": "create_test_case",
+                    "description": "Create a test case object from the given parameters",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "test_case_description": {
+                                "type": "string",
+                                "description": "Description of the test case"
+                            },
+                            "preconditions": {
+                                "type": "string",
+                                "description": "Preconditions for the test case"
+                            },
+                            "test_steps": {
+                                "type": "string",
+                                "description": "Bullet points steps to perform in the test case"
+                            },
+                            "expected_results": {
+                                "type": "string",
+                                "description": "Expected results of the test case"
+                            }
+                        },
+                        "required": ["test_case_description", "preconditions", "test_steps", "expected_results"]
+                    }
+                }
+            }
+        ]
+        
+        # Create messages including project description
+        messages = [
+            {
+                "role": "system",
+                "content": "You are a professional test case generator. Generate detailed test cases based on the provided content and project context."
+            },
+            {
+                "role": "user",
+                "content": f"""
                     Project Description:
                     {project_description}
                     
@@ -409,72 +447,71 @@ def test_cases(request):
                     {content}
                     
                     Please analyze both the project context and the provided content to generate comprehensive test cases."""
-                }
-            ]
+            }
+        ]
+        
+        logger.debug("Generating test cases", extra={'messages': messages, 'sample': 'payload'})
+        # Make the API call to OpenAI for test case generation
+        try:
+            response = await achat_completion(
+                client,
+                model="gpt-4o",
+                messages=messages,
+                tools=functions,
+                tool_choice={"type": "function", "function": {"name": "create_test_case"}}
+            )
+        except Exception as openai_error:
+            logger.error("OpenAI API error", exc_info=True)
+            return JsonResponse({'error': str(openai_error)}, status=500)
+        
+        # Extract the function call and arguments
+        assistant_message = response.choices[0].message
+        
+        if assistant_message.tool_calls:
+            tool_call = assistant_message.tool_calls[0]
             
-            print(messages)
-            # Make the API call to OpenAI for test case generation
             try:
-                response = client.chat.completions.create(
-                    model="gpt-4o",
-                    messages=messages,
-                    tools=functions,
-                    tool_choice={"type": "function", "function": {"name": "create_test_case"}}
-                )
-            except Exception as openai_error:
-                print("OpenAI API Error:", str(openai_error))
-                return JsonResponse({'error': str(openai_error)}, status=500)
-            
-            # Extract the function call and arguments
-            assistant_message = response.choices[0].message
-            
-            if assistant_message.tool_calls:
-                tool_call = assistant_message.tool_calls[0]
-                
-                try:
-                    arguments = json.loads(tool_call.function.arguments)
-                except json.JSONDecodeError as json_error:
-                    print("JSON decode error:", str(json_error))
-                    return JsonResponse({'error': 'Failed to parse function arguments'}, status=500)
-                
-                # Create the test case object with generation source
-                test_case = {
-                    'test_case_description': arguments.get('test_case_description'),
-                    'preconditions': arguments.get('preconditions'),
-                    'test_steps': arguments.get('test_steps'),
-                    'expected_results': arguments.get('expected_results'),
-                    'generation_query': None,
-                    'input_image_data': None,
-                    'input_image_type': None
-                }
+                arguments = json.loads(tool_call.function.arguments)
+            except json.JSONDecodeError as json_error:
+                logger.warning("Could not parse tool call arguments: %s", json_error)
+                return JsonResponse({'error': 'Failed to parse function arguments'}, status=500)
+            
+            # Create the test case object with generation source
+            test_case = {
+                'test_case_description': arguments.get('test_case_description'),
+                'preconditions': arguments.get('preconditions'),
+                'test_steps': arguments.get('test_steps'),
+                'expected_results': arguments.get('expected_results'),
+                'generation_query': None,
+                'input_image_data': None,
+                'input_image_type': None
+            }
 
-                # Add the appropriate generation source based on input type
-                if input_type == 'image' and image:
-                    # Instead of saving the file, we'll pass the image data to the frontend
-                    # This allows the frontend to handle the file upload when saving the test case
-                    import base64
-                    from django.core.files.base import ContentFile
-                    
-                    # Get the image data and type
-                    image_data = base64.b64encode(image.read()).decode('utf-8')
-                    image_type = image.content_type
-                    
-                    test_case['input_image_data'] = image_data
-                    test_case['input_image_type'] = image_type
-                else:
-                    # Store the generation query (text or code)
-                    test_case['generation_query'] = content
+            # Add the appropriate generation source based on input type
+            if input_type == 'image' and image:
+                # Instead of saving the file, we'll pass the image data to the frontend
+                # This allows the frontend to handle the file upload when saving the test case
+                import base64
+                from django.core.files.base import ContentFile
                 
-                print("Generated test case:", test_case)
-                return JsonResponse(test_case)
-            else:
-                return JsonResponse({'error': 'No function call in response'}, status=500)
+                # Get the image data and type
+                image_data = base64.b64encode(image.read()).decode('utf-8')
+                image_type = image.content_type
                 
-        except Exception as e:
-            print("Exception occurred:", str(e))
-            return JsonResponse({'error': str(e)}, status=500)
-    else:
-        return JsonResponse({'error': 'Invalid request method'}, status=405)
+                test_case['input_image_data'] = image_data
+                test_case['input_image_type'] = image_type
+            else:
+                # Store the generation query (text or code)
+                test_case['generation_query'] = content
+            
+            logger.debug("Generated test case", extra={'test_case': test_case, 'sample': 'payload'})
+            return JsonResponse(test_case)
+        else:
+            return JsonResponse({'error': 'No function call in response'}, status=500)
+            
+    except Exception as e:
+        logger.exception("Test case generation failed")
+        return JsonResponse({'error': str(e)}, status=500)
     
 class SaveTestCaseView(APIView):
     def post(self, request):
@@ -483,10 +520,12 @@ class SaveTestCaseView(APIView):
             input_image_data = request.data.get('input_image_data')
             input_image_type = request.data.get('input_image_type')
             
-            print("Received data:")
-            print("Image data length:", len(input_image_data) if input_image_data else 0)
-            print("Image type:", input_image_type)
-            print("Request data keys:", request.data.keys())
+            logger.debug("Saving test case", extra={
+                'payload': request.data,
+                'image_length': len(input_image_data) if input_image_data else 0,
+                'image_type': input_image_type,
+                'sample': 'payload',
+            })
             
             # Create a copy of the data to modify
             test_case_data = request.data.copy()
@@ -504,9 +543,7 @@ class SaveTestCaseView(APIView):
                             # Split on ;base64, and take the second part
                             input_image_data = input_image_data.split(';base64,')[1]
                         
-                        print("Attempting to decode base64 data...")
                         image_data = base64.b64decode(input_image_data)
-                        print("Successfully decoded base64 data, length:", len(image_data))
                         
                         # Create a unique filename using UUID
                         import uuid
@@ -518,23 +555,22 @@ class SaveTestCaseView(APIView):
                         
                         # Add the image file to the test case data
                         test_case_data['input_image'] = image_file
-                        print(f"Created image file: {filename}")
+                        logger.debug("Created image file %s (%d bytes)", filename, len(image_data))
                     else:
-                        print("input_image_data is not a string:", type(input_image_data))
-                except Exception as img_error:
-                    print("Error processing image:", str(img_error))
+                        logger.warning("input_image_data is not a string: %s", type(input_image_data).__name__)
+                except Exception:
+                    logger.warning("Could not decode the test case image", exc_info=True)
                     raise
             
-            print("Final test_case_data keys:", test_case_data.keys())
             serializer = TestCaseSerializer(data=test_case_data)
             
             if not serializer.is_valid():
-                print("Serializer errors:", serializer.errors)
+                logger.info("Invalid test case", extra={'errors': serializer.errors})
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
             # Save the test case with the proper file handling
             test_case = serializer.save(created_by_profile=request.user.profile)
-            print("Successfully saved test case with ID:", test_case.id)
+            logger.info("Saved test case %s", test_case.id)
             
             return Response(
                 {
@@ -545,10 +581,7 @@ class SaveTestCaseView(APIView):
             )
             
         except Exception as e:
-            # Log the error for debugging
-            import traceback
-            print("Error saving test case:", str(e))
-            print(traceback.format_exc())
+            logger.exception("Error saving test case")
             return Response(
                 {"error": "Failed to save test case", "details": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -557,7 +590,6 @@ class SaveTestCaseView(APIView):
 class SaveTestStepsView(APIView):
     def post(self, request):
         serializer = TestStepBatchSerializer(data=request.data)
-        print("")
         if serializer.is_valid():
             serializer.save()
             return Response({"message": "Test steps saved successfully"}, status=status.HTTP_201_CREATED)
@@ -606,7 +638,11 @@ class BatchUpdateTestStepsView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, test_case_id):
-        """Get or update test steps for a test case"""
+        """
+        Get or update test steps for a test case. Incoming steps are merged
+        into the existing ones by id or order number; pass mode=replace to
+        delete and recreate them all.
+        """
         try:
             # If no steps data provided, return current steps
             if not request.data:
@@ -614,6 +650,7 @@ class BatchUpdateTestStepsView(APIView):
                     test_case_id=test_case_id
                 ).order_by('order_number')
                 serializer = TestStepSerializer(test_steps, many=True)
+                logger.debug("Returning steps for test case %s", test_case_id, extra={'steps': serializer.data, 'sample': 'payload'})
                 return Response(serializer.data, status=status.HTTP_200_OK)
 
             # Validate the test case exists
@@ -627,25 +664,27 @@ class BatchUpdateTestStepsView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Add test_case reference to each step
+            # The test case is applied once when saving, not validated per step
             for step in steps_data:
-                step['test_case'] = test_case_id
+                step.pop('test_case', None)
 
             # Validate steps data
             serializer = TestStepBatchSerializer(data={'steps': steps_data})
             if not serializer.is_valid():
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-            # Delete existing steps
-            TestStep.objects.filter(test_case=test_case).delete()
-
-            # Create new steps
-            serializer.save()
+            if request.data.get('mode') == 'replace':
+                # Delete existing steps and create new ones
+                with transaction.atomic():
+                    TestStep.objects.filter(test_case=test_case).delete()
+                    test_steps = sorted(serializer.save(test_case=test_case)['steps'], key=lambda step: step.order_number)
+            else:
+                # Only touch the steps that were added, changed or removed
+                test_steps = TestStepBatchSerializer.merge_steps(
+                    test_case, serializer.validated_data['steps']
+                )
             
             # Return updated steps
-            test_steps = TestStep.objects.filter(
-                test_case=test_case
-            ).order_by('order_number')
             response_serializer = TestStepSerializer(test_steps, many=True)
             
             return Response(response_serializer.data, status=status.HTTP_200_OK)
@@ -655,138 +694,158 @@ class BatchUpdateTestStepsView(APIView):
                 {"error": "Test case not found"},
                 status=status.HTTP_404_NOT_FOUND
             )
+        except ValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response(
                 {"error": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-class TestCaseDetailView(APIView):
+class ProjectTestCasesView(ReadReplicaMixin, APIView):
+    def get(self, request, project_id):
+        """
+        Get all test cases under all test suites for a specific project.
+        Pass `stream=json` or `stream=ndjson` to stream large projects.
+        """
+        # Ensure the project exists
+        project = get_object_or_404(Project, id=project_id, is_active=True)
+        
+        # Fetch all active test suites for the project
+        test_suites = TestSuite.objects.filter(project=project, is_active=True)
+        
+        # Fetch all active test cases for the retrieved test suites
+        test_cases = TestCase.objects.filter(suite__in=test_suites, is_active=True)
+
+        # Rows are read with values_list(), steps are loaded once per chunk
+        fast_serializer = get_fast_serializer(TestCaseSerializer)
+        stream_format = get_stream_format(request)
+        if stream_format:
+            return StreamingJSONResponse(fast_serializer.iter_serialize(test_cases), stream_format)
+        
+        # Serialize the test cases
+        return Response(fast_serializer.serialize(test_cases), status=status.HTTP_200_OK)
+    
+class ImportTestCasesView(APIView):
     permission_classes = [IsAuthenticated]
+    # Records imported per request, so a request doesn't run for minutes
+    MAX_REQUEST_RECORDS = 5000
 
-    def get(self, request, test_case_id):
-        """Get test case details"""
-        try:
-            test_case = get_object_or_404(TestCase, id=test_case_id, is_active=True)
-            serializer = TestCaseSerializer(test_case)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        except TestCase.DoesNotExist:
+    def post(self, request, test_suite_id):
+        """
+        Import test cases and their steps from an uploaded CSV, JSON Lines
+        or Excel file. The file is kept so a failed import can be resumed.
+        """
+        suite = get_object_or_404(TestSuite, id=test_suite_id, is_active=True)
+
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({"error": "No file uploaded"}, status=status.HTTP_400_BAD_REQUEST)
+
+        format_type = request.data.get('file_format') or detect_format(upload.name)
+        if format_type not in IMPORT_FORMATS:
             return Response(
-                {"error": "Test case not found"},
-                status=status.HTTP_404_NOT_FOUND
+                {"error": f"Unsupported file format, expected one of {IMPORT_FORMATS}"},
+                status=status.HTTP_400_BAD_REQUEST
             )
 
-class EditTestCaseView(APIView):
-    permission_classes = [IsAuthenticated]
+        # Stream the upload to disk, it is parsed incrementally from there
+        name = default_storage.save(f"imports/{uuid.uuid4()}.{format_type}", upload)
+        test_case_import = TestCaseImport.objects.create(
+            suite=suite,
+            created_by_profile=request.user.profile,
+            source_path=default_storage.path(name),
+            format_type=format_type
+        )
 
-    def put(self, request, test_case_id):
-        """Update test case details"""
+        return self.run_import(test_case_import, status.HTTP_201_CREATED)
+
+    @classmethod
+    def run_import(cls, test_case_import, success_status):
+        """
+        Import up to MAX_REQUEST_RECORDS records within the request. Larger
+        files are imported a part per request: the response is 202 and the
+        rest is imported by resuming, or with `manage.py import_test_cases --resume`.
+        """
         try:
-            test_case = get_object_or_404(TestCase, id=test_case_id, is_active=True)
-            print(test_case_id)
-            serializer = TestCaseSerializer(
-                test_case,
-                data=request.data,
-                partial=True  # Allow partial updates
-            )
-            
-            if serializer.is_valid():
-                serializer.save()
-                return Response(serializer.data, status=status.HTTP_200_OK)
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-            
-        except TestCase.DoesNotExist:
+            test_case_import = TestCaseImporter(test_case_import).run(max_records=cls.MAX_REQUEST_RECORDS)
+        except ImportInProgress as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+        except Exception as e:
             return Response(
-                {"error": "Test case not found"},
-                status=status.HTTP_404_NOT_FOUND
+                {
+                    "error": "Import failed, it can be resumed",
+                    "details": str(e),
+                    "import": TestCaseImportSerializer(TestCaseImport.objects.get(id=test_case_import.id)).data,
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+        if test_case_import.status == 'Pending':
+            return Response(TestCaseImportSerializer(test_case_import).data, status=status.HTTP_202_ACCEPTED)
+        return Response(TestCaseImportSerializer(test_case_import).data, status=success_status)
 
-class BatchUpdateTestStepsView(APIView):
+class TestCaseImportDetailView(APIView):
     permission_classes = [IsAuthenticated]
 
-    def post(self, request, test_case_id):
-        """Get or update test steps for a test case"""
-        try:
-            # If no steps data provided, return current steps
-            if not request.data:
-                test_steps = TestStep.objects.filter(
-                    test_case_id=test_case_id
-                ).order_by('order_number')
-                serializer = TestStepSerializer(test_steps, many=True)
-                print("Returning steps: ", serializer.data)
-                return Response(serializer.data, status=status.HTTP_200_OK)
+    def get(self, request, import_id):
+        """Get the progress of a test case import"""
+        test_case_import = get_object_or_404(TestCaseImport, id=import_id)
+        return Response(TestCaseImportSerializer(test_case_import).data)
 
-            # Validate the test case exists
-            test_case = get_object_or_404(TestCase, id=test_case_id, is_active=True)
-            
-            # Prepare steps data
-            steps_data = request.data.get('steps', [])
-            if not isinstance(steps_data, list):
-                return Response(
-                    {"error": "Steps data must be a list"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            # Add test_case reference to each step
-            for step in steps_data:
-                step['test_case'] = test_case_id
-
-            # Validate steps data
-            serializer = TestStepBatchSerializer(data={'steps': steps_data})
-            if not serializer.is_valid():
-                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+class ResumeTestCaseImportView(APIView):
+    permission_classes = [IsAuthenticated]
 
-            # Delete existing steps
-            TestStep.objects.filter(test_case=test_case).delete()
+    def post(self, request, import_id):
+        """
+        Continue an interrupted or partly imported file after its last
+        committed batch. 409 while another request is running it.
+        """
+        test_case_import = get_object_or_404(TestCaseImport, id=import_id)
+        if test_case_import.status == 'Completed':
+            return Response(TestCaseImportSerializer(test_case_import).data)
+        return ImportTestCasesView.run_import(test_case_import, status.HTTP_200_OK)
 
-            # Create new steps
-            serializer.save()
-            
-            # Return updated steps
-            test_steps = TestStep.objects.filter(
-                test_case=test_case
-            ).order_by('order_number')
-            response_serializer = TestStepSerializer(test_steps, many=True)
-            
-            return Response(response_serializer.data, status=status.HTTP_200_OK)
+class ExportTestCasesView(ReadReplicaMixin, APIView):
+    permission_classes = [IsAuthenticated]
 
-        except TestCase.DoesNotExist:
-            return Response(
-                {"error": "Test case not found"},
-                status=status.HTTP_404_NOT_FOUND
-            )
-        except Exception as e:
+    def get(self, request, test_suite_id=None, project_id=None):
+        """
+        Stream the test cases of a suite or project as CSV or JSON Lines,
+        reading them through a server-side cursor
+        """
+        format_type = request.query_params.get('file_format', 'csv')
+        if format_type not in EXPORT_FORMATS:
             return Response(
-                {"error": str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {"error": f"Unsupported file format, expected one of {EXPORT_FORMATS}"},
+                status=status.HTTP_400_BAD_REQUEST
             )
 
-class ProjectTestCasesView(APIView):
-    def get(self, request, project_id):
-        """
-        Get all test cases under all test suites for a specific project.
-        """
-        # Ensure the project exists
-        project = get_object_or_404(Project, id=project_id, is_active=True)
-        
-        # Fetch all active test suites for the project
-        test_suites = TestSuite.objects.filter(project=project, is_active=True)
-        
-        # Fetch all active test cases for the retrieved test suites
-        test_cases = TestCase.objects.filter(suite__in=test_suites, is_active=True).select_related('suite', 'created_by_profile')
-        
-        # Serialize the test cases
-        serializer = TestCaseSerializer(test_cases, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        if test_suite_id:
+            source = get_object_or_404(TestSuite, id=test_suite_id, is_active=True)
+            test_cases = TestCase.objects.filter(suite=source, is_active=True)
+        else:
+            source = get_object_or_404(Project, id=project_id, is_active=True)
+            test_cases = TestCase.objects.filter(suite__project=source, suite__is_active=True, is_active=True)
+
+        response = StreamingHttpResponse(
+            iter_export(test_cases, format_type),
+            content_type=EXPORT_CONTENT_TYPES[format_type]
+        )
+        response['Content-Disposition'] = f'attachment; filename="test-cases-{source.id}.{format_type}"'
+        return response
     
-class GenerateTemplateSuggestionsView(APIView):
-    permission_classes = [IsAuthenticated]
+class GenerateTemplateSuggestionsView(AsyncAPIView):
+    async def get(self, request, test_case_id):
+        test_case = await aget_object_or_404(
+            TestCase.objects.select_related('suite__project'), id=test_case_id, is_active=True
+        )
+        async with quotas.limit(request, team_id=test_case.suite.project.team_id):
+            return await self.suggest_fields(test_case)
 
-    def get(self, request, test_case_id):
+    async def suggest_fields(self, test_case):
         try:
-            # Fetch the test case and its steps
-            test_case = get_object_or_404(TestCase, id=test_case_id, is_active=True)
-            test_steps = TestStep.objects.filter(test_case=test_case).order_by('order_number')
+            # Fetch the test case's steps
+            test_steps = [step async for step in TestStep.objects.filter(test_case=test_case).order_by('order_number')]
 
             # Prepare the test steps string
             steps_text = ""
@@ -801,7 +860,7 @@ Type: {test_case.type}
 Test Steps:
 {steps_text}"""
 
-            client = OpenAI()
+            client = get_openai_client()
 
             # Define the function schema for field suggestions
             functions = [{
@@ -862,15 +921,16 @@ Test Steps:
 
             # Make the API call to OpenAI
             try:
-                response = client.chat.completions.create(
+                response = await achat_completion(
+                    client,
                     model="gpt-4o",
                     messages=messages,
                     tools=functions,
                     tool_choice={"type": "function", "function": {"name": "suggest_data_fields"}}
                 )
             except Exception as openai_error:
-                print("OpenAI API Error:", str(openai_error))
-                return Response({'error': str(openai_error)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                logger.error("OpenAI API error", exc_info=True)
+                return JSONResponse({'error': str(openai_error)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
             # Extract the function call and arguments
             assistant_message = response.choices[0].message
@@ -879,22 +939,22 @@ Test Steps:
                 tool_call = assistant_message.tool_calls[0]
                 try:
                     arguments = json.loads(tool_call.function.arguments)
-                    return Response(arguments)
+                    return JSONResponse(arguments)
                 except json.JSONDecodeError as json_error:
-                    print("JSON decode error:", str(json_error))
-                    return Response(
+                    logger.warning("Could not parse tool call arguments: %s", json_error)
+                    return JSONResponse(
                         {'error': 'Failed to parse suggestions'}, 
                         status=status.HTTP_500_INTERNAL_SERVER_ERROR
                     )
             else:
-                return Response(
+                return JSONResponse(
                     {'error': 'No suggestions generated'}, 
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
                 )
 
         except Exception as e:
-            print("Exception occurred:", str(e))
-            return Response(
+            logger.exception("Template suggestion failed")
+            return JSONResponse(
                 {'error': str(e)}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
@@ -906,13 +966,15 @@ class SaveTestDataView(APIView):
         try:
             data = request.data
             
-            test_data = TestData.objects.create(
-                name=data['name'],
-                data_template=data['template'],
-                format_type='json',
-                created_by_profile=request.user.profile,
-                is_active=True
-            )
+            with transaction.atomic():
+                # Identical templates share one stored body
+                test_data = TestData.objects.create(
+                    name=data['name'],
+                    template=TemplateStore.acquire(data['template']),
+                    format_type='json',
+                    created_by_profile=request.user.profile,
+                    is_active=True
+                )
             
             # Link to test case if provided
             if data.get('testCaseId'):
@@ -930,131 +992,277 @@ class SaveTestDataView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-class GenerateTestDataView(APIView):
-    permission_classes = [IsAuthenticated]
+class GenerateTestDataView(AsyncAPIView):
+    # Larger requests have to be streamed as NDJSON or CSV
+    MAX_JSON_RECORDS = 10000
+    EXAMPLES_PER_FIELD = 25
 
-    def post(self, request):
-        try:
-            template = request.data.get('template')
-            test_case_id = request.data.get('testCaseId')
-            
-            # Get the test case for context
-            test_case = get_object_or_404(TestCase, id=test_case_id)
-            test_steps = TestStep.objects.filter(test_case=test_case).order_by('order_number')
-
-            # Prepare the test steps for context
+    async def suggest_examples(self, test_case, fields):
+        """
+        Ask the model for example values of the fields the local generator
+        could not infer anything about. One call per request, whatever the
+        record count.
+        """
+        context = ""
+        if test_case is not None:
+            test_steps = [step async for step in TestStep.objects.filter(test_case=test_case).order_by('order_number')]
             steps_text = ""
             for i, step in enumerate(test_steps):
                 steps_text += f"{i+1}. Action: {step.action}\n   Expected Result: {step.expected_result}\n"
-            
-            # Prepare the message with test case context
-            messages = [
-                {
-                    "role": "system",
-                    "content": (
-                        "You are a test data generator. Based on the provided test case and template, "
-                        "generate sample test data in JSON format. The data should be realistic and "
-                        "follow the specified field types and constraints."
-                    )
-                },
-                {
-                    "role": "user",
-                    "content": f"""Please generate 5 sample test data records in JSON format based on:
-
-Test Case:
+            context = f"""Test Case:
 Title: {test_case.title}
 Description: {test_case.description}
 Steps:
 {steps_text}
+"""
+
+        messages = [
+            {
+                "role": "system",
+                "content": (
+                    "You are a test data generator. Suggest realistic, varied example values for the "
+                    "given fields. Respond with a JSON object of the form "
+                    "{\"values\": {\"<field name>\": [<values>]}}."
+                )
+            },
+            {
+                "role": "user",
+                "content": f"""{context}
+Fields:
+{json.dumps([{'name': field.name, 'type': field.type} for field in fields], indent=2)}
+
+Give {self.EXAMPLES_PER_FIELD} distinct example values for each field, following its type."""
+            }
+        ]
+
+        client = get_openai_client()
+        response = await achat_completion(
+            client,
+            model="gpt-4o",
+            messages=messages,
+            response_format={ "type": "json_object" },
+            temperature=0.7
+        )
+        values = json.loads(response.choices[0].message.content).get('values')
+        return values if isinstance(values, dict) else {}
 
-Template Fields:
-{json.dumps(template['fields'], indent=2)}
+    @staticmethod
+    def store_dataset(test_data, generator, count):
+        """Store the records as a dataset of test_data, returns it serialized"""
+        dataset = DatasetStore.store(generator.iter_records(count), test_data=test_data, template=test_data.template, seed=generator.seed)
+        return GeneratedDatasetSerializer(dataset).data
 
-Requirements:
-1. Generate exactly 5 records
-2. Return data as a JSON array of objects
-3. Each object should have all the specified fields
-4. Follow the field types strictly
-5. Data should be realistic and relevant to the test case
-6. Return ONLY the JSON array, no explanation needed"""
-                }
-            ]
+    async def post(self, request):
+        """
+        Generate test data records from a template locally. Body:
+        `template` (with `fields`), optional `testCaseId`, `count` (default 5),
+        `seed` for reproducible output, `output` (json, ndjson or csv) and
+        `use_llm` (default true) to fetch example values for fields whose
+        meaning can't be inferred from their name, type or constraints.
+        Pass `testDataId` to store the records as a dataset of that test data
+        instead of returning them.
+        """
+        try:
+            template = request.data.get('template') or {}
+            test_case_id = request.data.get('testCaseId')
+            output_format = request.data.get('output', 'json')
+            use_llm = request.data.get('use_llm', True) not in (False, 'false', '0')
 
-            client = OpenAI()
-            
-            # Call OpenAI API with explicit JSON format requirement
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=messages,
-                response_format={ "type": "json_object" },
-                temperature=0.7
-            )
-            
-            # Parse and validate the response
             try:
-                generated_data = json.loads(response.choices[0].message.content)
-                
-                # Ensure we have a records array
-                if 'records' not in generated_data:
-                    # If we got a direct array, wrap it
-                    if isinstance(generated_data, list):
-                        generated_data = {'records': generated_data}
-                    else:
-                        # Create a records key if we got a single object
-                        generated_data = {'records': [generated_data]}
-                
-                return Response(generated_data, status=status.HTTP_200_OK)
-            
-            except json.JSONDecodeError as e:
-                print("JSON decode error:", str(e))
-                return Response(
-                    {'error': 'Failed to parse generated data'}, 
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                count = int(request.data.get('count', 5))
+                seed = request.data.get('seed')
+                seed = int(seed) if seed not in (None, '') else None
+            except (TypeError, ValueError):
+                return JSONResponse({'error': 'count and seed must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+            if output_format not in OUTPUT_FORMATS:
+                return JSONResponse(
+                    {'error': f"output must be one of {OUTPUT_FORMATS}"},
+                    status=status.HTTP_400_BAD_REQUEST
                 )
-                
+            if not 1 <= count <= MAX_RECORDS:
+                return JSONResponse(
+                    {'error': f"count must be between 1 and {MAX_RECORDS}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            test_data_id = request.data.get('testDataId')
+            if output_format == 'json' and count > self.MAX_JSON_RECORDS and not test_data_id:
+                return JSONResponse(
+                    {'error': f"Use ndjson or csv output for more than {self.MAX_JSON_RECORDS} records"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            try:
+                generator = TestDataGenerator(template.get('fields'), seed=seed)
+            except ValueError as e:
+                return JSONResponse({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            # The model is only asked about what the generator can't infer
+            if use_llm and generator.unresolved:
+                test_case = await aget_object_or_404(
+                    TestCase.objects.select_related('suite__project'), id=test_case_id
+                ) if test_case_id else None
+                async with quotas.limit(request, team_id=test_case.suite.project.team_id if test_case else None):
+                    try:
+                        generator.add_examples(await self.suggest_examples(test_case, generator.unresolved))
+                    except Exception:
+                        # Random strings are still valid test data, so carry on
+                        logger.warning("Example suggestion failed", exc_info=True)
+
+            if test_data_id:
+                test_data = await aget_object_or_404(
+                    TestData.objects.select_related('template'),
+                    id=test_data_id, created_by_profile__auth_user=request.user, is_active=True
+                )
+                dataset = await sync_to_async(self.store_dataset)(test_data, generator, count)
+                return JSONResponse(dataset, status=status.HTTP_201_CREATED)
+
+            if output_format == 'json':
+                # Generation is CPU bound, keep it off the event loop
+                records = await sync_to_async(generator.records, thread_sensitive=False)(count)
+                return JSONResponse(
+                    {'records': records, 'seed': generator.seed},
+                    status=status.HTTP_200_OK
+                )
+
+            rows = generator.iter_output(count, output_format)
+            response = StreamingHttpResponse(
+                # ASGI servers stream async iterators, sync ones would be buffered whole
+                aiter_sync(rows) if isinstance(request, ASGIRequest) else rows,
+                content_type=OUTPUT_CONTENT_TYPES[output_format]
+            )
+            response['Content-Disposition'] = f'attachment; filename="test-data-{generator.seed}.{output_format}"'
+            response['X-Test-Data-Seed'] = str(generator.seed)
+            return response
+
+        except quotas.QuotaExceeded:
+            raise
         except Exception as e:
-            print("Error generating test data:", str(e))
-            return Response(
+            logger.exception("Error generating test data")
+            return JSONResponse(
                 {'error': str(e)}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
             
-class TestDataListView(APIView):
+class TestDataListView(ReadReplicaMixin, APIView):
     permission_classes = [IsAuthenticated]
 
+    def serialize_test_data(self, td, include_template=True):
+        data = {
+            'id': str(td.id),
+            'name': td.name,
+            'description': td.description,
+            'data_template': td.data_template if include_template else None,  # Changed from 'template'
+            'format_type': td.format_type,
+            'created_at': td.created_at,
+            'updated_at': td.updated_at,
+            'is_active': td.is_active,
+            'test_cases': [
+                {
+                    'id': str(tc.id),
+                    'title': tc.title
+                } for tc in td.test_cases.all()
+            ]
+        }
+        if not include_template:
+            del data['data_template']
+        return data
+
     def get(self, request):
+        """
+        Keyset-paginated list of the user's test data, newest first. Supports
+        `cursor` and `page_size`, `include_template=false` to leave out the
+        template bodies, and `stream=json|ndjson` to stream every row instead.
+        """
         try:
             test_data = TestData.objects.filter(
-                created_by_profile=request.user.profile,
+                created_by_profile__auth_user=request.user,
                 is_active=True
-            ).order_by('-created_at')
-
-            data = []
-            for td in test_data:
-                data.append({
-                    'id': str(td.id),
-                    'name': td.name,
-                    'description': td.description,
-                    'data_template': td.data_template,  # Changed from 'template'
-                    'format_type': td.format_type,
-                    'created_at': td.created_at,
-                    'updated_at': td.updated_at,
-                    'is_active': td.is_active,
-                    'test_cases': [
-                        {
-                            'id': str(tc.id),
-                            'title': tc.title
-                        } for tc in td.test_cases.all()
-                    ]
-                })
+            ).prefetch_related(
+                # Linked test cases for every row in one query, id and title only
+                Prefetch('test_cases', queryset=TestCase.objects.only('id', 'title'))
+            )
 
-            return Response(data, status=status.HTTP_200_OK)
+            include_template = request.query_params.get('include_template', 'true') not in ('0', 'false')
+            if include_template:
+                test_data = test_data.select_related('template')
+
+            paginator = KeysetPagination()
+            stream_format = get_stream_format(request)
+            if stream_format:
+                test_data = test_data.order_by(*paginator.ordering)
+                return StreamingJSONResponse(
+                    (self.serialize_test_data(td, include_template) for td in test_data.iterator(chunk_size=500)),
+                    stream_format
+                )
+
+            page = paginator.paginate_queryset(test_data, request, view=self)
+            data = [self.serialize_test_data(td, include_template) for td in page]
+
+            return paginator.get_paginated_response(data)
+        except ValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response(
                 {'error': str(e)}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+class TestDataDatasetsView(ReadReplicaMixin, APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, test_data_id):
+        """List the datasets stored for a test data entry"""
+        test_data = get_object_or_404(TestData, id=test_data_id, created_by_profile__auth_user=request.user)
+        datasets = test_data.datasets.order_by('-created_at')
+        return Response(GeneratedDatasetSerializer(datasets, many=True).data)
+
+class TestDataDatasetDetailView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def delete(self, request, test_data_id, dataset_id):
+        """Unlink a dataset, it is deleted once nothing references it"""
+        test_data = get_object_or_404(TestData, id=test_data_id, created_by_profile__auth_user=request.user)
+        dataset = get_object_or_404(test_data.datasets, id=dataset_id)
+        DatasetStore.detach(test_data, dataset)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class DatasetRecordsView(ReadReplicaMixin, APIView):
+    permission_classes = [IsAuthenticated]
+
+    MAX_LIMIT = 10000
+
+    def get(self, request, dataset_id):
+        """
+        Read a range of records with `offset` and `limit`. Only the stored
+        blocks covering the range are decompressed. Pass `stream=ndjson` to
+        stream the range, where `limit` may be left out to read to the end.
+        """
+        dataset = get_object_or_404(
+            GeneratedDataset.objects.filter(test_data__created_by_profile__auth_user=request.user).distinct(),
+            id=dataset_id
+        )
+        try:
+            offset = max(int(request.query_params.get('offset', 0)), 0)
+            limit = request.query_params.get('limit')
+            limit = max(int(limit), 0) if limit not in (None, '') else None
+        except ValueError:
+            return Response({'error': 'offset and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if request.query_params.get('stream') == 'ndjson':
+            return StreamingHttpResponse(
+                DatasetStore.iter_lines(dataset, offset, limit),
+                content_type='application/x-ndjson'
+            )
+
+        limit = min(limit if limit is not None else 100, self.MAX_LIMIT)
+        return Response({
+            'offset': offset,
+            'limit': limit,
+            'total': dataset.record_count,
+            'records': DatasetStore.read_records(dataset, offset, limit),
+        })
+
 class CreateDefectView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -1091,15 +1299,95 @@ class CreateDefectView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-class DefectsListView(APIView):
+class DefectFilterMixin:
+    """
+    Shared defect filtering for the list and bulk endpoints. Filters are read
+    from any mapping, so they can come from query params or a request body.
+    """
+    # Facet name -> Defect column it groups on
+    FACETS = {
+        'status': 'status',
+        'priority': 'priority',
+        'severity': 'severity',
+        'assignee': 'assigned_to_profile',
+    }
+
+    def get_facet_filters(self, params):
+        """Active facet filters, raises ValidationError for malformed values"""
+        facet_filters = {}
+        for facet in self.FACETS:
+            value = params.get(facet)
+            if value is None or value == '' or value == 'all':
+                continue
+            if not isinstance(value, str):
+                raise ValidationError({facet: ["Must be a string."]})
+            if facet == 'assignee' and value != 'unassigned':
+                try:
+                    # Same form as the facet counts' keys
+                    value = str(uuid.UUID(value))
+                except ValueError:
+                    raise ValidationError({facet: ["Must be a profile id or 'unassigned'."]})
+            facet_filters[facet] = value
+        return facet_filters
+
+    def apply_facet_filters(self, defects, facet_filters):
+        for facet, value in facet_filters.items():
+            if facet == 'assignee':
+                if value == 'unassigned':
+                    defects = defects.filter(assigned_to_profile__isnull=True)
+                else:
+                    defects = defects.filter(assigned_to_profile_id=value)
+            else:
+                defects = defects.filter(**{self.FACETS[facet]: value})
+        return defects
+
+    def apply_search_filters(self, defects, params, request):
+        search = params.get('search')
+        if search is not None and not isinstance(search, str):
+            raise ValidationError({'search': ["Must be a string."]})
+        if search:
+            defects = defects.filter(
+                Q(title__icontains=search) |
+                Q(description__icontains=search)
+            )
+            
+        if params.get('view', 'all') == 'my':
+            defects = defects.filter(
+                Q(assigned_to_profile=request.user.profile) |
+                Q(reported_by_profile=request.user.profile)
+            )
+        return defects
+
+class DefectsListView(ReadReplicaMixin, DefectFilterMixin, APIView):
     permission_classes = [IsAuthenticated]
 
+    def get_facet_counts(self, defects, facet_filters):
+        """
+        Count defects per facet value in a single grouped query. Each facet's
+        counts honour every active filter except its own, so the UI can show
+        what selecting another value would return.
+        """
+        rows = defects.order_by().values(*self.FACETS.values()).annotate(count=Count('id'))
+
+        facets = {facet: {} for facet in self.FACETS}
+        for row in rows:
+            keys = {facet: row[column] for facet, column in self.FACETS.items()}
+            keys['assignee'] = str(keys['assignee']) if keys['assignee'] else 'unassigned'
+            for facet in self.FACETS:
+                if all(keys[other] == value for other, value in facet_filters.items() if other != facet):
+                    facets[facet][keys[facet]] = facets[facet].get(keys[facet], 0) + row['count']
+        return facets
+
     def get(self, request, team_id, project_id):
+        """
+        Keyset-paginated defect list. Supports `cursor`, `page_size` and a
+        comma separated `fields` list to return a sparse fieldset. Pass
+        `facets=true` to include per-value counts for each facet, or
+        `stream=json|ndjson` to stream every matching defect unpaginated.
+        """
         try:
             # Get query parameters
-            view = request.query_params.get('view', 'all')
-            priority = request.query_params.get('priority')
-            search = request.query_params.get('search')
+            facet_filters = self.get_facet_filters(request.query_params)
             
             # Get defects for this project
             defects = Defect.objects.filter(
@@ -1109,118 +1397,179 @@ class DefectsListView(APIView):
             )
             
             # Apply filters based on query params
-            if priority and priority != 'all':
-                defects = defects.filter(priority=priority)
-                
-            if search:
-                defects = defects.filter(
-                    Q(title__icontains=search) |
-                    Q(description__icontains=search)
-                )
-                
-            if view == 'my':
-                defects = defects.filter(
-                    Q(assigned_to_profile=request.user.profile) |
-                    Q(reported_by_profile=request.user.profile)
-                )
-            
-            # Order by most recently created
-            defects = defects.order_by('-created_at')
-            
-            serializer = DefectSerializer(defects, many=True)
-            return Response(serializer.data)
+            defects = self.apply_search_filters(defects, request.query_params, request)
+
+            facets = None
+            if request.query_params.get('facets') in ('1', 'true'):
+                facets = self.get_facet_counts(defects, facet_filters)
+
+            defects = self.apply_facet_filters(defects, facet_filters)
             
+            # Only load the columns the list representation needs
+            fields = [
+                field for field in request.query_params.get('fields', '').split(',')
+                if field in DefectListSerializer.Meta.fields
+            ]
+            paginator = KeysetPagination()
+            defects = defects.only(*set(fields or DefectListSerializer.Meta.fields) | set(paginator.get_ordering_fields()))
+
+            stream_format = get_stream_format(request)
+            if stream_format:
+                defects = defects.order_by(*paginator.ordering)
+                return StreamingJSONResponse(
+                    iter_serialized(defects, DefectListSerializer, chunk_size=2000, fields=fields),
+                    stream_format
+                )
+
+            # Most recently created first, one page at a time
+            page = paginator.paginate_queryset(defects, request, view=self)
+            serializer = DefectListSerializer(page, many=True, fields=fields)
+            response = paginator.get_paginated_response(serializer.data)
+            if facets is not None:
+                response.data['facets'] = facets
+            return response
+
+        except ValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            print(f"Error in DefectsListView: {str(e)}")  # For debugging
+            logger.exception("Error in DefectsListView")
             return Response(
                 {'error': str(e)}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-class DefectDetailView(APIView):
+class DefectBulkUpdateView(DefectFilterMixin, APIView):
     permission_classes = [IsAuthenticated]
 
-    def get(self, request, team_id, project_id, defect_id):
-        try:
-            defect = get_object_or_404(
-                Defect, 
-                id=defect_id,
-                project_id=project_id,
-                project__team_id=team_id,
-                is_active=True
+    # Change set key -> Defect attribute it writes
+    CHANGE_FIELDS = {
+        'status': 'status',
+        'priority': 'priority',
+        'severity': 'severity',
+        'assignee_id': 'assigned_to_profile_id',
+    }
+    TAG_CHANGES = ('tags', 'add_tags', 'remove_tags')
+    MAX_UPDATE_GROUPS = 20
+
+    def apply_changes(self, defect, changes):
+        for key, attr in self.CHANGE_FIELDS.items():
+            if key in changes:
+                setattr(defect, attr, changes[key])
+
+        if any(key in changes for key in self.TAG_CHANGES):
+            metadata = dict(defect.metadata or {})
+            tags = list(changes.get('tags', metadata.get('tags', [])))
+            tags += [tag for tag in changes.get('add_tags', []) if tag not in tags]
+            tags = [tag for tag in tags if tag not in changes.get('remove_tags', [])]
+            metadata['tags'] = tags
+            defect.metadata = metadata
+
+    def write_changes(self, defects, fields, columns):
+        """
+        Rows that ended up with identical values share one UPDATE. Only when
+        tag edits leave too many distinct combinations do we fall back to
+        bulk_update, whose per-row CASE expressions are far more expensive.
+        """
+        updated_at = timezone.now()
+        groups = {}
+        for defect in defects:
+            key = json.dumps([getattr(defect, field) for field in fields], sort_keys=True, default=str)
+            groups.setdefault(key, []).append(defect)
+
+        if len(groups) > self.MAX_UPDATE_GROUPS:
+            for defect in defects:
+                defect.updated_at = updated_at
+            Defect.objects.bulk_update(defects, columns + ['updated_at'], batch_size=500)
+            return
+
+        for group in groups.values():
+            Defect.objects.filter(id__in=[defect.id for defect in group]).update(
+                updated_at=updated_at,
+                **{field: getattr(group[0], field) for field in fields}
             )
-            
-            # Get team members for assignment options
-            team_members = TeamMember.objects.filter(
-                team_id=team_id,
-                is_active=True
-            ).select_related('profile__auth_user')
 
-            serializer = DefectDetailSerializer(defect)
-            
-            # Add team members to response for assignment dropdown
-            response_data = {
-                **serializer.data,
-                'team_members': [
-                    {
-                        'id': tm.profile.id,
-                        'name': tm.profile.auth_user.get_full_name(),
-                        'email': tm.profile.auth_user.email
-                    }
-                    for tm in team_members
-                ]
-            }
-            
-            return Response(response_data)
-            
-        except Exception as e:
-            return Response(
-                {'error': str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+    def post(self, request, team_id, project_id):
+        """
+        Apply one change set to many defects, selected by `ids` or by the
+        same `filter` keys the list view accepts, in a single transaction
+        """
+        serializer = DefectBulkUpdateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    def patch(self, request, team_id, project_id, defect_id):
         try:
-            defect = get_object_or_404(
-                Defect, 
-                id=defect_id,
+            changes = serializer.validated_data['changes']
+            ids = serializer.validated_data.get('ids')
+
+            defects = Defect.objects.filter(
                 project_id=project_id,
                 project__team_id=team_id,
                 is_active=True
             )
-            
-            # Update the defect
-            serializer = DefectDetailSerializer(
-                defect,
-                data=request.data,
-                partial=True
-            )
-            
-            if serializer.is_valid():
-                # Handle metadata updates (tags, affected area)
-                metadata = defect.metadata or {}
-                if 'tags' in request.data:
-                    metadata['tags'] = request.data['tags']
-                if 'affected_area' in request.data:
-                    metadata['affected_area'] = request.data['affected_area']
-                
-                # Save with metadata and return updated defect
-                defect = serializer.save(metadata=metadata)
-                
-                # Create history entry
-                DefectHistory.objects.create(
-                    defect=defect,
-                    changed_by_profile=request.user.profile,
-                    field_name='Updated defect',
-                    old_value='',
-                    new_value=f"Updated by {request.user.get_full_name()}"
+            if ids is not None:
+                defects = defects.filter(id__in=ids)
+            else:
+                params = serializer.validated_data['filter']
+                defects = self.apply_search_filters(defects, params, request)
+                defects = self.apply_facet_filters(defects, self.get_facet_filters(params))
+
+            # Only the columns being changed are loaded, diffed and written
+            fields = [attr for key, attr in self.CHANGE_FIELDS.items() if key in changes]
+            if any(key in changes for key in self.TAG_CHANGES):
+                fields.append('metadata')
+            columns = [field.removesuffix('_id') for field in fields]
+
+            changed_by = request.user.profile.id
+
+            with transaction.atomic():
+                defects = list(
+                    defects.select_for_update(of=('self',))
+                    .only('id', *columns)[:DefectBulkUpdateSerializer.MAX_DEFECTS + 1]
                 )
-                
-                return Response(serializer.data)
-                
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-            
+                if len(defects) > DefectBulkUpdateSerializer.MAX_DEFECTS:
+                    return Response(
+                        {'error': f'Filter matches more than {DefectBulkUpdateSerializer.MAX_DEFECTS} defects'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+
+                history = []
+                changed = []
+                results = {}
+                for defect in defects:
+                    before = DefectHistory.snapshot(defect, fields)
+                    self.apply_changes(defect, changes)
+                    rows = DefectHistory.build_changes(defect, before, changed_by)
+                    if rows:
+                        changed.append(defect)
+                        history.extend(rows)
+                    results[defect.id] = {
+                        'id': str(defect.id),
+                        'result': 'updated' if rows else 'unchanged',
+                        'changed_fields': [row.field_name for row in rows],
+                    }
+
+                if changed:
+                    self.write_changes(changed, fields, columns)
+                    DefectHistory.objects.bulk_create(history, batch_size=1000)
+
+            if ids is not None:
+                for defect_id in ids:
+                    results.setdefault(defect_id, {
+                        'id': str(defect_id),
+                        'result': 'not_found',
+                        'changed_fields': [],
+                    })
+
+            return Response({
+                'matched': len(defects),
+                'updated': len(changed),
+                'results': list(results.values()),
+            })
+
+        except ValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
+            logger.exception("Error in DefectBulkUpdateView")
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -1229,43 +1578,33 @@ class DefectDetailView(APIView):
 class DefectDetailView(APIView):
     permission_classes = [IsAuthenticated]
 
+    def get_defect(self, team_id, project_id, defect_id):
+        return get_object_or_404(
+            DefectDetailSerializer.setup_eager_loading(Defect.objects.all()),
+            id=defect_id,
+            project_id=project_id,
+            project__team_id=team_id,
+            is_active=True
+        )
+
     def get(self, request, team_id, project_id, defect_id):
         try:
-            # Get the defect
-            defect = get_object_or_404(
-                Defect,
-                id=defect_id,
-                project_id=project_id,
-                project__team_id=team_id,
-                is_active=True
-            )
-            
-            # Get team members for the assignment dropdown
-            team_members = TeamMember.objects.filter(
-                team_id=team_id,
-                is_active=True
-            ).select_related('profile__auth_user')
+            # Get the defect along with its reporter and assignee
+            defect = self.get_defect(team_id, project_id, defect_id)
             
             # Serialize defect data
             serializer = DefectDetailSerializer(defect)
             
-            # Add team members to response
+            # Add team members for the assignment dropdown
             response_data = {
                 **serializer.data,
-                'team_members': [
-                    {
-                        'id': str(tm.profile.id),
-                        'name': tm.profile.auth_user.get_full_name() or tm.profile.auth_user.email,
-                        'email': tm.profile.auth_user.email
-                    }
-                    for tm in team_members
-                ]
+                'team_members': TeamRosterService.get_roster(team_id)
             }
             
             return Response(response_data)
         
         except Exception as e:
-            print(f"Error in DefectDetailView GET: {str(e)}")  # For debugging
+            logger.exception("Error in DefectDetailView GET")
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -1273,31 +1612,28 @@ class DefectDetailView(APIView):
 
     def patch(self, request, team_id, project_id, defect_id):
         try:
-            defect = get_object_or_404(
-                Defect,
-                id=defect_id,
-                project_id=project_id,
-                project__team_id=team_id,
-                is_active=True
-            )
+            defect = self.get_defect(team_id, project_id, defect_id)
+            
+            before = DefectHistory.snapshot(defect)
             
             # Get data from request
             data = request.data.copy()
+            save_kwargs = {}
             
             # Handle assignee update
             if 'assignee_id' in data:
                 assignee_id = data.pop('assignee_id')
                 if assignee_id:
                     try:
-                        profile = Profile.objects.get(id=assignee_id)
-                        data['assigned_to_profile'] = profile
+                        profile = Profile.objects.select_related('auth_user').get(id=assignee_id)
+                        save_kwargs['assigned_to_profile'] = profile
                     except Profile.DoesNotExist:
                         return Response(
                             {'error': 'Invalid assignee ID'},
                             status=status.HTTP_400_BAD_REQUEST
                         )
                 else:
-                    data['assigned_to_profile'] = None
+                    save_kwargs['assigned_to_profile'] = None
             
             # Handle metadata updates (tags, affected area)
             metadata = defect.metadata or {}
@@ -1315,24 +1651,16 @@ class DefectDetailView(APIView):
             )
             
             if serializer.is_valid():
-                updated_defect = serializer.save()
+                # Resolve the editor's profile inside the history INSERT
+                changed_by = Subquery(Profile.objects.filter(auth_user_id=request.user.id).values('id')[:1])
+                with transaction.atomic():
+                    serializer.save(**save_kwargs)
+                    DefectHistory.record_changes(defect, before, changed_by)
                 
                 # Return updated defect with team members
-                team_members = TeamMember.objects.filter(
-                    team_id=team_id,
-                    is_active=True
-                ).select_related('profile__auth_user')
-                
                 response_data = {
                     **serializer.data,
-                    'team_members': [
-                        {
-                            'id': str(tm.profile.id),
-                            'name': tm.profile.auth_user.get_full_name() or tm.profile.auth_user.email,
-                            'email': tm.profile.auth_user.email
-                        }
-                        for tm in team_members
-                    ]
+                    'team_members': TeamRosterService.get_roster(team_id)
                 }
                 
                 return Response(response_data)
@@ -1343,13 +1671,47 @@ class DefectDetailView(APIView):
             )
             
         except Exception as e:
-            print(f"Error in DefectDetailView PATCH: {str(e)}")  # For debugging
+            logger.exception("Error in DefectDetailView PATCH")
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-class ProjectAnalyticsView(APIView):
+class DefectHistoryView(ReadReplicaMixin, APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, team_id, project_id, defect_id):
+        """
+        Keyset-paginated change timeline for a defect, newest first
+        """
+        try:
+            get_object_or_404(
+                Defect,
+                id=defect_id,
+                project_id=project_id,
+                project__team_id=team_id,
+                is_active=True
+            )
+
+            history = DefectHistory.objects.filter(
+                defect_id=defect_id
+            ).select_related('changed_by_profile__auth_user')
+
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(history, request, view=self)
+            serializer = DefectHistorySerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+
+        except ValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.exception("Error in DefectHistoryView")
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+class ProjectAnalyticsView(ReadReplicaMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, project_id):
@@ -1377,21 +1739,20 @@ class ProjectAnalyticsView(APIView):
             }, status=status.HTTP_404_NOT_FOUND)
         
         except Exception as e:
-            print(f"Unexpected error in project analytics: {e}")
+            logger.exception("Unexpected error in project analytics")
             return Response({
                 'error': 'Failed to retrieve analytics',
                 'details': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
             
-class ProjectDashboardView(APIView):
-    permission_classes = [IsAuthenticated]
+class ProjectDashboardView(ReadReplicaMixin, AsyncAPIView):
 
-    def get_ai_suggestions(self, project_metrics):
+    async def get_ai_suggestions(self, project_metrics):
         """
         Generate AI-powered smart suggestions based on project metrics
         """
         try:
-            client = OpenAI()
+            client = get_openai_client()
 
             # Prepare project metrics for AI analysis
             metrics_summary = f"""
@@ -1453,8 +1814,10 @@ class ProjectDashboardView(APIView):
                 }
             ]
 
-            # Generate AI suggestions
-            response = client.chat.completions.create(
+            # Generate AI suggestions, within the upstream budget
+            await quotas.reserve_upstream()
+            response = await achat_completion(
+                client,
                 model="gpt-4o",
                 messages=messages,
                 tools=functions,
@@ -1471,7 +1834,7 @@ class ProjectDashboardView(APIView):
                     suggestions = json.loads(tool_call.function.arguments)
                     return suggestions
                 except Exception as json_error:
-                    print("JSON parsing error:", str(json_error))
+                    logger.warning("Could not parse suggestion arguments: %s", json_error)
                     return {
                         "primary_suggestion": "Review and optimize your current testing processes",
                         "secondary_suggestions": [
@@ -1488,8 +1851,8 @@ class ProjectDashboardView(APIView):
                     ]
                 }
 
-        except Exception as e:
-            print(f"AI Suggestion Generation Error: {e}")
+        except Exception:
+            logger.exception("AI suggestion generation failed")
             return {
                 "primary_suggestion": "Review and optimize your current testing processes",
                 "secondary_suggestions": [
@@ -1498,17 +1861,17 @@ class ProjectDashboardView(APIView):
                 ]
             }
 
-    def get(self, request, project_id):
+    async def get(self, request, project_id):
         """
         Comprehensive dashboard metrics for a specific project
         """
         try:
             # Fetch project details
-            project = Project.objects.get(id=project_id)
+            project = await Project.objects.aget(id=project_id)
             
             # Calculate test case metrics
             test_cases = TestCase.objects.filter(suite__project=project)
-            total_test_cases = test_cases.count()
+            total_test_cases = await test_cases.acount()
             
             # Calculate test execution metrics for the last 7 days
             seven_days_ago = timezone.now() - timedelta(days=7)
@@ -1518,17 +1881,17 @@ class ProjectDashboardView(APIView):
             )
             
             # Passed tests calculation
-            total_test_executions = test_executions.count()
-            passed_test_executions = test_executions.filter(status='Passed').count()
+            total_test_executions = await test_executions.acount()
+            passed_test_executions = await test_executions.filter(status='Passed').acount()
             passed_percentage = (passed_test_executions / total_test_executions * 100) if total_test_executions > 0 else 0
             
             # Defect metrics
             defects = Defect.objects.filter(project=project)
-            active_defects = defects.filter(status__in=['Open', 'In Progress']).count()
-            high_priority_defects = defects.filter(
+            active_defects = await defects.filter(status__in=['Open', 'In Progress']).acount()
+            high_priority_defects = await defects.filter(
                 status__in=['Open', 'In Progress'], 
                 priority='High'
-            ).count()
+            ).acount()
             
             # Test coverage calculation
             test_coverage = (passed_test_executions / total_test_cases * 100) if total_test_cases > 0 else 0
@@ -1545,21 +1908,23 @@ class ProjectDashboardView(APIView):
                     'open_defects': active_defects,
                     'defect_distribution': [
                         {'severity': d['severity'], 'count': d['count']} 
-                        for d in defects.values('severity').annotate(count=Count('id'))
+                        async for d in defects.values('severity').annotate(count=Count('id'))
                     ]
                 }
             }
             
             # Generate AI suggestions
-            ai_suggestions = self.get_ai_suggestions(project_metrics)
+            ai_suggestions = await self.get_ai_suggestions(project_metrics)
             
+            new_test_cases = await test_cases.filter(created_at__gte=seven_days_ago).acount()
+
             # Prepare dashboard metrics
             dashboard_metrics = [
                 {
                     'id': 'test-cases',
                     'title': 'Total Test Cases',
                     'value': str(total_test_cases),
-                    'change': f'+{test_cases.filter(created_at__gte=seven_days_ago).count()} this week',
+                    'change': f'+{new_test_cases} this week',
                 },
                 {
                     'id': 'defects',
@@ -1581,7 +1946,7 @@ class ProjectDashboardView(APIView):
                 }
             ]
             
-            return Response({
+            return JSONResponse({
                 'project': {
                     'id': str(project.id),
                     'name': project.name,
@@ -1616,13 +1981,43 @@ class ProjectDashboardView(APIView):
             }, status=status.HTTP_200_OK)
         
         except Project.DoesNotExist:
-            return Response({
+            return JSONResponse({
                 'error': 'Project not found'
             }, status=status.HTTP_404_NOT_FOUND)
         
         except Exception as e:
-            print(f"Error in project dashboard: {e}")
-            return Response({
+            logger.exception("Error in project dashboard")
+            return JSONResponse({
                 'error': 'Failed to retrieve project dashboard',
                 'details': str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint for the metrics of this process"""
+    if not metrics_enabled():
+        raise Http404()
+
+    token = settings.PERFORMANCE_METRICS.get('TOKEN')
+    if token:
+        if not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return HttpResponse(status=401)
+    elif not settings.DEBUG or request.META.get('REMOTE_ADDR') not in ('127.0.0.1', '::1'):
+        # Behind a reverse proxy every request comes from a local address, so
+        # only development servers go without a token
+        return HttpResponse(status=403)
+
+    return HttpResponse(metrics_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@require_safe
+def jwks_view(request):
+    """
+    Public keys that verify our tokens, as a JSON Web Key Set. Empty while
+    tokens are signed with the shared HS256 secret.
+    """
+    key_ring = get_key_ring()
+    response = HttpResponse(key_ring.jwks if key_ring else b'{"keys":[]}', content_type='application/json')
+    # Keys are staged for longer than this before they sign anything
+    patch_cache_control(response, public=True, max_age=JWKS_MAX_AGE)
+    return response
@@ -1,8 +1,16 @@
 # setup_jwt_keys.py
+import argparse
+import base64
+import hashlib
+import json
 import secrets
 import os
+import time
 from pathlib import Path
 
+KEYS_FILE = 'jwt_keys.json'
+ALGORITHMS = ('RS256', 'ES256', 'EdDSA')
+
 def setup_jwt_keys():
     """Set up JWT keys for both development and production environments"""
     
@@ -51,5 +59,91 @@ ALLOWED_HOSTS = ['localhost', '127.0.0.1']
     print("2. Use different keys for development and production")
     print("3. In production, always set JWT_SECRET_KEY in environment variables")
 
+
+def generate_private_key(algorithm):
+    """A new private key for the algorithm, PKCS8 PEM encoded"""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+    if algorithm == 'RS256':
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    elif algorithm == 'ES256':
+        key = ec.generate_private_key(ec.SECP256R1())
+    elif algorithm == 'EdDSA':
+        key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        raise ValueError(f"Unsupported algorithm {algorithm}")
+
+    pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    public_der = key.public_key().public_bytes(serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo)
+    # The kid is derived from the public key, so it is the same wherever the key is loaded
+    kid = base64.urlsafe_b64encode(hashlib.sha256(public_der).digest()[:12]).decode().rstrip('=')
+    return kid, pem.decode()
+
+
+def rotate_jwt_keys(path=KEYS_FILE, algorithm='EdDSA', stage=False, grace=2 * 24 * 3600):
+    """
+    Add a key to the JWT keys file and, unless staging, make it the signing
+    key. A staged key is published in the JWKS without signing anything yet;
+    the next rotation activates it instead of making a new one, so stage a
+    key at least the JWKS cache time before rotating to it. Retired keys
+    keep verifying the tokens they signed for `grace` seconds, which has to
+    cover the refresh token lifetime.
+    """
+    path = Path(path)
+    data = json.loads(path.read_text()) if path.exists() else {'keys': []}
+    keys = data['keys']
+    now = int(time.time())
+
+    staged = [key for key in keys if key.get('activated') is None and key['alg'] == algorithm]
+    if staged and not stage:
+        new_key = max(staged, key=lambda key: key['created'])
+        print(f"Activating staged key {new_key['kid']}")
+    else:
+        kid, private_key = generate_private_key(algorithm)
+        new_key = {'kid': kid, 'alg': algorithm, 'created': now, 'activated': None, 'retired': None, 'private_key': private_key}
+        keys.append(new_key)
+        print(f"Created {algorithm} key {kid}")
+
+    if not stage:
+        for key in keys:
+            if key.get('activated') is not None and key.get('retired') is None:
+                key['retired'] = now
+                print(f"Retired key {key['kid']}")
+        new_key['activated'] = now
+
+    pruned = [key for key in keys if key.get('retired') is not None and key['retired'] + grace < now]
+    for key in pruned:
+        print(f"Removed key {key['kid']}, retired over {grace} seconds ago")
+    data['keys'] = [key for key in keys if key not in pruned]
+
+    # Written whole then renamed, so the server never reads half a file
+    tmp_path = path.with_name(path.name + '.tmp')
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+    gitignore_path = Path('.gitignore')
+    content = gitignore_path.read_text() if gitignore_path.exists() else ''
+    if path.name not in content:
+        with open(gitignore_path, 'a') as f:
+            f.write(f'\n{path.name}\n')
+
+    print(f"\n{path} has {len(data['keys'])} keys, never commit it to version control")
+
+
 if __name__ == '__main__':
-    setup_jwt_keys()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Set up the JWT keys")
+    subparsers = parser.add_subparsers(dest='command')
+    rotate = subparsers.add_parser('rotate', help="Create or activate an asymmetric signing key")
+    rotate.add_argument('--file', default=os.getenv('JWT_KEYS_FILE', KEYS_FILE))
+    rotate.add_argument('--algorithm', choices=ALGORITHMS, default='EdDSA')
+    rotate.add_argument('--stage', action='store_true', help="Publish the new key without signing with it yet")
+    rotate.add_argument('--grace', type=int, default=2 * 24 * 3600, help="Seconds a retired key keeps verifying tokens")
+    args = parser.parse_args()
+
+    if args.command == 'rotate':
+        rotate_jwt_keys(args.file, args.algorithm, args.stage, args.grace)
+    else:
+        setup_jwt_keys()